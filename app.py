@@ -1,9 +1,17 @@
 import os
-import eventlet
-eventlet.monkey_patch()
-from flask import Flask, render_template, request, jsonify
+if __name__ == '__main__':
+    # Patch before anything else is imported (wsgi.py does the same for servers)
+    import eventlet
+    eventlet.monkey_patch()
+import time
+_import_started = time.perf_counter()
+from flask import Blueprint, Flask, current_app, render_template, request, jsonify, url_for
+from flask.cli import with_appcontext
 from flask_socketio import SocketIO, emit
+import click
 import logging
+import sys
+import threading
 
 # Suppress noisy ConnectionAbortedError/BrokenPipeError tracebacks from eventlet wsgi when a client aborts a request.
 # These occur when the client cancels a range download (e.g. a partial audio file request) and are harmless.
@@ -25,180 +33,667 @@ logging.getLogger('eventlet.wsgi').addFilter(IgnoreSocketErrorsFilter())
 logging.getLogger().addFilter(IgnoreSocketErrorsFilter())
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, UTC
-import threading
-import time
+from sqlalchemy.orm import aliased
 from db import db
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'IRISH-2025'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-if os.environ.get('RENDER'):
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL'].replace('postgres://', 'postgresql://', 1)
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///irish.db'
-
-# Now initialize your models with this same db
-db.init_app(app)
-
-from models import Team, TeamRanking, Match, MatchEvent
-
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
-
-# Global timer variables
-current_match_id = None
-timer_thread = None
-timer_running = False
-field_fault_active = False
-
-# Create database tables
-with app.app_context():
+import db_profiles
+from assets import assets
+from metrics import metrics, sample_lines
+from tracing import tracer
+
+from models import Team, TeamRanking, Match, MatchEvent, MatchRankingPoints, MatchSnapshot
+from live_state import live_store
+from match_clock import MatchClock, TickStats
+from score_batcher import score_batcher
+from rankings import ranking_index, write_rank_changes, RANKED_STATUSES
+from data_versions import matches_version, rankings_version, epoch
+from rooms import router, EVENT_ROOMS
+from packets import Payload, packets
+from replay import replay
+from current_match import current_match
+from cluster import cluster, match_state
+from event_store import event_store, MatchState, EVENT_BONUS, EVENT_OVERRIDE
+from game_rules import game_rules, ALLIANCES, OPPONENT
+from team_directory import team_directory
+from schedule_import import import_schedule, parse_csv, parse_json, ScheduleImportError
+
+# HTTP routes are registered on this blueprint and Socket.IO handlers on the unbound
+# socketio below; create_app() binds them and every extension to a Flask app.
+bp = Blueprint('irish', __name__)
+socketio = SocketIO()
+# The app built by create_app(), for background tasks that need an app context
+app = None
+# Cold-start timings: module import, create_app() and the concurrent cache warm-up
+startup_stats = {'import_ms': None, 'create_app_ms': None, 'warm_up_ms': None, 'warm_up_tasks': {}}
+
+def create_app(config=None):
+    """Build the Flask app: configuration from IRISH_* environment variables (then
+    ``config``), extensions and routes. Does not touch the database; see init-db
+    for the schema and warm_up() for the caches."""
+    global app
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'IRISH-2025'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    if os.environ.get('RENDER'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL'].replace('postgres://', 'postgresql://', 1)
+    else:
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('IRISH_DATABASE_URL', 'sqlite:///irish.db')
+
+    # Engine profile: 'tuned' (WAL + synchronous=NORMAL for SQLite, explicit pooling and a
+    # statement timeout for Postgres) or 'default' (driver defaults); see db_profiles.py
+    app.config['DB_PROFILE'] = os.environ.get('IRISH_DB_PROFILE', 'tuned')
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('IRISH_SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('IRISH_SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('IRISH_SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('IRISH_DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('IRISH_DB_MAX_OVERFLOW', 20))
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('IRISH_DB_STATEMENT_TIMEOUT_MS', 10000))
+
+    # Live match state: 'write_behind' keeps the running match in memory and persists it
+    # in the background, 'sync' commits every score/timer change before broadcasting
+    app.config['LIVE_STATE_MODE'] = os.environ.get('IRISH_LIVE_STATE_MODE', 'write_behind')
+    app.config['LIVE_STATE_FLUSH_INTERVAL'] = float(os.environ.get('IRISH_LIVE_STATE_FLUSH_INTERVAL', 0.5))
+    # Score events arriving within this many milliseconds are applied and broadcast together (0 disables batching)
+    app.config['SCORE_BATCH_WINDOW_MS'] = float(os.environ.get('IRISH_SCORE_BATCH_WINDOW_MS', 25))
+    # Optional JSON file overriding point values / RP thresholds of the game rules
+    app.config['GAME_RULES_FILE'] = os.environ.get('IRISH_GAME_RULES')
+    # Matches whose replay covered at least this many MatchEvents get a fresh snapshot
+    app.config['EVENT_SNAPSHOT_INTERVAL'] = int(os.environ.get('IRISH_EVENT_SNAPSHOT_INTERVAL', 50))
+    # Multi-worker mode: Socket.IO message queue (redis://, amqp://, kafka://, ...) carrying emits
+    # between workers, Redis URL for shared match/timer state, and the timer-owner lease in seconds
+    app.config['SOCKETIO_MESSAGE_QUEUE'] = os.environ.get('IRISH_MESSAGE_QUEUE')
+    app.config['SHARED_STATE_URL'] = os.environ.get('IRISH_STATE_URL')
+    app.config['TIMER_LEASE_TTL'] = float(os.environ.get('IRISH_TIMER_LEASE_TTL', 5))
+    # Largest page GET /api/matches?limit= returns (larger limits are clamped)
+    app.config['MATCHES_MAX_PAGE_SIZE'] = int(os.environ.get('IRISH_MATCHES_MAX_PAGE_SIZE', 500))
+    # Clients run the countdown locally; timer_state is re-sent this often (seconds) to correct drift
+    app.config['TIMER_SYNC_INTERVAL'] = int(os.environ.get('IRISH_TIMER_SYNC_INTERVAL', 15))
+    # Static assets: 'startup' rebuilds the hashed/precompressed copies in static/dist when
+    # static/ changed, 'off' only uses an existing build (python assets.py build)
+    app.config['ASSET_BUILD'] = os.environ.get('IRISH_ASSET_BUILD', 'startup')
+    # Prometheus metrics at /metrics (handler/route latency, commits, fan-out, hub load)
+    app.config['METRICS_ENABLED'] = os.environ.get('IRISH_METRICS', '1') != '0'
+    # Score event latency tracing (referee tap -> display render) into a ring buffer of this many traces
+    app.config['TRACING_ENABLED'] = os.environ.get('IRISH_TRACING', '0') == '1'
+    app.config['TRACE_BUFFER_SIZE'] = int(os.environ.get('IRISH_TRACE_BUFFER', 1000))
+    # MessagePack packets for clients that ask for them (needs the msgpack package)
+    app.config['BINARY_PACKETS'] = os.environ.get('IRISH_BINARY_PACKETS', '0') == '1'
+    # Recent broadcasts kept for replay to clients that reconnect
+    app.config['REPLAY_BUFFER_SIZE'] = int(os.environ.get('IRISH_REPLAY_BUFFER', 500))
+    app.config.update(config or {})
+    if not app.config['SHARED_STATE_URL']:
+        # A Redis message queue doubles as the shared state store
+        queue = app.config['SOCKETIO_MESSAGE_QUEUE'] or ''
+        app.config['SHARED_STATE_URL'] = queue if queue.startswith('redis') else None
+
+    assets.init_app(app)
+    db_profiles.configure(app)
+    db.init_app(app)
+    db_profiles.init_app(app, db)
+    socketio.init_app(app, cors_allowed_origins="*", async_mode='eventlet',
+                      message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
+    cluster.init_app(app, socketio)
+    live_store.init_app(app, socketio)
+    router.init_app(socketio)
+    packets.init_app(app, socketio)
+    replay.init_app(app, clustered=cluster.enabled)
+    score_batcher.init_app(app, socketio, apply_score_events)
+    game_rules.init_app(app)
+    event_store.init_app(app, game_rules.apply)
+    tracer.init_app(app)
+    # After socketio.init_app, so every Socket.IO handler gets a latency histogram
+    metrics.init_app(app, socketio, db)
+    app.register_blueprint(bp)
+    app.cli.add_command(init_db_command)
+    startup_stats['create_app_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return app
+
+def init_db():
+    """Create the tables that don't exist yet and record matches from before scores
+    were event-sourced as events (see warm_reconcile). Commits."""
     db.create_all()
+    with reconcile_lock:
+        overrides = event_store.reconcile()
+        db.session.commit()
+    message = 'Database schema is up to date'
+    if overrides:
+        message += f'\n{overrides} matches from before event sourcing got a score_override event'
+    return message
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the database tables that don't exist yet"""
+    click.echo(init_db())
+
+# Current match, timer running and field fault flags live in match_state, shared by
+# all workers. The clock itself only exists on the worker that owns the timer.
+timer_thread = None
+match_clock = None
+tick_stats = TickStats()
+
+ENDGAME_SECONDS = 30
+
+SCORE_BREAKDOWN_FIELDS = (
+    'bucket_normal', 'bucket_bonus', 'human_bucket',
+    'park', 'slight_ramp', 'climb',
+    'fouls', 'tech_fouls',
+)
+
+def get_live_match(match_id):
+    """Return the object scoring code should mutate: the in-memory live match if
+    there is one, otherwise the database row"""
+    live = live_store.get(match_id)
+    if live:
+        return live
+    return db.session.get(Match, match_id)
+
+def save_live_match(match):
+    """Persist changes to a match returned by get_live_match. Live matches are
+    written by the background flusher, so this only commits database rows."""
+    if match is live_store.get(match.id):
+        return
+    db.session.commit()
 
-def match_timer():
-    """Background timer for match countdown"""
-    global timer_running, current_match_id, field_fault_active
+def append_match_event(match, event_type, alliance=None, points=0, details=None):
+    """Append a MatchEvent and fold it into the match, so the row stays the
+    projection of its events. Live matches queue the event for the flusher."""
+    if match is live_store.get(match.id):
+        live_store.record_event(match.id, event_type, alliance, points, details=details)
+    else:
+        db.session.add(MatchEvent(match_id=match.id, event_type=event_type, alliance=alliance,
+                                  points=points, details=details))
+    event_store.apply(match, event_type, alliance, points, details)
+
+def score_payload(match, **extra):
+    """Full score state of a match for score_updated and related broadcasts.
+
+    Carries the per-category breakdown and live RP flags so clients never need to
+    refetch the match; 'version' increases with every update within an 'epoch'.
+    """
+    payload = {
+        'match_id': match.id,
+        # Incremented on every score change so clients can discard out-of-order updates;
+        # the counter starts over (with a new epoch) when the shared store does
+        'version': cluster.next_version('score'),
+        'epoch': epoch(),
+        'red_score': match.red_score,
+        'blue_score': match.blue_score,
+    }
+    for alliance in ALLIANCES:
+        for field in SCORE_BREAKDOWN_FIELDS:
+            payload[f'{alliance}_{field}'] = getattr(match, f'{alliance}_{field}')
+        # Live RP flags: win and threshold RPs are provisional until the match ends
+        payload[f'{alliance}_teleop_rp'] = bool(getattr(match, f'{alliance}_teleop_rp'))
+        for rp, earned in game_rules.threshold_rps(match, alliance).items():
+            payload[f'{alliance}_{rp}'] = earned
+        payload[f'{alliance}_win_rp'] = getattr(match, f'{alliance}_score') > getattr(match, f'{OPPONENT[alliance]}_score')
+    payload.update(extra)
+    return payload
+
+TEAM_SLOTS = ('red_team1', 'red_team2', 'blue_team1', 'blue_team2')
+
+def match_header(match, empty='????', fallback=None):
+    """Match type/number and team numbers, shared by the show_* and match_* payloads.
+
+    Team numbers come from the team directory, so building it loads no relationships;
+    'fallback' supplies numbers for slots the match has no team in.
+    """
+    header = {'match_type': match.match_type, 'match_number': match.match_number}
+    for slot in TEAM_SLOTS:
+        header[slot] = (team_directory.number_of(getattr(match, f'{slot}_id'))
+                        or (fallback or {}).get(slot) or empty)
+    return header
+
+def postmatch_payload(match):
+    """show_postmatch: final scores, per-category breakdown and ranking points"""
+    payload = match_header(match)
+    payload.update(match_id=match.id, red_score=match.red_score, blue_score=match.blue_score)
+    for alliance in ALLIANCES:
+        for field in SCORE_BREAKDOWN_FIELDS:
+            payload[f'{alliance}_{field}'] = getattr(match, f'{alliance}_{field}')
+        for rp in ('win_rp', 'teleop_rp', 'climb_rp'):
+            payload[f'{alliance}_{rp}'] = getattr(match, f'{alliance}_{rp}')
+    return payload
+
+def timer_state(match, reason):
+    """Build the timer_state message: the countdown as of now, for clients to run locally.
+
+    'remaining' (exact seconds) is taken at 'server_time' on the monotonic clock of the
+    timer owner ('clock'); 'deadline' is when it reaches zero on that clock, or None
+    while the countdown is stopped or paused. Bonus timers end when the match clock
+    shows '<alliance>_bonus_until' seconds.
+    """
+    current_match_id = match_state.current_match_id
+    clock = match_clock if match and match.id == current_match_id and match_state.timer_running else None
+    now = time.monotonic()
+    if clock:
+        remaining = clock.remaining_exact() if clock.ticks < clock.duration else 0.0
+        bonus_until = {alliance: clock.duration - clock.bonus_end_tick[alliance]
+                       if clock.bonus_end_tick[alliance] is not None else None for alliance in ALLIANCES}
+    else:
+        remaining = float(match.match_time_remaining or 0) if match else 0.0
+        bonus_until = {alliance: max(0, remaining - getattr(match, f'{alliance}_bonus_time_remaining'))
+                       if match else None for alliance in ALLIANCES}
+    running = clock is not None and not clock.paused and remaining > 0
+    state = {
+        'match_id': match.id if match else current_match_id,
+        'reason': reason,
+        'clock': cluster.worker_id,
+        'server_time': round(now, 4),
+        'remaining': round(remaining, 4),
+        'deadline': round(now + remaining, 4) if running else None,
+        'running': running,
+        'field_fault': match_state.field_fault_active,
+        'is_endgame': bool(match and match.is_endgame),
+        'endgame_at': ENDGAME_SECONDS,
+        'sync_interval': current_app.config['TIMER_SYNC_INTERVAL'],
+    }
+    for alliance in ALLIANCES:
+        active = bool(match and getattr(match, f'{alliance}_bonus_active'))
+        state[f'{alliance}_bonus_active'] = active
+        state[f'{alliance}_bonus_until'] = bonus_until[alliance] if active else None
+    return state
+
+def emit_timer_state(match, reason):
+    """Send timer_state to the timer's rooms and keep it for clients that connect later"""
+    state = timer_state(match, reason)
+    match_state.timer_state = dict(state, sent_at=time.time())
+    router.emit('timer_state', state)
+
+def current_timer_state():
+    """The last timer_state, advanced to now, for a client that just connected"""
+    state = match_state.timer_state
+    if not state:
+        return None
+    state = dict(state)
+    age = time.time() - state.pop('sent_at')
+    if state['running']:
+        # The deadline stays put on the owner's clock; only 'now' moves on
+        state['server_time'] = round(state['server_time'] + age, 4)
+        state['remaining'] = round(max(0.0, state['remaining'] - age), 4)
+    state['reason'] = 'sync'
+    return state
+
+def resync_snapshot(rooms, rankings_version=None):
+    """The events that bring a client back to the current state: display screen, live
+    match (with bonuses, endgame and score), review banner, field fault and rankings"""
+    events = [match_state.display_screen]
+    match_id = match_state.current_match_id
+    row = db.session.get(Match, match_id) if match_id else None
+    match = live_store.get(match_id) or row
+    if row and row.status == 'in_progress':
+        events.append(['match_started', dict(match_header(row), match_id=match.id, red_score=match.red_score,
+                                             blue_score=match.blue_score, status=row.status)])
+        for alliance in ALLIANCES:
+            if getattr(match, f'{alliance}_bonus_active'):
+                events.append(['bonus_activated', {'match_id': match.id, 'alliance': alliance,
+                                                   'bonus_time': getattr(match, f'{alliance}_bonus_time_remaining')}])
+        if match.is_endgame:
+            events.append(['endgame_started', {'match_id': match.id}])
+    if match:
+        events.append(['score_updated', score_payload(match)])
+    events.append(match_state.display_review)
+    if match_state.field_fault_active:
+        events.append(['field_fault_started', {'match_id': match_id}])
+    cached = rankings_payload()
+    if rankings_version != cached['etag']:
+        events.append(['rankings_updated', {'version': cached['etag'], 'rankings': cached['data']}])
+    rooms = set(rooms)
+    return [event for event in events if event and rooms & set(EVENT_ROOMS[event[0]])]
+
+def resync(rooms, auth):
+    """Catch a connecting client up: replay the broadcasts it missed since the
+    'last_seq' it sends, or send one snapshot when they are no longer buffered.
+    Either way it ends with a resync message carrying the epoch and sequence
+    number to send next time."""
+    last_seq = auth.get('last_seq')
+    snapshot = []
+    if last_seq is not None:
+        missed = replay.missed(auth.get('epoch'), last_seq, rooms)
+        if missed is None:
+            snapshot = resync_snapshot(rooms, auth.get('rankings_version'))
+            replay.count()
+        else:
+            router.replay(request.sid, missed)
+            replay.count(len(missed))
+    emit('resync', {'epoch': replay.epoch, 'seq': replay.last_seq, 'events': snapshot})
+
+def start_match_timer(match):
+    """Start the countdown for a match on a green thread"""
+    global timer_thread, match_clock
+
+    match_state.current_match_id = match.id
+    match_state.time_remaining = match.match_time_remaining
+    match_clock = MatchClock(match.match_time_remaining)
+    match_clock.start()
+    if match_state.field_fault_active:
+        match_clock.pause()
+    tick_stats.reset()
+    match_state.timer_running = True
+    emit_timer_state(match, 'start')
+    timer_thread = socketio.start_background_task(match_timer, match.id, match_clock)
+
+def match_timer(match_id, clock):
+    """Background timer for match countdown.
+
+    Each tick is scheduled against the clock's absolute target time, so time spent
+    handling a tick never pushes the next one back. The match row is only written
+    on state transitions (endgame, bonus end, match end), not every second.
+    The timer stops if another worker takes over the timer lease. Clients count down
+    locally, so timer_state is only sent on transitions and every TIMER_SYNC_INTERVAL
+    seconds to correct drift.
+    """
+    def still_running():
+        return match_clock is clock and cluster.is_owner() and match_state.timer_running
 
     with app.app_context():
-        match = db.session.get(Match, current_match_id)
+        match = get_live_match(match_id)
         if not match:
             return
+        sync_interval = max(1, int(app.config['TIMER_SYNC_INTERVAL']))
 
-        while timer_running and match.match_time_remaining > 0:
-            time.sleep(1)
-            
-            # Skip timer countdown if field fault is active
-            if field_fault_active:
+        while still_running() and clock.ticks < clock.duration:
+            # Hold the countdown while a field fault is active
+            if clock.paused:
+                clock.wait_resumed(0.5)
                 continue
-            
-            match.match_time_remaining -= 1
 
+            target = clock.target_for_tick(clock.ticks + 1)
+            socketio.sleep(max(0.0, target - clock.now()))
+            if not still_running():
+                return
+            if clock.due_tick() <= clock.ticks:
+                # Paused while sleeping, the target has moved
+                continue
+
+            tick_stats.record(clock.now() - clock.target_for_tick(clock.ticks + 1))
+            clock.ticks += 1
+            remaining = clock.remaining()
+            # Lets another worker resume the countdown if this one goes away
+            match_state.time_remaining = remaining
+
+            transition = None
             # Check for endgame (30 seconds left)
-            if match.match_time_remaining == 30 and not match.is_endgame:
+            if remaining == ENDGAME_SECONDS and not match.is_endgame:
                 match.is_endgame = True
-                db.session.commit()
-                socketio.emit('endgame_started', {'match_id': current_match_id})
-
-            # Check for red bonus timer
-            if match.red_bonus_active and match.red_bonus_time_remaining > 0:
-                match.red_bonus_time_remaining -= 1
-                if match.red_bonus_time_remaining == 0:
-                    match.red_bonus_active = False
-                    db.session.commit()
-                    socketio.emit('bonus_ended', {
-                        'match_id': current_match_id,
-                        'alliance': 'red'
-                    })
-            
-            # Check for blue bonus timer
-            if match.blue_bonus_active and match.blue_bonus_time_remaining > 0:
-                match.blue_bonus_time_remaining -= 1
-                if match.blue_bonus_time_remaining == 0:
-                    match.blue_bonus_active = False
-                    db.session.commit()
-                    socketio.emit('bonus_ended', {
-                        'match_id': current_match_id,
-                        'alliance': 'blue'
+                match.match_time_remaining = remaining
+                save_live_match(match)
+                router.emit('endgame_started', {'match_id': match_id})
+                transition = 'endgame'
+
+            # Check for bonus timers
+            for alliance in ('red', 'blue'):
+                if getattr(match, f'{alliance}_bonus_active') and clock.bonus_remaining(alliance) == 0:
+                    setattr(match, f'{alliance}_bonus_active', False)
+                    setattr(match, f'{alliance}_bonus_time_remaining', 0)
+                    match.match_time_remaining = remaining
+                    save_live_match(match)
+                    router.emit('bonus_ended', {
+                        'match_id': match_id,
+                        'alliance': alliance
                     })
+                    transition = 'bonus_end'
 
-            db.session.commit()
-
-            # Emit timer update every second
-            socketio.emit('timer_update', {
-                'match_id': current_match_id,
-                'time_remaining': match.match_time_remaining,
-                'is_endgame': match.is_endgame,
-                'red_bonus_active': match.red_bonus_active,
-                'red_bonus_time': match.red_bonus_time_remaining if match.red_bonus_active else 0,
-                'blue_bonus_active': match.blue_bonus_active,
-                'blue_bonus_time': match.blue_bonus_time_remaining if match.blue_bonus_active else 0,
-                'field_fault': field_fault_active
-            })
+            if transition:
+                emit_timer_state(match, transition)
+            elif clock.ticks % sync_interval == 0 and remaining > 0:
+                emit_timer_state(match, 'sync')
 
         # Match ended
-        if timer_running:
+        if still_running():
+            match_state.timer_running = False
+            match.match_time_remaining = 0
+            live_store.finish(match_id)
+            match = db.session.get(Match, match_id)
+            match.match_time_remaining = 0
             match.status = 'completed'
             match.end_time = datetime.now(UTC)
             calculate_rps(match)
             db.session.commit()
-            socketio.emit('match_ended', {'match_id': current_match_id})
+            current_match.refresh()
+            emit_timer_state(match, 'end')
+            router.emit('match_ended', {'match_id': match_id})
             
             # Wait 1 second then clear endgame indicator
-            time.sleep(1)
-            socketio.emit('clear_endgame', {'match_id': current_match_id})
+            socketio.sleep(1)
+            router.emit('clear_endgame', {'match_id': match_id})
+
+@cluster.on_acquired
+def resume_orphaned_timer():
+    """Continue the countdown of a running match after the previous timer owner went away"""
+    if not match_state.timer_running:
+        return
+    match = db.session.get(Match, match_state.current_match_id)
+    if not match or match.status != 'in_progress':
+        match_state.timer_running = False
+        return
+    if match_state.time_remaining is not None:
+        match.match_time_remaining = match_state.time_remaining
+    db.session.commit()
+    live_store.load(match)
+    start_match_timer(match)
+
+def set_rp_flags(match):
+    """Set the win and threshold RP flags of a match from its scores and counters"""
+    for alliance in ALLIANCES:
+        # Win RP (a tie gives no win RPs)
+        setattr(match, f'{alliance}_win_rp',
+                getattr(match, f'{alliance}_score') > getattr(match, f'{OPPONENT[alliance]}_score'))
+        # Threshold RPs from the game rules (climb: combined bench points >= 20)
+        for rp, earned in game_rules.threshold_rps(match, alliance).items():
+            setattr(match, f'{alliance}_{rp}', earned)
+    # Tele-op RP (AND ONE bonus activated) is tracked in real time
+
+def match_awards(match):
+    """RPs each team in a match receives, {team_id: ranking points}"""
+    totals = {alliance: game_rules.total_rps(match, alliance) for alliance in ALLIANCES}
+    awarded = {}
+    for slot in ('red_team1_id', 'red_team2_id', 'blue_team1_id', 'blue_team2_id'):
+        team_id = getattr(match, slot)
+        if team_id:
+            awarded[team_id] = totals[slot.split('_')[0]]
+    return awarded
 
 def calculate_rps(match):
     """Calculate Ranking Points at match end"""
-    # Reset all RPs before recalculating
-    match.red_win_rp = False
-    match.blue_win_rp = False
-    match.red_climb_rp = False
-    match.blue_climb_rp = False
-    
-    # Win RP
-    if match.red_score > match.blue_score:
-        match.red_win_rp = True
-    elif match.blue_score > match.red_score:
-        match.blue_win_rp = True
-    # Tie gives 0 win RPs
-
-    # Tele-op RP (AND ONE bonus activated)
-    # Already tracked in real-time
-
-    # Climb RP (combined bench points >= 20)
-    red_climb_points = (match.red_park * 2) + (match.red_slight_ramp * 6) + (match.red_climb * 14)
-    blue_climb_points = (match.blue_park * 2) + (match.blue_slight_ramp * 6) + (match.blue_climb * 14)
-
-    if red_climb_points >= 20:
-        match.red_climb_rp = True
-    if blue_climb_points >= 20:
-        match.blue_climb_rp = True
-    
-    # Distribute RPs to teams
-    red_total_rps = int(match.red_win_rp) + int(match.red_teleop_rp) + int(match.red_climb_rp)
-    blue_total_rps = int(match.blue_win_rp) + int(match.blue_teleop_rp) + int(match.blue_climb_rp)
-    
-    # Add RPs to each team on the red alliance
-    if match.red_team1:
-        add_rps_to_team(match.red_team1.id, red_total_rps)
-    if match.red_team2:
-        add_rps_to_team(match.red_team2.id, red_total_rps)
-    
-    # Add RPs to each team on the blue alliance
-    if match.blue_team1:
-        add_rps_to_team(match.blue_team1.id, blue_total_rps)
-    if match.blue_team2:
-        add_rps_to_team(match.blue_team2.id, blue_total_rps)
+    set_rp_flags(match)
+
+    # Record RPs for each team in the ledger
+    record_match_rps(match.id, match_awards(match))
     
-    # Update rankings after distributing points
+    # Update rankings after distributing points (commits the whole calculation)
+    if ranking_index.loaded:
+        ranking_index.record_match(match)
     update_rankings()
 
-def add_rps_to_team(team_id, rps):
-    """Add ranking points to a team"""
-    ranking = TeamRanking.query.filter_by(team_id=team_id).first()
-    if not ranking:
-        ranking = TeamRanking(team_id=team_id, ranking_points=0)
-        db.session.add(ranking)
-    ranking.ranking_points += rps
-    db.session.commit()
+def record_match_rps(match_id, awarded):
+    """Upsert the RP ledger rows for a match and apply the differences to team totals.
+
+    Idempotent: recalculating a match with the same result changes nothing, and
+    teams no longer in the match get their RPs from it removed. Does not commit.
+    """
+    ledger = {row.team_id: row for row in MatchRankingPoints.query.filter_by(match_id=match_id)}
+    team_ids = set(awarded) | set(ledger)
+    if not team_ids:
+        return
+    rankings = {r.team_id: r for r in TeamRanking.query.filter(TeamRanking.team_id.in_(team_ids))}
+
+    changed = []
+    for team_id in team_ids:
+        row = ledger.get(team_id)
+        old_rps = row.ranking_points if row else 0
+        new_rps = awarded.get(team_id, 0)
+        if team_id not in awarded:
+            db.session.delete(row)
+        elif row:
+            row.ranking_points = new_rps
+        else:
+            db.session.add(MatchRankingPoints(match_id=match_id, team_id=team_id, ranking_points=new_rps))
+
+        ranking = rankings.get(team_id)
+        if not ranking:
+            ranking = TeamRanking(team_id=team_id, ranking_points=0)
+            db.session.add(ranking)
+        elif new_rps == old_rps:
+            continue
+        ranking.ranking_points = (ranking.ranking_points or 0) + new_rps - old_rps
+        changed.append(ranking)
+
+    # Assign ids to new ranking rows without ending the transaction
+    db.session.flush()
+    if ranking_index.loaded:
+        for ranking in changed:
+            ranking_index.set_points(ranking.team_id, ranking.id, ranking.team.number, ranking.ranking_points)
+
+def remove_match_rps(match_ids=None):
+    """Take the RPs recorded for the given matches (or all matches) back out of the
+    team totals and delete their ledger rows. Does not commit."""
+    query = db.session.query(MatchRankingPoints.team_id, db.func.sum(MatchRankingPoints.ranking_points))
+    if match_ids is not None:
+        query = query.filter(MatchRankingPoints.match_id.in_(match_ids))
+    totals = dict(query.group_by(MatchRankingPoints.team_id).all())
+    for ranking in TeamRanking.query.filter(TeamRanking.team_id.in_(totals)):
+        ranking.ranking_points = (ranking.ranking_points or 0) - (totals[ranking.team_id] or 0)
+    delete = MatchRankingPoints.query
+    if match_ids is not None:
+        delete = delete.filter(MatchRankingPoints.match_id.in_(match_ids))
+    delete.delete(synchronize_session=False)
+    ranking_index.invalidate()
+    return bool(totals)
+
+def rescore_all_matches():
+    """Recompute every match's scores and RPs with the current game rules.
+
+    Scores come from the stored counters in one UPDATE and the RP flags of played
+    matches in a second; matches with a score override are replayed instead so
+    review decisions stand. The RP ledger is then rebuilt and the differences
+    applied to team totals, keeping manual RP adjustments. Commits.
+    """
+    started = time.perf_counter()
+    live_store.flush()
+
+    db.session.execute(db.update(Match).values({
+        f'{alliance}_score': game_rules.score_expression(Match, alliance) for alliance in ALLIANCES
+    }))
+    rp_flags = {}
+    for alliance in ALLIANCES:
+        rp_flags[f'{alliance}_win_rp'] = getattr(Match, f'{alliance}_score') > getattr(Match, f'{OPPONENT[alliance]}_score')
+        for rp, (group, minimum) in game_rules.thresholds.items():
+            rp_flags[f'{alliance}_{rp}'] = game_rules.group_expression(Match, alliance, group) >= minimum
+    db.session.execute(db.update(Match).where(Match.status.in_(RANKED_STATUSES)).values(rp_flags))
+
+    overridden = [match_id for (match_id,) in db.session.query(MatchEvent.match_id).filter_by(
+        event_type=EVENT_OVERRIDE).distinct()]
+    if overridden:
+        projected = event_store.project(overridden, full=True)
+        for match in Match.query.filter(Match.id.in_(overridden)):
+            projected.get(match.id, (MatchState(),))[0].apply_to(match)
+            if match.status in RANKED_STATUSES:
+                set_rp_flags(match)
+        db.session.flush()
+
+    # Snapshots hold scores under the old rules; rows now equal a full replay
+    last_events = dict(db.session.query(MatchEvent.match_id, db.func.max(MatchEvent.id)).group_by(MatchEvent.match_id))
+    rows = db.session.query(Match).all()
+    event_store.write_snapshots({
+        match.id: (MatchState.of(match), last_events.get(match.id, 0), 0) for match in rows
+    })
+
+    # Rebuild the ledger for played matches and move team totals by the difference
+    old_totals = dict(db.session.query(MatchRankingPoints.team_id, db.func.sum(MatchRankingPoints.ranking_points))
+                      .group_by(MatchRankingPoints.team_id))
+    ledger = []
+    new_totals = {}
+    for match in rows:
+        if match.status not in RANKED_STATUSES:
+            continue
+        for team_id, rps in match_awards(match).items():
+            ledger.append({'match_id': match.id, 'team_id': team_id, 'ranking_points': rps})
+            new_totals[team_id] = new_totals.get(team_id, 0) + rps
+    MatchRankingPoints.query.delete()
+    if ledger:
+        db.session.execute(db.insert(MatchRankingPoints), ledger)
+
+    rankings = {team_id: (row_id, points) for row_id, team_id, points in
+                db.session.query(TeamRanking.id, TeamRanking.team_id, TeamRanking.ranking_points)}
+    updates = []
+    for team_id in set(old_totals) | set(new_totals):
+        change = new_totals.get(team_id, 0) - (old_totals.get(team_id) or 0)
+        if team_id not in rankings:
+            db.session.add(TeamRanking(team_id=team_id, ranking_points=change))
+        elif change:
+            row_id, points = rankings[team_id]
+            updates.append({'id': row_id, 'ranking_points': (points or 0) + change})
+    if updates:
+        db.session.execute(db.update(TeamRanking), updates)
+
+    # Running matches keep their state in memory
+    for match in rows:
+        live = live_store.get(match.id)
+        if live:
+            MatchState.of(match).apply_to(live)
+
+    ranking_index.invalidate()
+    update_rankings()
+    return {
+        'matches': len(rows),
+        'played': sum(1 for match in rows if match.status in RANKED_STATUSES),
+        'replayed_overrides': len(overridden),
+        'teams_changed': len(updates),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+    }
 
 def update_rankings():
-    """Recalculate all team rankings and update their rank positions"""
-    # Get all rankings ordered by points (descending)
-    rankings = TeamRanking.query.order_by(TeamRanking.ranking_points.desc()).all()
-    
-    # Update previous_rank before changing current_rank
-    for ranking in rankings:
-        ranking.previous_rank = ranking.current_rank
-    
-    # Assign new ranks
-    for idx, ranking in enumerate(rankings):
-        ranking.current_rank = idx + 1
-    
+    """Reposition teams whose ranking inputs changed and update their rank positions.
+
+    Only rows whose rank moved (or whose rank-change arrow must be cleared) are written.
+    """
+    ranking_index.ensure_loaded()
+    changes = ranking_index.reposition()
+    write_rank_changes(changes)
     db.session.commit()
+    # Tiebreaker averages may have changed even if no row was written
+    rankings_version.bump()
     
-    # Notify all clients that rankings have been updated
-    socketio.emit('rankings_updated')
+    # Push the new list to all clients so they don't have to fetch it
+    cached = rankings_payload()
+    router.emit('rankings_updated', {'version': cached['etag'], 'rankings': cached['data']})
+
+# Serialized ranking list of one rankings version
+rankings_cache = {'version': None, 'etag': None, 'data': None, 'body': None}
+
+def rankings_payload():
+    """Ranking list for the current rankings version, built (one query) only after it changed"""
+    version = rankings_version.value
+    etag = rankings_version.etag(version=version)
+    if rankings_cache['version'] == version:
+        return rankings_cache
+    ranking_index.ensure_loaded()
+    rows = db.session.query(
+        TeamRanking.team_id, Team.number, Team.name, TeamRanking.ranking_points,
+        TeamRanking.current_rank, TeamRanking.previous_rank
+    ).join(Team, Team.id == TeamRanking.team_id).order_by(
+        TeamRanking.current_rank.is_(None),
+        TeamRanking.current_rank,
+        TeamRanking.ranking_points.desc()
+    ).all()
+    data = []
+    for row in rows:
+        item = {
+            'team_number': row.number,
+            'team_name': row.name,
+            'ranking_points': row.ranking_points,
+            'rank': row.current_rank,
+            'rank_change': get_rank_change_indicator(row)
+        }
+        entry = ranking_index.get(row.team_id)
+        if entry:
+            item.update(entry.to_dict())
+        data.append(item)
+    rankings_cache.update(version=version, etag=etag, data=data, body=current_app.json.dumps(data))
+    return rankings_cache
 
 def get_rank_change_indicator(ranking):
     """Get the arrow indicator for rank change"""
@@ -212,75 +707,56 @@ def get_rank_change_indicator(ranking):
         return '—'  # Dash for no change
 
 
-@app.route('/')
+@bp.route('/')
 def index():
     # Default to unified display
     return render_template('unified_display.html')
 
-@app.route('/fta')
+@bp.route('/fta')
 def fta():
     return render_template('fta_new.html')
 
-@app.route('/referee')
+@bp.route('/referee')
 def referee():
     return render_template('referee.html')
 
-@app.route('/rankings')
+@bp.route('/rankings')
 def rankings():
     return render_template('rankings.html')
 
-@app.route('/admin')
+@bp.route('/admin')
 def admin_panel():
     return render_template('admin.html')
 
-@app.route('/api/current_match')
-def get_current_match():
-    # Get the most relevant match
-    match = Match.query.filter_by(status='in_progress').first()
-    if not match:
-        match = Match.query.filter_by(status='scheduled').first()
-    if not match:
-        match = Match.query.order_by(Match.id.desc()).first()
-    
+# Serialized /api/current_match body for one (pointer, matches version); never holds a match in progress
+current_match_cache = {'key': None, 'etag': None, 'body': None}
+
+def current_match_payload():
+    """The current match's teams, scores and RPs, rebuilt only after the pointer or a match changed.
+
+    A match in progress is rebuilt on every call (without an ETag): its scores change in
+    memory, on the worker that owns it, without moving the matches version.
+    """
+    match_id = current_match.get()
+    key = (match_id, matches_version.value)
+    if current_match_cache['key'] == key:
+        return current_match_cache
+    etag = matches_version.etag(f'current{match_id}', version=key[1])
+    match = db.session.get(Match, match_id) if match_id else None
     if match:
-        return jsonify({
-            'id': match.id,
-            'match_number': match.match_number,
-            'match_type': match.match_type,  # Add this line
-            'red_team1': match.red_team1.number if match.red_team1 else '',
-            'red_team2': match.red_team2.number if match.red_team2 else '',
-            'blue_team1': match.blue_team1.number if match.blue_team1 else '',
-            'blue_team2': match.blue_team2.number if match.blue_team2 else '',
-            'red_score': match.red_score,
-            'blue_score': match.blue_score,
-            'status': match.status,
-            'red_bucket_normal': match.red_bucket_normal,
-            'red_bucket_bonus': match.red_bucket_bonus,
-            'red_human_bucket': match.red_human_bucket,
-            'red_park': match.red_park,
-            'red_slight_ramp': match.red_slight_ramp,
-            'red_climb': match.red_climb,
-            'red_fouls': match.red_fouls,
-            'red_tech_fouls': match.red_tech_fouls,
-            'blue_bucket_normal': match.blue_bucket_normal,
-            'blue_bucket_bonus': match.blue_bucket_bonus,
-            'blue_human_bucket': match.blue_human_bucket,
-            'blue_park': match.blue_park,
-            'blue_slight_ramp': match.blue_slight_ramp,
-            'blue_climb': match.blue_climb,
-            'blue_fouls': match.blue_fouls,
-            'blue_tech_fouls': match.blue_tech_fouls,
-            'red_win_rp': match.red_win_rp,
-            'blue_win_rp': match.blue_win_rp,
-            'red_teleop_rp': match.red_teleop_rp,
-            'blue_teleop_rp': match.blue_teleop_rp,
-            'red_climb_rp': match.red_climb_rp,
-            'blue_climb_rp': match.blue_climb_rp
-        })
+        # Scores of a running match come from memory, so nothing needs flushing first
+        live = live_store.get(match.id) or match
+        data = dict(match_header(match, empty=''), id=match.id, status=match.status,
+                    red_score=live.red_score, blue_score=live.blue_score)
+        for alliance in ALLIANCES:
+            for field in SCORE_BREAKDOWN_FIELDS + ('win_rp', 'teleop_rp', 'climb_rp'):
+                data[f'{alliance}_{field}'] = getattr(live, f'{alliance}_{field}')
+        if match.status == 'in_progress':
+            return {'key': None, 'etag': None, 'body': current_app.json.dumps(data)}
     else:
-        return jsonify({
+        data = {
             'match_number': 1,
-            'match_type': 'Qualification',  # Add this line
+            'match_type': 'Qualification',
             'red_team1': '',
             'red_team2': '',
             'blue_team1': '',
@@ -288,19 +764,89 @@ def get_current_match():
             'red_score': 0,
             'blue_score': 0,
             'status': 'scheduled'
-        })
+        }
+    current_match_cache.update(key=key, etag=etag, body=current_app.json.dumps(data))
+    return current_match_cache
 
-@app.route('/api/matches')
+@bp.route('/api/current_match')
+def get_current_match():
+    """The match displays show on load: served from memory via the current match pointer"""
+    cached = current_match_payload()
+    if cached['etag'] and request.if_none_match.contains(cached['etag']):
+        return not_modified(cached['etag'])
+    response = current_app.response_class(cached['body'], mimetype='application/json')
+    if cached['etag']:
+        response.set_etag(cached['etag'])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@bp.route('/api/current_match/stats')
+def get_current_match_stats():
+    """Current match pointer and how often it had to be restored or resolved"""
+    return jsonify(current_match.to_dict())
+
+def not_modified(etag):
+    """Empty 304 response for a conditional request whose ETag still matches"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@bp.route('/api/matches')
 def get_matches():
-    matches = Match.query.all()
-    return jsonify([{
+    """List matches, optionally filtered by status/match_type and paged by id.
+
+    Query params: status, match_type, after_id (keyset cursor) and limit (1 to
+    MATCHES_MAX_PAGE_SIZE). Responses carry an ETag derived from the matches data
+    version, so an unchanged poll is answered with 304 without querying the database.
+    When limit is given and more matches follow, a Link header points at the next page.
+    """
+    status = request.args.get('status')
+    match_type = request.args.get('match_type')
+    after_id = request.args.get('after_id', type=int)
+    limit = None
+    if 'limit' in request.args:
+        limit = request.args.get('limit', type=int)
+        if limit is None or limit < 1:
+            return jsonify({'error': 'limit must be a positive integer'}), 400
+        limit = min(limit, current_app.config['MATCHES_MAX_PAGE_SIZE'])
+
+    # Make pending live changes visible first (a no-op when nothing is pending)
+    live_store.flush()
+    etag = matches_version.etag(request.query_string.hex())
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    red1, red2, blue1, blue2 = (aliased(Team) for _ in range(4))
+    query = db.session.query(Match, red1.number, red2.number, blue1.number, blue2.number) \
+        .outerjoin(red1, Match.red_team1_id == red1.id) \
+        .outerjoin(red2, Match.red_team2_id == red2.id) \
+        .outerjoin(blue1, Match.blue_team1_id == blue1.id) \
+        .outerjoin(blue2, Match.blue_team2_id == blue2.id)
+    if status:
+        query = query.filter(Match.status == status)
+    if match_type:
+        query = query.filter(Match.match_type == match_type)
+    if after_id:
+        query = query.filter(Match.id > after_id)
+    query = query.order_by(Match.id)
+    if limit is not None:
+        # Fetch one extra row to know whether there is a next page
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+
+    response = jsonify([{
         'id': m.id,
         'match_number': m.match_number,
         'match_type': m.match_type,  # Add this line
-        'red_team1': {'number': m.red_team1.number} if m.red_team1 else None,
-        'red_team2': {'number': m.red_team2.number} if m.red_team2 else None,
-        'blue_team1': {'number': m.blue_team1.number} if m.blue_team1 else None,
-        'blue_team2': {'number': m.blue_team2.number} if m.blue_team2 else None,
+        'red_team1': {'number': r1} if r1 is not None else None,
+        'red_team2': {'number': r2} if r2 is not None else None,
+        'blue_team1': {'number': b1} if b1 is not None else None,
+        'blue_team2': {'number': b2} if b2 is not None else None,
         'red_score': m.red_score,
         'blue_score': m.blue_score,
         'status': m.status,
@@ -316,28 +862,112 @@ def get_matches():
         'blue_climb_rp': m.blue_climb_rp,
         'red_win_rp': m.red_win_rp,
         'blue_win_rp': m.blue_win_rp
-    } for m in matches])
-
-@app.route('/api/matches/<int:match_id>', methods=['DELETE'])
+    } for m, r1, r2, b1, b2 in rows])
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    if has_more:
+        args = request.args.to_dict()
+        args.update(after_id=rows[-1][0].id, limit=limit)
+        response.headers['Link'] = f'<{url_for(".get_matches", **args)}>; rel="next"'
+    return response
+
+@bp.route('/api/matches/<int:match_id>', methods=['DELETE'])
 def delete_match(match_id):
     """Delete a match and all its associated events"""
+    live_store.discard(match_id)
     match = db.session.get(Match, match_id)
     if not match:
         return jsonify({'error': 'Match not found'}), 404
     
-    # Delete all associated match events first
+    # Delete all associated match events and snapshots first
     MatchEvent.query.filter_by(match_id=match_id).delete()
+    MatchSnapshot.query.filter_by(match_id=match_id).delete()
+
+    # Take the match's RPs back out of the team totals
+    rps_removed = remove_match_rps([match_id])
     
     # Delete the match
     db.session.delete(match)
     db.session.commit()
+    current_match.refresh()
+    if rps_removed:
+        update_rankings()
     
     return jsonify({'success': True, 'message': f'Match {match_id} deleted'})
 
-@app.route('/api/match_events/<int:match_id>')
+@bp.route('/api/socket/fanout')
+def get_socket_fanout():
+    """Broadcast deliveries per room/event versus sending every event to every client"""
+    stats = router.stats.to_dict()
+    stats['clients_by_role'] = router.clients_by_role()
+    stats['wire'] = packets.to_dict()
+    stats['replay'] = replay.to_dict()
+    return jsonify(stats)
+
+@bp.route('/api/timer/stats')
+def get_timer_stats():
+    """Lateness of match timer ticks against their scheduled time"""
+    stats = tick_stats.to_dict()
+    stats['running'] = match_state.timer_running
+    stats['match_id'] = match_state.current_match_id
+    stats['time_remaining'] = match_clock.remaining() if match_clock else match_state.time_remaining
+    stats['paused'] = match_clock.paused if match_clock else match_state.field_fault_active
+    stats['cluster'] = cluster.to_dict()
+    return jsonify(stats)
+
+@metrics.collector
+def collect_metrics():
+    """Scrape-time values for /metrics: clients, timer ticks and score batches"""
+    lines = []
+    lines += sample_lines('irish_socketio_connected_clients', 'Connected Socket.IO clients by role', 'gauge',
+                          [({'role': role}, count) for role, count in router.clients_by_role().items()])
+    lines += sample_lines('irish_timer_ticks_total', 'Match timer ticks', 'counter', [({}, tick_stats.count)])
+    lines += sample_lines('irish_timer_tick_lateness_seconds', 'Timer tick lateness over the recent ticks', 'gauge',
+                          [({'quantile': '0.5'}, tick_stats.percentile(50)),
+                           ({'quantile': '0.99'}, tick_stats.percentile(99)),
+                           ({'quantile': '1'}, tick_stats.max)])
+    lines += sample_lines('irish_timer_running', 'Whether a match timer is running', 'gauge',
+                          [({}, bool(match_state.timer_running))])
+    lines += sample_lines('irish_timer_owner', 'Whether this worker owns the match timer', 'gauge',
+                          [({}, cluster.is_owner())])
+    lines += sample_lines('irish_score_batches_total', 'Applied score event batches', 'counter',
+                          [({}, score_batcher.stats.batches)])
+    lines += sample_lines('irish_score_batch_events_total', 'Score events applied in batches', 'counter',
+                          [({}, score_batcher.stats.events)])
+    wire = packets.stats.to_dict()
+    lines += sample_lines('irish_socketio_sent_bytes_total', 'Bytes of broadcast packets sent to clients', 'counter',
+                          [({}, wire['bytes'])])
+    lines += sample_lines('irish_socketio_json_bytes_total', 'Bytes the same broadcasts take as JSON', 'counter',
+                          [({}, wire['json_bytes'])])
+    return lines
+
+@bp.route('/api/db/stats')
+def get_db_stats():
+    """Engine profile, effective SQLite pragmas / Postgres settings and pool status"""
+    return jsonify(db_profiles.describe(db.engine, current_app.config))
+
+@bp.route('/api/assets/stats')
+def get_asset_stats():
+    """Built static assets and the sizes of their precompressed / re-encoded variants"""
+    return jsonify(assets.to_dict())
+
+@bp.route('/api/teams/cache_stats')
+def get_team_cache_stats():
+    """Hit/miss counters of the team number cache"""
+    return jsonify(team_directory.to_dict())
+
+@bp.route('/api/score_batches/stats')
+def get_score_batch_stats():
+    """Batch sizes and latency of coalesced score events"""
+    stats = score_batcher.stats.to_dict()
+    stats['window_ms'] = score_batcher.window * 1000
+    return jsonify(stats)
+
+@bp.route('/api/match_events/<int:match_id>')
 def get_match_events(match_id):
     """Get all scoring events for a specific match"""
-    events = MatchEvent.query.filter_by(match_id=match_id).order_by(MatchEvent.timestamp.asc()).all()
+    live_store.flush()
+    events = event_store.visible(MatchEvent.query.filter_by(match_id=match_id).order_by(MatchEvent.id.asc()))
     return jsonify([{
         'id': e.id,
         'match_id': e.match_id,
@@ -348,22 +978,26 @@ def get_match_events(match_id):
         'details': e.details
     } for e in events])
 
-@app.route('/api/rankings')
+@bp.route('/api/rankings')
 def get_rankings():
-    """Get all teams ranked by ranking points with their rank change indicators"""
-    rankings = TeamRanking.query.order_by(TeamRanking.ranking_points.desc()).all()
-    return jsonify([{
-        'team_number': ranking.team.number,
-        'team_name': ranking.team.name,
-        'ranking_points': ranking.ranking_points,
-        'rank': ranking.current_rank,
-        'rank_change': get_rank_change_indicator(ranking)
-    } for ranking in rankings])
-
-@app.route('/api/team_rank/<int:team_number>')
+    """Get all teams in rank order (RP, then tiebreakers) with their rank change indicators.
+
+    Served from the pre-serialized list of the current rankings version, with an
+    ETag so an unchanged poll is answered with 304.
+    """
+    etag = rankings_version.etag()
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    cached = rankings_payload()
+    response = current_app.response_class(cached['body'], mimetype='application/json')
+    response.set_etag(cached['etag'])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@bp.route('/api/team_rank/<int:team_number>')
 def get_team_rank(team_number):
     """Get rank information for a specific team"""
-    team = Team.query.filter_by(number=team_number).first()
+    team = team_directory.get(team_number)
     if not team:
         return jsonify({'error': 'Team not found'}), 404
     
@@ -383,7 +1017,7 @@ def get_team_rank(team_number):
         'rank_change': get_rank_change_indicator(ranking)
     })
 
-@app.route('/api/teams', methods=['GET', 'POST'])
+@bp.route('/api/teams', methods=['GET', 'POST'])
 def manage_teams():
     """Get all teams or add a new team"""
     if request.method == 'GET':
@@ -403,8 +1037,7 @@ def manage_teams():
             return jsonify({'error': 'Team number and name are required'}), 400
         
         # Check if team number already exists
-        existing = Team.query.filter_by(number=number).first()
-        if existing:
+        if team_directory.get(number):
             return jsonify({'error': f'Team {number} already exists'}), 400
         
         team = Team(number=number, name=name)
@@ -418,7 +1051,7 @@ def manage_teams():
             'message': 'Team added successfully'
         }), 201
 
-@app.route('/api/teams/<int:team_id>', methods=['PUT', 'DELETE'])
+@bp.route('/api/teams/<int:team_id>', methods=['PUT', 'DELETE'])
 def modify_team(team_id):
     """Update or delete a team"""
     team = db.session.get(Team, team_id)
@@ -456,17 +1089,49 @@ def modify_team(team_id):
                 'error': f'Cannot delete team. Team has {matches_count} associated match(es). Delete matches first.'
             }), 400
         
-        # Delete associated ranking if exists
+        # Delete associated ranking and RP ledger rows if they exist
         TeamRanking.query.filter_by(team_id=team_id).delete()
+        MatchRankingPoints.query.filter_by(team_id=team_id).delete()
         
         db.session.delete(team)
         db.session.commit()
+        ranking_index.remove_team(team_id)
         
         return jsonify({'message': 'Team deleted successfully'})
 
 # ========== ADMIN API ENDPOINTS ==========
 
-@app.route('/api/admin/matches/<int:match_id>', methods=['PUT'])
+@bp.route('/api/admin/import', methods=['POST'])
+def admin_import_schedule():
+    """Bulk import a team list and/or match schedule (JSON, CSV body or uploaded CSV files).
+
+    ?dry_run=1 only validates. Any validation error aborts the whole import (422).
+    """
+    dry_run = request.args.get('dry_run', type=int, default=0) == 1
+    teams, matches = [], []
+    try:
+        if request.files:
+            for upload in request.files.values():
+                file_teams, file_matches = parse_csv(upload.read().decode('utf-8'))
+                teams.extend(file_teams)
+                matches.extend(file_matches)
+        elif request.is_json:
+            teams, matches = parse_json(request.get_json())
+        else:
+            teams, matches = parse_csv(request.get_data(as_text=True))
+    except (ScheduleImportError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    if not teams and not matches:
+        return jsonify({'error': 'Nothing to import'}), 400
+
+    report = import_schedule(teams, matches, dry_run=dry_run)
+    if not report.ok:
+        return jsonify(report.to_dict()), 422
+    if not dry_run:
+        current_match.refresh()
+    return jsonify(report.to_dict())
+
+@bp.route('/api/admin/matches/<int:match_id>', methods=['PUT'])
 def admin_update_match(match_id):
     """Admin endpoint to update match details"""
     match = db.session.get(Match, match_id)
@@ -482,29 +1147,35 @@ def admin_update_match(match_id):
         match.match_type = data['match_type']
     if 'status' in data:
         match.status = data['status']
-    if 'red_score' in data:
-        match.red_score = data['red_score']
-    if 'blue_score' in data:
-        match.blue_score = data['blue_score']
+
+    # Score edits are recorded as an override event; a running match's in-memory
+    # scores get it too so the flusher doesn't undo the edit
+    scores = {field: data[field] for field in ('red_score', 'blue_score') if field in data}
+    if scores:
+        live = live_store.get(match_id)
+        append_match_event(live or match, EVENT_OVERRIDE, details=event_store.override_details(scores))
+        if live:
+            live_store.flush()
     
     # Update teams by team number
     if 'red_team1' in data and data['red_team1']:
-        team = Team.query.filter_by(number=data['red_team1']).first()
-        match.red_team1_id = team.id if team else None
+        match.red_team1_id = team_directory.resolve(data['red_team1'])
     
     if 'red_team2' in data and data['red_team2']:
-        team = Team.query.filter_by(number=data['red_team2']).first()
-        match.red_team2_id = team.id if team else None
+        match.red_team2_id = team_directory.resolve(data['red_team2'])
     
     if 'blue_team1' in data and data['blue_team1']:
-        team = Team.query.filter_by(number=data['blue_team1']).first()
-        match.blue_team1_id = team.id if team else None
+        match.blue_team1_id = team_directory.resolve(data['blue_team1'])
     
     if 'blue_team2' in data and data['blue_team2']:
-        team = Team.query.filter_by(number=data['blue_team2']).first()
-        match.blue_team2_id = team.id if team else None
+        match.blue_team2_id = team_directory.resolve(data['blue_team2'])
     
     db.session.commit()
+    if 'status' in data:
+        current_match.refresh()
+    # Scores or teams of a played match may have changed the tiebreakers
+    ranking_index.invalidate()
+    rankings_version.bump()
     
     return jsonify({
         'success': True,
@@ -512,15 +1183,23 @@ def admin_update_match(match_id):
         'match_id': match.id
     })
 
-@app.route('/api/admin/matches/all', methods=['DELETE'])
+@bp.route('/api/admin/matches/all', methods=['DELETE'])
 def admin_delete_all_matches():
     """Admin endpoint to delete ALL matches and events"""
     try:
-        # Delete all match events
+        live_store.discard()
+        # Delete all match events and snapshots
         MatchEvent.query.delete()
+        MatchSnapshot.query.delete()
+        # Take all match RPs back out of the team totals
+        rps_removed = remove_match_rps()
         # Delete all matches
         Match.query.delete()
         db.session.commit()
+        current_match.refresh()
+        ranking_index.invalidate()
+        if rps_removed:
+            update_rankings()
         
         return jsonify({
             'success': True,
@@ -530,10 +1209,41 @@ def admin_delete_all_matches():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/admin/rankings/<team_number>', methods=['PUT'])
+@bp.route('/api/admin/matches/rebuild', methods=['POST'])
+def admin_rebuild_matches():
+    """Admin endpoint to recompute every match's scores by replaying its events.
+    Pass ?full=1 to ignore snapshots and replay every event from the start."""
+    live_store.flush()
+    result = event_store.rebuild_all(full=request.args.get('full', type=int) == 1)
+    changed = result.pop('changed')
+    db.session.commit()
+
+    # Running matches keep their state in memory, played matches may change RPs
+    for match_id, state in changed.items():
+        live = live_store.get(match_id)
+        if live:
+            state.apply_to(live)
+    played = Match.query.filter(Match.id.in_(list(changed)), Match.status.in_(('completed', 'finalized'))).all()
+    for match in played:
+        calculate_rps(match)
+
+    result['changed'] = sorted(changed)
+    return jsonify(result)
+
+@bp.route('/api/admin/rescore', methods=['POST'])
+def admin_rescore_event():
+    """Admin endpoint to re-score every match with the current game rules"""
+    return jsonify(rescore_all_matches())
+
+@bp.route('/api/game_rules')
+def get_game_rules():
+    """Point values, category groups and RP thresholds in effect"""
+    return jsonify(game_rules.to_dict())
+
+@bp.route('/api/admin/rankings/<team_number>', methods=['PUT'])
 def admin_update_ranking(team_number):
     """Admin endpoint to update team ranking points"""
-    team = Team.query.filter_by(number=team_number).first()
+    team = team_directory.get(team_number)
     if not team:
         return jsonify({'error': 'Team not found'}), 404
     
@@ -547,6 +1257,8 @@ def admin_update_ranking(team_number):
     
     ranking.ranking_points = data['ranking_points']
     db.session.commit()
+    if ranking_index.loaded:
+        ranking_index.set_points(team.id, ranking.id, team.number, ranking.ranking_points)
     
     # Recalculate all rankings
     update_rankings()
@@ -558,7 +1270,7 @@ def admin_update_ranking(team_number):
         'ranking_points': ranking.ranking_points
     })
 
-@app.route('/api/admin/rankings/reset', methods=['POST'])
+@bp.route('/api/admin/rankings/reset', methods=['POST'])
 def admin_reset_rankings():
     """Admin endpoint to reset all rankings to 0"""
     try:
@@ -567,8 +1279,11 @@ def admin_reset_rankings():
             ranking.ranking_points = 0
             ranking.previous_rank = 0
             ranking.current_rank = 0
+        # Clear the RP ledger so re-finalizing a match awards its RPs again
+        MatchRankingPoints.query.delete()
         
         db.session.commit()
+        ranking_index.invalidate()
         update_rankings()
         
         return jsonify({
@@ -579,16 +1294,17 @@ def admin_reset_rankings():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/admin/events')
+@bp.route('/api/admin/events')
 def admin_get_events():
     """Admin endpoint to get all match events with optional filtering"""
     match_id = request.args.get('match_id', type=int)
+    live_store.flush()
     
     query = MatchEvent.query
     if match_id:
         query = query.filter_by(match_id=match_id)
     
-    events = query.order_by(MatchEvent.timestamp.desc()).all()
+    events = event_store.visible(query.order_by(MatchEvent.id.desc()))
     
     return jsonify([{
         'id': e.id,
@@ -599,15 +1315,38 @@ def admin_get_events():
         'timestamp': e.timestamp.isoformat() if e.timestamp else None
     } for e in events])
 
-@app.route('/api/admin/events/<int:event_id>', methods=['DELETE'])
+@bp.route('/api/admin/traces', methods=['GET', 'DELETE'])
+def admin_traces():
+    """Recent score event traces, newest first (?limit, ?match_id, ?download=1 for a file); DELETE clears them"""
+    if request.method == 'DELETE':
+        tracer.clear()
+        return jsonify({'success': True})
+    traces = tracer.recent(request.args.get('limit', type=int), request.args.get('match_id', type=int))
+    stats = tracer.to_dict()
+    # 'traces' is the list here; the number kept goes under 'trace_count'
+    response = jsonify(dict(stats, trace_count=stats['traces'], traces=traces))
+    if request.args.get('download'):
+        response.headers['Content-Disposition'] = 'attachment; filename=score-traces.json'
+    return response
+
+@bp.route('/api/admin/events/<int:event_id>', methods=['DELETE'])
 def admin_delete_event(event_id):
-    """Admin endpoint to delete a match event"""
+    """Admin endpoint to delete a match event (appends a compensating event)"""
+    live_store.flush()
     event = db.session.get(MatchEvent, event_id)
-    if not event:
+    if not event or event_store.is_voided(event):
         return jsonify({'error': 'Event not found'}), 404
     
-    db.session.delete(event)
+    event_store.void_event(event)
+    match = get_live_match(event.match_id)
+    if match:
+        event_store.replay(event.match_id).apply_to(match)
+        if getattr(match, 'status', None) in ('completed', 'finalized'):
+            # Scores of a played match changed, so may its RPs (commits)
+            calculate_rps(match)
     db.session.commit()
+    if match:
+        router.emit('score_updated', score_payload(match, event_id=event_id))
     
     return jsonify({
         'success': True,
@@ -615,17 +1354,30 @@ def admin_delete_event(event_id):
     })
 
 @socketio.on('connect')
-def handle_connect():
-    print('Client connected')
+def handle_connect(auth=None):
+    # Clients identify their role (display, referee, fta, rankings, admin) and
+    # optionally a match id so they only receive the broadcasts they consume
+    auth = auth or {}
+    role = auth.get('role') or request.args.get('role')
+    match_id = auth.get('match_id') or request.args.get('match_id', type=int)
+    rooms = router.join(request.sid, role, match_id)
+    packets.connect(request.sid, auth.get('packets'))
+    print(f'Client connected ({role or "no role"}: {", ".join(rooms)})')
+    resync(rooms, auth)
+    # Timer messages only come on transitions, so late joiners get the current countdown now
+    state = current_timer_state()
+    if state and (state['running'] or state['field_fault']) and set(rooms) & set(EVENT_ROOMS['timer_state']):
+        emit('timer_state', state)
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    router.leave(request.sid)
+    packets.disconnect(request.sid)
     print('Client disconnected')
 
 @socketio.on('start_match')
+@cluster.on_owner
 def handle_start_match(data):
-    global current_match_id, timer_thread, timer_running
-
     match_id = data.get('match_id')
     match = db.session.get(Match, match_id)
     if match:
@@ -645,12 +1397,9 @@ def handle_start_match(data):
         match.blue_bonus_active = False
         match.blue_bonus_time_remaining = 15
         db.session.commit()
-
-        current_match_id = match_id
-        timer_running = True
-        timer_thread = threading.Thread(target=match_timer)
-        timer_thread.daemon = True
-        timer_thread.start()
+        current_match.set(match.id)
+        live_store.load(match)
+        start_match_timer(match)
 
         emit('match_started', {
             'match_id': match_id,
@@ -661,97 +1410,89 @@ def handle_start_match(data):
         })
 
 @socketio.on('score_event')
+@cluster.on_owner
 def handle_score_event(data):
-    match_id = data.get('match_id')
-    alliance = data.get('alliance')  # 'red' or 'blue'
-    event_type = data.get('event_type')
-    points = data.get('points', 0)
-
-    match = db.session.get(Match, match_id)
-    if not match:
-        return
-
-    # Update match scores and detailed tracking
-    if alliance == 'red':
-        if event_type == 'bucket_normal':
-            match.red_score += points
-            match.red_bucket_normal += 1
-        elif event_type == 'bucket_bonus':
-            match.red_score += points
-            match.red_bucket_bonus += 1
-        elif event_type == 'human_bucket':
-            match.red_score += points
-            match.red_human_bucket += 1
-        elif event_type == 'park':
-            match.red_score += points
-            match.red_park += 1
-        elif event_type == 'slight_ramp':
-            match.red_score += points
-            match.red_slight_ramp += 1
-        elif event_type == 'climb':
-            match.red_score += points
-            match.red_climb += 1
-        elif event_type == 'foul':
-            match.red_fouls += 1
-            match.blue_score += 2  # Penalty points go to opponent only
-        elif event_type == 'tech_foul':
-            match.red_tech_fouls += 1
-            match.blue_score += 5  # Penalty points go to opponent only
-
-    elif alliance == 'blue':
-        if event_type == 'bucket_normal':
-            match.blue_score += points
-            match.blue_bucket_normal += 1
-        elif event_type == 'bucket_bonus':
-            match.blue_score += points
-            match.blue_bucket_bonus += 1
-        elif event_type == 'human_bucket':
-            match.blue_score += points
-            match.blue_human_bucket += 1
-        elif event_type == 'park':
-            match.blue_score += points
-            match.blue_park += 1
-        elif event_type == 'slight_ramp':
-            match.blue_score += points
-            match.blue_slight_ramp += 1
-        elif event_type == 'climb':
-            match.blue_score += points
-            match.blue_climb += 1
-        elif event_type == 'foul':
-            match.blue_fouls += 1
-            match.red_score += 2  # Penalty points go to opponent only
-        elif event_type == 'tech_foul':
-            match.blue_tech_fouls += 1
-            match.red_score += 5  # Penalty points go to opponent only
-
-    db.session.commit()
+    tracer.receive(data)
+    # Events are coalesced into short batches (SCORE_BATCH_WINDOW_MS) before being applied
+    score_batcher.submit(data)
+
+def apply_score_events(batch):
+    """Apply a batch of score events in one transaction, with one bulk MatchEvent
+    insert and one score_updated broadcast per affected match"""
+    spans = tracer.batch(batch)
+    matches = {}
+    applied = {}
+    event_rows = []
+    for data in batch:
+        match_id = data.get('match_id')
+        alliance = data.get('alliance')  # 'red' or 'blue'
+        event_type = data.get('event_type')
+        if (alliance, event_type) not in game_rules.dispatch:
+            # Unknown scoring event; voids, overrides and bonuses have their own handlers
+            continue
+
+        match = matches.get(match_id) or get_live_match(match_id)
+        spans.mark('validate')
+        if not match:
+            continue
+        matches[match_id] = match
+
+        # Points come from the game rules, not from the client
+        points = game_rules.apply(match, alliance, event_type)
+        spans.mark('score')
+        applied.setdefault(match_id, []).append({
+            'event_type': event_type,
+            'alliance': alliance,
+            'points': points
+        })
+        if data.get('trace_id'):
+            applied[match_id][-1]['trace_id'] = data['trace_id']
 
-    # Record event
-    event = MatchEvent(
-        match_id=match_id,
-        event_type=event_type,
-        alliance=alliance,
-        points=points
-    )
-    db.session.add(event)
-    db.session.commit()
+        # Record event
+        if match is live_store.get(match_id):
+            live_store.record_event(match_id, event_type, alliance, points)
+        else:
+            event_rows.append({
+                'match_id': match_id,
+                'event_type': event_type,
+                'alliance': alliance,
+                'points': points
+            })
+        spans.mark('event_insert')
 
-    # Broadcast score update to all clients (display, referee, FTA)
-    socketio.emit('score_updated', {
-        'match_id': match_id,
-        'red_score': match.red_score,
-        'blue_score': match.blue_score,
-        'event_type': event_type,
-        'alliance': alliance,
-        'points': points
-    })
+    if event_rows:
+        db.session.execute(db.insert(MatchEvent), event_rows)
+    spans.mark('event_insert')
+    if any(match is not live_store.get(match_id) for match_id, match in matches.items()):
+        db.session.commit()
+    spans.mark('commit')
+
+    # Broadcast one score update per match to all clients (display, referee, FTA)
+    for match_id, events in applied.items():
+        match = matches[match_id]
+        last = events[-1]
+        router.emit('score_updated', score_payload(
+            match,
+            event_type=last['event_type'],
+            alliance=last['alliance'],
+            points=last['points'],
+            events=events
+        ))
+    spans.mark('emit')
+    spans.finish()
+
+@socketio.on('trace_ack')
+def handle_trace_ack(data):
+    # A display painted a score update that carried traced events
+    tracer.ack(data, router.roles.get(request.sid))
 
 @socketio.on('activate_bonus')
+@cluster.on_owner
 def handle_activate_bonus(data):
     match_id = data.get('match_id')
     alliance = data.get('alliance')
 
-    match = db.session.get(Match, match_id)
+    match = get_live_match(match_id)
     if not match:
         return
     
@@ -760,10 +1501,13 @@ def handle_activate_bonus(data):
         if not match.red_bonus_active:
             match.red_bonus_active = True
             match.red_bonus_time_remaining = 15
-            match.red_teleop_rp = True
-            db.session.commit()
+            append_match_event(match, EVENT_BONUS, 'red')  # Sets red_teleop_rp
+            save_live_match(match)
+            if match_clock and match_id == match_state.current_match_id:
+                match_clock.start_bonus('red', 15)
+            emit_timer_state(match, 'bonus_start')
 
-            socketio.emit('bonus_activated', {
+            router.emit('bonus_activated', {
                 'match_id': match_id,
                 'alliance': 'red',
                 'bonus_time': 15
@@ -772,72 +1516,75 @@ def handle_activate_bonus(data):
         if not match.blue_bonus_active:
             match.blue_bonus_active = True
             match.blue_bonus_time_remaining = 15
-            match.blue_teleop_rp = True
-            db.session.commit()
+            append_match_event(match, EVENT_BONUS, 'blue')  # Sets blue_teleop_rp
+            save_live_match(match)
+            if match_clock and match_id == match_state.current_match_id:
+                match_clock.start_bonus('blue', 15)
+            emit_timer_state(match, 'bonus_start')
 
-            socketio.emit('bonus_activated', {
+            router.emit('bonus_activated', {
                 'match_id': match_id,
                 'alliance': 'blue',
                 'bonus_time': 15
             })
 
 @socketio.on('end_match')
+@cluster.on_owner
 def handle_end_match(data):
-    global timer_running
     match_id = data.get('match_id')
+    live_store.finish(match_id)
     match = db.session.get(Match, match_id)
     if match:
-        timer_running = False
+        match_state.timer_running = False
+        if match_clock and match_id == match_state.current_match_id:
+            # Clients stop their countdown where the clock stopped
+            match.match_time_remaining = match_clock.remaining()
         match.status = 'completed'
         match.end_time = datetime.now(UTC)
         calculate_rps(match)
         db.session.commit()
+        current_match.refresh()
+        emit_timer_state(match, 'end')
         emit('match_ended', {'match_id': match_id})
 
 @socketio.on('fta_field_fault')
+@cluster.on_owner
 def handle_field_fault(data):
     """Pause the match timer for a field fault"""
-    global field_fault_active
-    field_fault_active = True
-    socketio.emit('field_fault_started', {'match_id': current_match_id})
-    # Immediately notify displays of timer state so banner shows without waiting for next tick
-    match = db.session.get(Match, current_match_id)
-    socketio.emit('timer_update', {
-        'match_id': current_match_id,
-        'time_remaining': match.match_time_remaining if match else 0,
-        'is_endgame': match.is_endgame if match else False,
-        'red_bonus_active': match.red_bonus_active if match else False,
-        'red_bonus_time': match.red_bonus_time_remaining if match and match.red_bonus_active else 0,
-        'blue_bonus_active': match.blue_bonus_active if match else False,
-        'blue_bonus_time': match.blue_bonus_time_remaining if match and match.blue_bonus_active else 0,
-        'field_fault': field_fault_active
-    })
+    match_state.field_fault_active = True
+    if match_clock:
+        match_clock.pause()
+    current_match_id = match_state.current_match_id
+    router.emit('field_fault_started', {'match_id': current_match_id})
+    # Clients freeze their countdown at the paused time
+    match = get_live_match(current_match_id)
+    if match and match_clock and match_state.timer_running:
+        match.match_time_remaining = match_clock.remaining()
+        save_live_match(match)
+    emit_timer_state(match, 'pause')
 
 @socketio.on('fta_resume_match')
+@cluster.on_owner
 def handle_resume_match(data):
     """Resume the match timer after a field fault"""
-    global field_fault_active
-    field_fault_active = False
-    socketio.emit('field_fault_ended', {'match_id': current_match_id})
-    # Immediately notify displays of timer state so banner hides without waiting for next tick
-    match = db.session.get(Match, current_match_id)
-    socketio.emit('timer_update', {
-        'match_id': current_match_id,
-        'time_remaining': match.match_time_remaining if match else 0,
-        'is_endgame': match.is_endgame if match else False,
-        'red_bonus_active': match.red_bonus_active if match else False,
-        'red_bonus_time': match.red_bonus_time_remaining if match and match.red_bonus_active else 0,
-        'blue_bonus_active': match.blue_bonus_active if match else False,
-        'blue_bonus_time': match.blue_bonus_time_remaining if match and match.blue_bonus_active else 0,
-        'field_fault': field_fault_active
-    })
+    match_state.field_fault_active = False
+    if match_clock:
+        match_clock.resume()
+    current_match_id = match_state.current_match_id
+    router.emit('field_fault_ended', {'match_id': current_match_id})
+    # Clients continue their countdown from the new deadline
+    match = get_live_match(current_match_id)
+    if match and match_clock and match_state.timer_running:
+        match.match_time_remaining = match_clock.remaining()
+        save_live_match(match)
+    emit_timer_state(match, 'resume')
 
 def get_next_match_number():
     with app.app_context():
         last = db.session.query(db.func.max(Match.match_number)).scalar()
         return (last or 0) + 1
     
-@app.route('/api/next_match_number')
+@bp.route('/api/next_match_number')
 def api_next_match_number():
     return jsonify({'next_match_number': get_next_match_number()})
 
@@ -870,42 +1617,14 @@ def handle_fta_save_match(data):
         else:
             match.match_type = match_type  # Update match_type
 
-    # Auto-create teams if they don't exist and assign them
-    if red_team1_num and red_team1_num.strip():
-        red_team1 = Team.query.filter_by(number=int(red_team1_num)).first()
-        if not red_team1:
-            red_team1 = Team(number=int(red_team1_num), name=f'Team {red_team1_num}')
-            db.session.add(red_team1)
-        match.red_team1 = red_team1
-    else:
-        match.red_team1 = None
+    # Assign teams, auto-creating the ones that don't exist yet
+    match.red_team1_id = team_directory.resolve_or_create(red_team1_num)
         
-    if red_team2_num and red_team2_num.strip():
-        red_team2 = Team.query.filter_by(number=int(red_team2_num)).first()
-        if not red_team2:
-            red_team2 = Team(number=int(red_team2_num), name=f'Team {red_team2_num}')
-            db.session.add(red_team2)
-        match.red_team2 = red_team2
-    else:
-        match.red_team2 = None
+    match.red_team2_id = team_directory.resolve_or_create(red_team2_num)
         
-    if blue_team1_num and blue_team1_num.strip():
-        blue_team1 = Team.query.filter_by(number=int(blue_team1_num)).first()
-        if not blue_team1:
-            blue_team1 = Team(number=int(blue_team1_num), name=f'Team {blue_team1_num}')
-            db.session.add(blue_team1)
-        match.blue_team1 = blue_team1
-    else:
-        match.blue_team1 = None
+    match.blue_team1_id = team_directory.resolve_or_create(blue_team1_num)
         
-    if blue_team2_num and blue_team2_num.strip():
-        blue_team2 = Team.query.filter_by(number=int(blue_team2_num)).first()
-        if not blue_team2:
-            blue_team2 = Team(number=int(blue_team2_num), name=f'Team {blue_team2_num}')
-            db.session.add(blue_team2)
-        match.blue_team2 = blue_team2
-    else:
-        match.blue_team2 = None
+    match.blue_team2_id = team_directory.resolve_or_create(blue_team2_num)
 
     # Set match number if provided
     if match_number:
@@ -916,18 +1635,19 @@ def handle_fta_save_match(data):
         db.session.add(match)
 
     db.session.commit()
+    current_match.moved_to(match.id)
 
     emit('match_data_saved', {'match_id': match.id})
 
 @socketio.on('fta_ready_display')
 def handle_fta_ready_display():
     # Update display to show "Ready for Match" screen
-    socketio.emit('show_ready_for_match')
+    router.emit('show_ready_for_match')
 
 @socketio.on('fta_update_display')
 def handle_fta_update_display(data):
     # Send data directly to display to show in prematch
-    socketio.emit('show_prematch', {
+    router.emit('show_prematch', {
         'match_type': data.get('match_type', '?'),
         'match_number': data.get('match_number', '?'),
         'red_team1': data.get('red_team1', '????'),
@@ -937,9 +1657,8 @@ def handle_fta_update_display(data):
     })
 
 @socketio.on('fta_start_match')
+@cluster.on_owner
 def handle_fta_start_match(data):
-    global current_match_id, timer_thread, timer_running
-
     # Save or get the match first
     match_id = data.get('match_id')
     match_type = data.get('match_type', 'Qualification')  # Get match_type with default
@@ -984,16 +1703,7 @@ def handle_fta_start_match(data):
 
         # Assign teams - auto-create them if they don't exist
         for team_key in ['red_team1', 'red_team2', 'blue_team1', 'blue_team2']:
-            team_num = data.get(team_key)
-            if team_num and str(team_num).strip():
-                team = Team.query.filter_by(number=int(team_num)).first()
-                if not team:
-                    # Create the team if it doesn't exist
-                    team = Team(number=int(team_num), name=f'Team {team_num}')
-                    db.session.add(team)
-                setattr(match, team_key, team)
-            else:
-                setattr(match, team_key, None)
+            setattr(match, f'{team_key}_id', team_directory.resolve_or_create(data.get(team_key)))
 
         db.session.add(match)
         db.session.commit()
@@ -1013,57 +1723,29 @@ def handle_fta_start_match(data):
             db.session.commit()
 
     if match:
-        current_match_id = match_id
-        timer_running = True
-        timer_thread = threading.Thread(target=match_timer)
-        timer_thread.daemon = True
-        timer_thread.start()
+        current_match.set(match.id)
+        live_store.load(match)
+        start_match_timer(match)
 
         # Transition display to live view with team numbers (use stored numbers as fallback)
-        socketio.emit('show_live', {
-            'match_type': match.match_type,  # Add this line
-            'match_number': match.match_number,
-            'red_team1': match.red_team1.number if match.red_team1 else team_numbers.get('red_team1', '????'),
-            'red_team2': match.red_team2.number if match.red_team2 else team_numbers.get('red_team2', '????'),
-            'blue_team1': match.blue_team1.number if match.blue_team1 else team_numbers.get('blue_team1', '????'),
-            'blue_team2': match.blue_team2.number if match.blue_team2 else team_numbers.get('blue_team2', '????'),
-            'red_score': match.red_score,
-            'blue_score': match.blue_score
-        })
-        
-        # If quick start, immediately send timer update to show endgame indicator
-        if quick_start:
-            socketio.emit('timer_update', {
-                'match_id': match_id,
-                'time_remaining': match.match_time_remaining,
-                'is_endgame': match.is_endgame,
-                'red_bonus_active': match.red_bonus_active,
-                'red_bonus_time': match.red_bonus_time_remaining if match.red_bonus_active else 0,
-                'blue_bonus_active': match.blue_bonus_active,
-                'blue_bonus_time': match.blue_bonus_time_remaining if match.blue_bonus_active else 0,
-                'field_fault': False
-            })
+        header = match_header(match, fallback=team_numbers)
+        router.emit('show_live', dict(header, red_score=match.red_score, blue_score=match.blue_score))
         
+        # The 'start' timer_state (sent by start_match_timer) already carries is_endgame,
+        # so a quick start shows the endgame indicator right away
+
         # Update referee panel with new match info
-        socketio.emit('match_started', {
-            'match_id': match_id,
-            'match_type': match.match_type,  # Add this line
-            'match_number': match.match_number,
-            'red_team1': match.red_team1.number if match.red_team1 else team_numbers.get('red_team1', '????'),
-            'red_team2': match.red_team2.number if match.red_team2 else team_numbers.get('red_team2', '????'),
-            'blue_team1': match.blue_team1.number if match.blue_team1 else team_numbers.get('blue_team1', '????'),
-            'blue_team2': match.blue_team2.number if match.blue_team2 else team_numbers.get('blue_team2', '????'),
-            'red_score': match.red_score,
-            'blue_score': match.blue_score,
-            'status': 'in_progress'
-        })
+        router.emit('match_started', dict(header, match_id=match_id, red_score=match.red_score,
+                                          blue_score=match.blue_score, status='in_progress'))
 
         emit('match_started', {'match_id': match_id})
 
 @socketio.on('fta_finalize_match')
+@cluster.on_owner
 def handle_fta_finalize_match(data):
     """Finalize match after review - recalculate RPs with reviewed scores"""
     match_id = data.get('match_id')
+    live_store.finish(match_id)
     match = db.session.get(Match, match_id)
     if match:
         # Mark match as finalized
@@ -1073,13 +1755,14 @@ def handle_fta_finalize_match(data):
         # (scores have already been updated by score_event/delete_event handlers)
         calculate_rps(match)
         db.session.commit()
+        current_match.refresh()
         
         print(f"Match {match_id} finalized with reviewed scores.")
         print(f"  Red: {match.red_score} pts, RPs: {match.red_teleop_rp + match.red_climb_rp + match.red_win_rp}")
         print(f"  Blue: {match.blue_score} pts, RPs: {match.blue_teleop_rp + match.blue_climb_rp + match.blue_win_rp}")
         
         # Notify all clients that match is finalized
-        socketio.emit('match_finalized', {
+        router.emit('match_finalized', {
             'match_id': match_id,
             'red_score': match.red_score,
             'blue_score': match.blue_score
@@ -1089,152 +1772,65 @@ def handle_fta_finalize_match(data):
 def handle_fta_show_review(data=None):
     # Show review banner on live display and send match_id to referee
     match_id = data.get('match_id') if data else None
-    socketio.emit('show_review', {'match_id': match_id})
+    router.emit('show_review', {'match_id': match_id})
 
 @socketio.on('fta_hide_review')
 def handle_fta_hide_review(data=None):
     # Hide review banner on live display
-    socketio.emit('hide_review')
-
-@socketio.on('fta_show_postmatch')
-def handle_fta_show_postmatch(data):
-    # Incase of incidental reload, Show postmatch screen of loaded match when provided a match id
-    match_id = data.get('match_id')
-    match = db.session.get(Match, match_id)
-    if match:
-        socketio.emit('show_postmatch', {
-            'match_type': match.match_type,
-            'match_number': match.match_number,
-            'red_team1': match.red_team1.number if match.red_team1 else '????',
-            'red_team2': match.red_team2.number if match.red_team2 else '????',
-            'blue_team1': match.blue_team1.number if match.blue_team1 else '????',
-            'blue_team2': match.blue_team2.number if match.blue_team2 else '????',
-            'red_score': match.red_score,
-            'blue_score': match.blue_score,
-            'red_teleop_rp': match.red_teleop_rp,
-            'red_climb_rp': match.red_climb_rp,
-            'red_win_rp': match.red_win_rp,
-            'blue_teleop_rp': match.blue_teleop_rp,
-            'blue_climb_rp': match.blue_climb_rp,
-            'blue_win_rp': match.blue_win_rp
-        })
-    else:
-        print(f"Match ID {match_id} not found for postmatch display.")
+    router.emit('hide_review')
 
 @socketio.on('review_complete')
 def handle_review_complete(data):
     """Broadcast that review is complete and showcase can be enabled"""
     match_id = data.get('match_id')
-    socketio.emit('review_complete', {'match_id': match_id})
+    router.emit('review_complete', {'match_id': match_id})
 
 @socketio.on('delete_event')
+@cluster.on_owner
 def handle_delete_event(data):
     """Delete a scoring event and recalculate match scores"""
     event_id = data.get('event_id')
     match_id = data.get('match_id')
+    live_store.flush()
     
     event = db.session.get(MatchEvent, event_id)
-    if event and event.match_id == match_id:
-        match = db.session.get(Match, match_id)
+    if event and event.match_id == match_id and not event_store.is_voided(event):
+        match = get_live_match(match_id)
         if match:
-            # Reverse the scoring for this event
-            event_type = event.event_type
-            alliance = event.alliance
-            points = event.points
-            
-            # Decrease the specific event counter
-            if alliance == 'red':
-                if event_type == 'bucket_normal':
-                    match.red_bucket_normal = max(0, match.red_bucket_normal - 1)
-                    match.red_score = max(0, match.red_score - points)
-                elif event_type == 'bucket_bonus':
-                    match.red_bucket_bonus = max(0, match.red_bucket_bonus - 1)
-                    match.red_score = max(0, match.red_score - points)
-                elif event_type == 'human_bucket':
-                    match.red_human_bucket = max(0, match.red_human_bucket - 1)
-                    match.red_score = max(0, match.red_score - points)
-                elif event_type == 'park':
-                    match.red_park = max(0, match.red_park - 1)
-                    match.red_score = max(0, match.red_score - points)
-                elif event_type == 'slight_ramp':
-                    match.red_slight_ramp = max(0, match.red_slight_ramp - 1)
-                    match.red_score = max(0, match.red_score - points)
-                elif event_type == 'climb':
-                    match.red_climb = max(0, match.red_climb - 1)
-                    match.red_score = max(0, match.red_score - points)
-                elif event_type == 'foul':
-                    match.red_fouls = max(0, match.red_fouls - 1)
-                    match.blue_score = max(0, match.blue_score - points)
-                elif event_type == 'tech_foul':
-                    match.red_tech_fouls = max(0, match.red_tech_fouls - 1)
-                    match.blue_score = max(0, match.blue_score - points)
-            elif alliance == 'blue':
-                if event_type == 'bucket_normal':
-                    match.blue_bucket_normal = max(0, match.blue_bucket_normal - 1)
-                    match.blue_score = max(0, match.blue_score - points)
-                elif event_type == 'bucket_bonus':
-                    match.blue_bucket_bonus = max(0, match.blue_bucket_bonus - 1)
-                    match.blue_score = max(0, match.blue_score - points)
-                elif event_type == 'human_bucket':
-                    match.blue_human_bucket = max(0, match.blue_human_bucket - 1)
-                    match.blue_score = max(0, match.blue_score - points)
-                elif event_type == 'park':
-                    match.blue_park = max(0, match.blue_park - 1)
-                    match.blue_score = max(0, match.blue_score - points)
-                elif event_type == 'slight_ramp':
-                    match.blue_slight_ramp = max(0, match.blue_slight_ramp - 1)
-                    match.blue_score = max(0, match.blue_score - points)
-                elif event_type == 'climb':
-                    match.blue_climb = max(0, match.blue_climb - 1)
-                    match.blue_score = max(0, match.blue_score - points)
-                elif event_type == 'foul':
-                    match.blue_fouls = max(0, match.blue_fouls - 1)
-                    match.red_score = max(0, match.red_score - points)
-                elif event_type == 'tech_foul':
-                    match.blue_tech_fouls = max(0, match.blue_tech_fouls - 1)
-                    match.red_score = max(0, match.red_score - points)
-            
-            # Delete the event
-            db.session.delete(event)
+            # Append a compensating event and take the event back out of the scores
+            event_store.void_event(event)
+            if not event_store.undo(match, event):
+                event_store.replay(match_id).apply_to(match)
             db.session.commit()
-            
+
             # Emit updated scores
-            socketio.emit('event_deleted', {
-                'match_id': match_id,
-                'red_score': match.red_score,
-                'blue_score': match.blue_score
-            })
-            socketio.emit('score_updated', {
-                'red_score': match.red_score,
-                'blue_score': match.blue_score
-            })
+            payload = Payload(score_payload(match, event_id=event_id))
+            router.emit('event_deleted', payload)
+            router.emit('score_updated', payload)
 
 @socketio.on('update_match_scores')
+@cluster.on_owner
 def handle_update_match_scores(data):
     """Manually update match scores during review"""
     match_id = data.get('match_id')
     red_score = data.get('red_score')
     blue_score = data.get('blue_score')
     
-    match = db.session.get(Match, match_id)
+    match = get_live_match(match_id)
     if match:
-        match.red_score = red_score
-        match.blue_score = blue_score
-        db.session.commit()
+        details = event_store.override_details({'red_score': red_score, 'blue_score': blue_score})
+        append_match_event(match, EVENT_OVERRIDE, details=details)
+        save_live_match(match)
         
-        socketio.emit('scores_updated', {
-            'match_id': match_id,
-            'red_score': red_score,
-            'blue_score': blue_score
-        })
-        socketio.emit('score_updated', {
-            'red_score': red_score,
-            'blue_score': blue_score
-        })
+        payload = Payload(score_payload(match))
+        router.emit('scores_updated', payload)
+        router.emit('score_updated', payload)
 
 @socketio.on('fta_show_postmatch')
+@cluster.on_owner
 def handle_fta_show_postmatch(data):
     match_id = data.get('match_id')
+    live_store.flush()
     if match_id:
         match = db.session.get(Match, match_id)
     else:
@@ -1244,45 +1840,17 @@ def handle_fta_show_postmatch(data):
     if match:
         # Ensure match is marked as completed and saved to DB
         if match.status != 'completed':
+            live_store.finish(match.id)
             match.status = 'completed'
             if not match.end_time:
                 match.end_time = datetime.now(UTC)
             calculate_rps(match)
             db.session.commit()
-        
+            current_match.refresh()
 
-        socketio.emit('show_postmatch', {
-            'match_type': match.match_type,  # Add this line
-            'match_number': match.match_number,
-            'red_team1': match.red_team1.number if match.red_team1 else '????',
-            'red_team2': match.red_team2.number if match.red_team2 else '????',
-            'blue_team1': match.blue_team1.number if match.blue_team1 else '????',
-            'blue_team2': match.blue_team2.number if match.blue_team2 else '????',
-            'red_score': match.red_score,
-            'blue_score': match.blue_score,
-            'red_bucket_normal': match.red_bucket_normal,
-            'red_bucket_bonus': match.red_bucket_bonus,
-            'red_human_bucket': match.red_human_bucket,
-            'red_park': match.red_park,
-            'red_slight_ramp': match.red_slight_ramp,
-            'red_climb': match.red_climb,
-            'red_fouls': match.red_fouls,
-            'red_tech_fouls': match.red_tech_fouls,
-            'blue_bucket_normal': match.blue_bucket_normal,
-            'blue_bucket_bonus': match.blue_bucket_bonus,
-            'blue_human_bucket': match.blue_human_bucket,
-            'blue_park': match.blue_park,
-            'blue_slight_ramp': match.blue_slight_ramp,
-            'blue_climb': match.blue_climb,
-            'blue_fouls': match.blue_fouls,
-            'blue_tech_fouls': match.blue_tech_fouls,
-            'red_win_rp': match.red_win_rp,
-            'blue_win_rp': match.blue_win_rp,
-            'red_teleop_rp': match.red_teleop_rp,
-            'blue_teleop_rp': match.blue_teleop_rp,
-            'red_climb_rp': match.red_climb_rp,
-            'blue_climb_rp': match.blue_climb_rp
-        })
+        router.emit('show_postmatch', postmatch_payload(match))
+    else:
+        print(f"Match ID {match_id} not found for postmatch display.")
 
 @socketio.on('load_match_data')
 def handle_load_match_data(data):
@@ -1304,16 +1872,7 @@ def handle_load_match_data(data):
 
     match = db.session.get(Match, match_id)
     if match:
-        emit('match_data_loaded', {
-            'match_id': match.id,
-            'match_type': match.match_type,  # Add this line
-            'match_number': match.match_number,
-            'red_team1': match.red_team1.number if match.red_team1 else '',
-            'red_team2': match.red_team2.number if match.red_team2 else '',
-            'blue_team1': match.blue_team1.number if match.blue_team1 else '',
-            'blue_team2': match.blue_team2.number if match.blue_team2 else '',
-            'status': match.status
-        })
+        emit('match_data_loaded', dict(match_header(match, empty=''), match_id=match.id, status=match.status))
     else:
         # Match not found, emit empty data
         emit('match_data_loaded', {
@@ -1328,18 +1887,19 @@ def handle_load_match_data(data):
         })
 
 @socketio.on('fta_stop_match')
+@cluster.on_owner
 def handle_fta_stop_match(data):
     """Stop the current match and reset timer"""
-    global timer_running, current_match_id
-    match_id = data.get('match_id') or current_match_id
+    match_id = data.get('match_id') or match_state.current_match_id
     
     if not match_id:
         print("Warning: No match_id provided and no current match is running")
         return
     
+    live_store.finish(match_id)
     match = db.session.get(Match, match_id)
     if match:
-        timer_running = False
+        match_state.timer_running = False
         match.status = 'stopped'
         match.match_time_remaining = 0
         match.is_endgame = False
@@ -1348,15 +1908,81 @@ def handle_fta_stop_match(data):
         match.blue_bonus_active = False
         match.blue_bonus_time_remaining = 0
         db.session.commit()
-        socketio.emit('match_stopped', {'match_id': match_id})
+        current_match.refresh()
+        emit_timer_state(match, 'stop')
+        router.emit('match_stopped', {'match_id': match_id})
         print(f"Match {match_id} stopped successfully")
 
+def warm_current_match():
+    """Track a match that was running when the server stopped so scoring can go on"""
+    if match_state.current_match_id is not None or not cluster.is_owner():
+        return
+    match = Match.query.filter_by(status='in_progress').order_by(Match.id.desc()).first()
+    if match:
+        match_state.current_match_id = match.id
+        live_store.load(match)
+
+# Reconcile runs at most once at a time here; the owner check keeps other workers out
+reconcile_lock = threading.Lock()
+
+@cluster.on_acquired
+def warm_reconcile():
+    """Record matches from before scores were event-sourced as events and snapshot them.
+
+    Only the timer owner does this (again when a worker takes over the lease), so
+    workers never race on the snapshot rows; init-db does it as well.
+    """
+    if not cluster.is_owner():
+        return
+    with reconcile_lock:
+        event_store.reconcile()
+        db.session.commit()
+
+WARM_UP_TASKS = (
+    ('reconcile', warm_reconcile),
+    ('teams', team_directory.load),
+    ('rankings', rankings_payload),
+    ('current_match', warm_current_match),
+    ('current_match_pointer', current_match.get),
+)
+
+def warm_up(app):
+    """Fill the caches concurrently, each task in its own app context (and session).
+
+    Runs in the background so the server accepts connections right away; every
+    cache also fills itself on first use, so early requests are merely slower.
+    """
+    started = time.perf_counter()
+    remaining = [len(WARM_UP_TASKS)]
+
+    def run(name, task):
+        task_started = time.perf_counter()
+        with app.app_context():
+            try:
+                task()
+            except Exception:
+                logging.getLogger(__name__).exception('Warm-up task %s failed', name)
+                db.session.rollback()
+        startup_stats['warm_up_tasks'][name] = round((time.perf_counter() - task_started) * 1000, 3)
+        remaining[0] -= 1
+        if not remaining[0]:
+            startup_stats['warm_up_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+    for name, task in WARM_UP_TASKS:
+        socketio.start_background_task(run, name, task)
+
+@bp.route('/api/startup/stats')
+def get_startup_stats():
+    """Cold-start timings of this worker"""
+    return jsonify(startup_stats)
+
+startup_stats['import_ms'] = round((time.perf_counter() - _import_started) * 1000, 3)
+
 if __name__ == '__main__':
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
-else:
-    socketio.run(
-        app,
-        host='0.0.0.0',
-        port=int(os.environ.get('PORT', 5000)),
-        allow_unsafe_werkzeug=True
-    )
\ No newline at end of file
+    create_app()
+    if sys.argv[1:] == ['init-db']:
+        with app.app_context():
+            print(init_db())
+    else:
+        warm_up(app)
+        socketio.run(app, debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,311 @@
+"""Fingerprinted, precompressed static assets.
+
+The build step copies every file under static/ to static/dist/ with a content
+hash in its name (css/fta.css -> css/fta.3f2a1b9c0d.css) and writes
+static/dist/manifest.json mapping logical names to hashed ones. Text assets
+also get .gz and, with the optional ``brotli`` package, .br variants. Sounds
+get Opus and AAC encodings when ``ffmpeg`` is on the PATH.
+
+At runtime templates call ``asset_url('css/fta.css')`` and
+``audio_sources('sounds/start.wav')``. Hashed files are served from /assets/
+with the best precompressed variant the client accepts and a far-future
+immutable Cache-Control, since a changed file gets a new name. Files missing
+from the manifest fall back to the plain /static/ URL.
+
+The build runs at startup when static/ changed since the last one, or
+explicitly with ``python assets.py build``.
+
+Third-party scripts the templates need (the Socket.IO client) are committed
+under static/js/lib/ and pinned by SHA-256 in VENDOR, so a venue can run
+offline. Startup fails if one is missing or does not match its hash;
+``python assets.py build --fetch-vendor`` downloads a missing copy again.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import subprocess
+import sys
+import urllib.request
+
+from flask import abort, request, send_from_directory, url_for
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, 'static')
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+
+TEXT_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html')
+AUDIO_EXTENSIONS = ('.wav',)
+# extension, MIME type for <source type>, ffmpeg arguments
+AUDIO_ENCODINGS = (
+    ('.ogg', 'audio/ogg; codecs=opus', ['-c:a', 'libopus', '-b:a', '64k']),
+    ('.m4a', 'audio/mp4', ['-c:a', 'aac', '-b:a', '96k']),
+)
+# Precompressed variants, best first: Accept-Encoding token -> file suffix
+CONTENT_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Pinned third-party scripts: static path -> (where --fetch-vendor gets it, SHA-256)
+VENDOR = {
+    'js/lib/socket.io.min.js': (
+        'https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.2/socket.io.min.js',
+        '83df4abc7eec941f1d29ae254e80bac0bb82d398fbe2e8ee4ea2a7efc8e704f1',
+    ),
+}
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _source_files(static_dir):
+    for directory, dirnames, filenames in os.walk(static_dir):
+        if os.path.samefile(directory, static_dir) and DIST in dirnames:
+            dirnames.remove(DIST)
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            yield os.path.relpath(path, static_dir).replace(os.sep, '/'), path
+
+
+def source_fingerprint(static_dir=STATIC_DIR):
+    """Cheap fingerprint of static/ (names, sizes and mtimes, no reads)"""
+    digest = hashlib.sha256()
+    for name, path in _source_files(static_dir):
+        stat = os.stat(path)
+        digest.update(f'{name}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode())
+    digest.update(f'brotli={bool(brotli)} ffmpeg={bool(shutil.which("ffmpeg"))}'.encode())
+    return digest.hexdigest()
+
+
+def _hashed_name(name, content_hash, extension=None):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{content_hash}{extension or ext}'
+
+
+def _write(path, data):
+    if os.path.exists(path):
+        # Content-addressed: an existing file already has these bytes
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp-{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _encode_audio(source, target, args):
+    """Encode a sound with ffmpeg; returns False if ffmpeg is missing or fails"""
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    stem, ext = os.path.splitext(target)
+    tmp = f'{stem}.tmp-{os.getpid()}{ext}'
+    result = subprocess.run([ffmpeg, '-loglevel', 'error', '-y', '-i', source, '-vn', *args, tmp], capture_output=True)
+    if result.returncode != 0:
+        logger.warning('ffmpeg could not encode %s to %s: %s', source, ext, result.stderr.decode(errors='replace'))
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    os.replace(tmp, target)
+    return True
+
+
+def build(static_dir=STATIC_DIR):
+    """Write hashed, precompressed and re-encoded copies to static/dist/ and return the manifest"""
+    dist = os.path.join(static_dir, DIST)
+    manifest = {'fingerprint': source_fingerprint(static_dir), 'files': {}, 'audio': {}}
+    for name, path in _source_files(static_dir):
+        with open(path, 'rb') as f:
+            data = f.read()
+        content_hash = hashlib.sha256(data).hexdigest()[:10]
+        hashed = _hashed_name(name, content_hash)
+        _write(os.path.join(dist, hashed), data)
+        entry = {'path': hashed, 'size': len(data), 'encodings': {}}
+
+        if name.endswith(TEXT_EXTENSIONS):
+            variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['br'] = brotli.compress(data, quality=11)
+            for encoding, suffix in CONTENT_ENCODINGS:
+                compressed = variants.get(encoding)
+                if compressed is not None and len(compressed) < len(data):
+                    _write(os.path.join(dist, hashed + suffix), compressed)
+                    entry['encodings'][encoding] = len(compressed)
+
+        if name.endswith(AUDIO_EXTENSIONS):
+            sources = []
+            for extension, mime, args in AUDIO_ENCODINGS:
+                target = _hashed_name(name, content_hash, extension)
+                if not os.path.exists(os.path.join(dist, target)) and not _encode_audio(path, os.path.join(dist, target), args):
+                    continue
+                sources.append({'path': target, 'type': mime,
+                                'size': os.path.getsize(os.path.join(dist, target))})
+            sources.append({'path': hashed, 'type': 'audio/wav', 'size': len(data)})
+            manifest['audio'][name] = sources
+        manifest['files'][name] = entry
+
+    _write_manifest(dist, manifest)
+    _prune(dist, manifest)
+    return manifest
+
+
+def _write_manifest(dist, manifest):
+    os.makedirs(dist, exist_ok=True)
+    tmp = os.path.join(dist, f'{MANIFEST}.tmp-{os.getpid()}')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(dist, MANIFEST))
+
+
+def _prune(dist, manifest):
+    """Remove build outputs no longer referenced by the manifest"""
+    keep = {MANIFEST}
+    for entry in manifest['files'].values():
+        keep.add(entry['path'])
+        keep.update(entry['path'] + suffix for encoding, suffix in CONTENT_ENCODINGS if encoding in entry['encodings'])
+    for sources in manifest['audio'].values():
+        keep.update(source['path'] for source in sources)
+    for name, path in _source_files(dist):
+        if name not in keep and '.tmp-' not in name:
+            os.remove(path)
+
+
+def fetch_vendor(static_dir=STATIC_DIR):
+    """Download the pinned third-party scripts missing from static/"""
+    for name, (url, sha256) in VENDOR.items():
+        path = os.path.join(static_dir, name)
+        if os.path.exists(path):
+            continue
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        if hashlib.sha256(data).hexdigest() != sha256:
+            raise RuntimeError(f'{url} does not match the SHA-256 pinned for {name}')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        print(f'fetched {name} ({len(data)} bytes)')
+
+
+def check_vendor(static_dir=STATIC_DIR):
+    """Problems with the pinned third-party scripts in static/, one line each"""
+    problems = []
+    for name, (_, sha256) in VENDOR.items():
+        try:
+            with open(os.path.join(static_dir, name), 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            problems.append(f'{name} is missing')
+            continue
+        if digest != sha256:
+            problems.append(f'{name} does not match its pinned SHA-256')
+    return problems
+
+
+class Assets:
+    """Resolves logical asset names to hashed URLs and serves the hashed files"""
+
+    def __init__(self):
+        self.static_dir = STATIC_DIR
+        self.manifest = {'files': {}, 'audio': {}}
+        self._paths = {}
+
+    def init_app(self, app):
+        self.static_dir = app.static_folder
+        problems = check_vendor(self.static_dir)
+        if problems:
+            raise RuntimeError('Third-party scripts: ' + '; '.join(problems)
+                               + ' (restore them with: python assets.py build --fetch-vendor)')
+        mode = app.config.get('ASSET_BUILD', 'startup')
+        dist = os.path.join(self.static_dir, DIST)
+        manifest = self._read(dist)
+        if mode == 'startup' and (manifest is None or manifest.get('fingerprint') != source_fingerprint(self.static_dir)):
+            manifest = build(self.static_dir)
+            logger.info('Built %d static assets', len(manifest['files']))
+        self._load(manifest or {'files': {}, 'audio': {}})
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.add_template_global(self.asset_url)
+        app.add_template_global(self.audio_sources)
+
+    def _read(self, dist):
+        try:
+            with open(os.path.join(dist, MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, manifest):
+        self.manifest = manifest
+        self._paths = {entry['path']: entry for entry in manifest['files'].values()}
+        for sources in manifest['audio'].values():
+            for source in sources:
+                self._paths.setdefault(source['path'], {'path': source['path'], 'encodings': {}})
+
+    # ----- template helpers -----
+
+    def asset_url(self, filename):
+        """URL of the fingerprinted copy of a static file (plain /static/ URL if not built)"""
+        entry = self.manifest['files'].get(filename)
+        if entry is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=entry['path'])
+
+    def audio_sources(self, filename):
+        """[{'url', 'type'}] for the <source> elements of a sound, smallest encoding first"""
+        sources = self.manifest['audio'].get(filename)
+        if not sources:
+            return [{'url': url_for('static', filename=filename), 'type': mimetypes.guess_type(filename)[0]}]
+        return [{'url': url_for('assets', filename=source['path']), 'type': source['type']} for source in sources]
+
+    # ----- serving -----
+
+    def serve(self, filename):
+        entry = self._paths.get(filename)
+        if entry is None:
+            abort(404)
+        dist = os.path.join(self.static_dir, DIST)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, suffix in CONTENT_ENCODINGS:
+            if candidate in entry['encodings'] and request.accept_encodings[candidate]:
+                encoding = candidate
+                filename += suffix
+                break
+        response = send_from_directory(dist, filename, mimetype=mimetype, conditional=True, etag=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if entry['encodings']:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    def to_dict(self):
+        files = self.manifest['files'].values()
+        return {
+            'files': len(files),
+            'bytes': sum(entry['size'] for entry in files),
+            'gzip_bytes': sum(entry['encodings'].get('gzip', entry['size']) for entry in files),
+            'br_bytes': sum(entry['encodings'].get('br', entry['size']) for entry in files),
+            'audio': {name: [{'type': source['type'], 'size': source['size']} for source in sources]
+                      for name, sources in self.manifest['audio'].items()},
+        }
+
+
+assets = Assets()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'build':
+        sys.exit('usage: python assets.py build [--fetch-vendor]')
+    if '--fetch-vendor' in sys.argv:
+        fetch_vendor()
+    result = build()
+    print(f"built {len(result['files'])} assets into static/{DIST}/")
@@ -0,0 +1,268 @@
+"""Multi-worker coordination.
+
+By default the app is a single process and everything here stays in memory.
+With a shared state URL (Redis) and a Socket.IO message queue configured,
+several workers can serve the same event behind a sticky load balancer:
+
+- emits from any worker reach clients connected to every worker through
+  Flask-SocketIO's message queue;
+- match/timer state (current match, timer running, field fault, time left)
+  lives in the shared store instead of module globals;
+- one worker holds a renewable lease and owns the match timer and the live
+  match. Socket handlers decorated with ``on_owner`` run on that worker;
+  other workers forward them over a command channel.
+"""
+import functools
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+
+import flask
+
+logger = logging.getLogger(__name__)
+
+LEASE_KEY = 'timer_owner'
+COMMAND_CHANNEL = 'owner_commands'
+
+
+class MemoryBackend:
+    """Single-process backend: plain dict, this process always owns the timer"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def setdefault(self, key, value):
+        return self._values.setdefault(key, value)
+
+    def incr(self, key):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + 1
+            return self._values[key]
+
+    def acquire(self, key, owner, ttl):
+        return True
+
+    def holder(self, key):
+        return None
+
+    def publish(self, channel, message):
+        raise RuntimeError('The in-memory backend has no other workers to publish to')
+
+    def listen(self, channel):
+        return iter(())
+
+
+class RedisBackend:
+    """Shared backend for several workers (needs the optional ``redis`` package)"""
+
+    # Extend the lease if we hold it, otherwise take it if nobody does
+    ACQUIRE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, url, prefix='irish:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('Multi-worker mode needs the redis package: pip install redis')
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._acquire = self.redis.register_script(self.ACQUIRE_SCRIPT)
+
+    def get(self, key, default=None):
+        raw = self.redis.get(self.prefix + key)
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key, value):
+        self.redis.set(self.prefix + key, json.dumps(value))
+
+    def setdefault(self, key, value):
+        """Set the key unless it exists; returns its value either way"""
+        self.redis.set(self.prefix + key, json.dumps(value), nx=True)
+        return self.get(key)
+
+    def incr(self, key):
+        return self.redis.incr(self.prefix + key)
+
+    def acquire(self, key, owner, ttl):
+        return bool(self._acquire(keys=[self.prefix + key], args=[owner, int(ttl * 1000)]))
+
+    def holder(self, key):
+        raw = self.redis.get(self.prefix + key)
+        return raw.decode() if raw else None
+
+    def publish(self, channel, message):
+        self.redis.publish(self.prefix + channel, json.dumps(message))
+
+    def listen(self, channel):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.prefix + channel)
+        for message in pubsub.listen():
+            if message.get('type') == 'message':
+                yield json.loads(message['data'])
+
+
+class SharedState:
+    """Match/timer state that every worker sees, read and written as attributes"""
+
+    DEFAULTS = {
+        'current_match_id': None,
+        'timer_running': False,
+        'field_fault_active': False,
+        'time_remaining': None,
+        # Last timer_state broadcast, for clients that connect between transitions
+        'timer_state': None,
+        # Latest show_* and show/hide_review broadcasts, [event, data], for resync snapshots
+        'display_screen': None,
+        'display_review': None,
+        # Match /api/current_match returns (current_match.py); 0 when there are none
+        'current_match_pointer': None,
+    }
+
+    def __init__(self, cluster):
+        object.__setattr__(self, '_cluster', cluster)
+
+    def __getattr__(self, name):
+        if name not in self.DEFAULTS:
+            raise AttributeError(name)
+        return self._cluster.backend.get(name, self.DEFAULTS[name])
+
+    def __setattr__(self, name, value):
+        if name not in self.DEFAULTS:
+            raise AttributeError(name)
+        self._cluster.backend.set(name, value)
+
+
+class Cluster:
+    """Timer-owner election and command forwarding between workers"""
+
+    def __init__(self):
+        self.worker_id = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+        self.backend = MemoryBackend()
+        self.state = SharedState(self)
+        self.enabled = False
+        self.lease_ttl = 5.0
+        self._owner = True
+        self._app = None
+        self._socketio = None
+        self._handlers = {}
+        self._acquired_callbacks = []
+
+    def init_app(self, app, socketio):
+        self._app = app
+        self._socketio = socketio
+        url = app.config.get('SHARED_STATE_URL')
+        if not url:
+            if app.config.get('SOCKETIO_MESSAGE_QUEUE'):
+                raise RuntimeError('IRISH_MESSAGE_QUEUE needs a Redis IRISH_STATE_URL for shared match state')
+            return
+        self.backend = RedisBackend(url)
+        self.enabled = True
+        self.lease_ttl = float(app.config.get('TIMER_LEASE_TTL', 5.0))
+        self._owner = False
+        socketio.start_background_task(self._lease_loop)
+        socketio.start_background_task(self._listen)
+
+    def is_owner(self):
+        """Whether this worker currently owns the match timer and live match"""
+        return self._owner
+
+    def next_version(self, name):
+        """Next value of a counter shared by all workers"""
+        return self.backend.incr(f'version:{name}')
+
+    def on_acquired(self, callback):
+        """Register a callback run (in an app context) when this worker becomes owner"""
+        self._acquired_callbacks.append(callback)
+        return callback
+
+    def on_owner(self, handler):
+        """Run a Socket.IO handler on the owner worker, forwarding it if needed.
+
+        Replies sent with ``emit()`` still reach the original client because the
+        owner emits through the message queue to the forwarded sid.
+        """
+        self._handlers[handler.__name__] = handler
+
+        @functools.wraps(handler)
+        def wrapper(*args):
+            if not self.enabled or self._owner:
+                return handler(*args)
+            self.backend.publish(COMMAND_CHANNEL, {
+                'handler': handler.__name__,
+                'sid': flask.request.sid,
+                'namespace': flask.request.namespace,
+                'args': list(args),
+                'from': self.worker_id,
+            })
+
+        return wrapper
+
+    def to_dict(self):
+        return {
+            'enabled': self.enabled,
+            'worker_id': self.worker_id,
+            'owner': self._owner,
+            'timer_owner': self.backend.holder(LEASE_KEY) if self.enabled else self.worker_id,
+            'lease_ttl': self.lease_ttl,
+        }
+
+    def _lease_loop(self):
+        while True:
+            try:
+                owner = self.backend.acquire(LEASE_KEY, self.worker_id, self.lease_ttl)
+            except Exception:
+                logger.exception('Timer lease renewal failed')
+                owner = False
+            became_owner = owner and not self._owner
+            self._owner = owner
+            if became_owner:
+                logger.info('Worker %s now owns the match timer', self.worker_id)
+                with self._app.app_context():
+                    for callback in self._acquired_callbacks:
+                        callback()
+            self._socketio.sleep(self.lease_ttl / 3)
+
+    def _listen(self):
+        while True:
+            try:
+                for message in self.backend.listen(COMMAND_CHANNEL):
+                    if self._owner:
+                        self._run(message)
+            except Exception:
+                logger.exception('Owner command channel failed, resubscribing')
+                self._socketio.sleep(1)
+
+    def _run(self, message):
+        handler = self._handlers.get(message.get('handler'))
+        if handler is None:
+            logger.warning('Unknown forwarded handler %s', message.get('handler'))
+            return
+        # Recreate enough of a Socket.IO request for emit() and request.sid
+        with self._app.test_request_context('/socket.io/'):
+            flask.request.sid = message['sid']
+            flask.request.namespace = message.get('namespace') or '/'
+            try:
+                handler(*message.get('args', ()))
+            except Exception:
+                logger.exception('Forwarded handler %s failed', message['handler'])
+
+
+cluster = Cluster()
+match_state = cluster.state
@@ -0,0 +1,85 @@
+"""Pointer to the current match, the one /api/current_match returns.
+
+It used to be worked out on every request: the match in progress, else the
+first scheduled one, else the most recent one (up to three queries). Now the
+FTA handlers move an explicit pointer: starting or saving a match points at
+it, and stopping, ending or finalizing a match, deleting matches or importing
+a schedule run that rule once. The pointer lives in the shared match state
+and in the app_state table, so every worker agrees on it and it survives a
+restart.
+"""
+from cluster import match_state
+from db import db
+from models import AppState, Match
+
+POINTER_KEY = 'current_match_id'
+# Pointer value meaning "there are no matches"
+NO_MATCH = 0
+
+
+class CurrentMatch:
+    """The current match id, with counters of how it was obtained"""
+
+    def __init__(self):
+        self.reads = 0
+        self.restores = 0
+        self.resolves = 0
+
+    def get(self):
+        """Id of the current match, or None when there are no matches"""
+        self.reads += 1
+        match_id = match_state.current_match_pointer
+        if match_id is None:
+            match_id = self.restore()
+        return match_id or None
+
+    def set(self, match_id):
+        """Point at a match and persist the pointer (commits)"""
+        match_state.current_match_pointer = match_id or NO_MATCH
+        db.session.merge(AppState(key=POINTER_KEY, value=str(match_id or NO_MATCH)))
+        db.session.commit()
+
+    def restore(self):
+        """Load the persisted pointer, or resolve it if there is none (or it is stale)"""
+        self.restores += 1
+        row = db.session.get(AppState, POINTER_KEY)
+        match_id = int(row.value) if row and row.value else None
+        if match_id and db.session.get(Match, match_id) is not None:
+            match_state.current_match_pointer = match_id
+            return match_id
+        return self.resolve()
+
+    def resolve(self):
+        """Point at the match in progress, else the first scheduled one, else the latest"""
+        self.resolves += 1
+        query = db.session.query(Match.id)
+        match_id = (query.filter_by(status='in_progress').order_by(Match.id.desc()).limit(1).scalar()
+                    or query.filter_by(status='scheduled').order_by(Match.id).limit(1).scalar()
+                    or query.order_by(Match.id.desc()).limit(1).scalar())
+        self.set(match_id)
+        return match_id
+
+    def refresh(self):
+        """Re-resolve after a match stopped, ended or disappeared, unless one is still in progress"""
+        match_id = match_state.current_match_pointer
+        match = db.session.get(Match, match_id) if match_id else None
+        if match is None or match.status != 'in_progress':
+            self.resolve()
+
+    def moved_to(self, match_id):
+        """Point at a match the FTA saved, unless another match is in progress"""
+        current = self.get()
+        match = db.session.get(Match, current) if current and current != match_id else None
+        if match is None or match.status != 'in_progress':
+            self.set(match_id)
+
+    def to_dict(self):
+        return {
+            'match_id': match_state.current_match_pointer or None,
+            'reads': self.reads,
+            'restores': self.restores,
+            'resolves': self.resolves,
+        }
+
+
+current_match = CurrentMatch()
@@ -0,0 +1,119 @@
+"""Data version counters used for HTTP cache validation.
+
+Each counter is bumped after a commit that touched one of the tables it
+watches (including bulk UPDATE/DELETE/INSERT statements), so an endpoint can
+compare a client's If-None-Match against the current version and answer
+304 without touching the database.
+
+The counters live in the cluster backend (see cluster.py): with several
+workers a commit on any of them moves the version for all of them.
+"""
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from cluster import cluster
+
+# Distinguishes ETags issued now from ones issued before the counters started over
+# (a restart with the in-memory backend, or an emptied Redis)
+_EPOCH = format(int(time.time() * 1000), 'x')
+EPOCH_KEY = 'version_epoch'
+_epoch = {'backend': None, 'value': None}
+
+
+def epoch():
+    """Epoch of the shared counters, set by the first worker that used them"""
+    backend = cluster.backend
+    if _epoch['backend'] is not backend:
+        _epoch.update(backend=backend, value=backend.setdefault(EPOCH_KEY, _EPOCH))
+    return _epoch['value']
+
+
+class VersionCounter:
+    """Monotonically increasing version of some part of the data, shared by all workers"""
+
+    def __init__(self, name, tables=()):
+        self.name = name
+        self.tables = set(tables)
+        self.key = f'version:{name}'
+        # Version this process's in-memory copy of the data is known to reflect; see sync()
+        self.seen = None
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return cluster.backend.get(self.key, 0)
+
+    def bump(self):
+        value = cluster.next_version(self.name)
+        with self._lock:
+            # Our own change right after the version we reflect: still in sync
+            if self.seen == value - 1:
+                self.seen = value
+        return value
+
+    def sync(self):
+        """Note the current version before loading data it covers into memory"""
+        self.seen = self.value
+        return self.seen
+
+    def stale(self):
+        """Whether the version moved since sync() other than by this process's own bumps,
+        i.e. another worker changed the data"""
+        return self.seen != self.value
+
+    def etag(self, *parts, version=None):
+        """Strong (unquoted) ETag value for the current (or the given) version,
+        optionally varied by request parts such as the query string"""
+        suffix = ''.join(f'-{part}' for part in parts if part)
+        return f'{self.name}-{epoch()}-{self.value if version is None else version}{suffix}'
+
+
+matches_version = VersionCounter('matches', ('match', 'team'))
+# Also bumped explicitly when ranking tiebreakers change without a team/ranking write
+rankings_version = VersionCounter('rankings', ('team', 'team_ranking'))
+
+_counters = [matches_version, rankings_version]
+_PENDING_KEY = 'data_versions_pending'
+
+
+def register(counter):
+    _counters.append(counter)
+    return counter
+
+
+def _mark(session, table_name):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for counter in _counters:
+        if table_name in counter.tables:
+            pending.add(counter)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            _mark(session, table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        _mark(orm_execute_state.session, mapper.local_table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    for counter in session.info.pop(_PENDING_KEY, ()):
+        counter.bump()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
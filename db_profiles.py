@@ -0,0 +1,128 @@
+"""Database engine profiles.
+
+The 'tuned' profile (the default) configures the engine for the workload of
+a running match: a timer commit every second plus bursts of score commits
+while displays and panels keep reading.
+
+- SQLite: WAL journal so readers don't block on the writer, synchronous=NORMAL
+  (fsync at checkpoints instead of every commit; safe in WAL mode), a busy
+  timeout instead of immediate "database is locked" errors, and memory-mapped
+  reads. The pragmas are applied to every new connection.
+- Postgres: explicit pool size/overflow, pre-ping so connections dropped by
+  the host are replaced transparently, periodic recycling, a server-side
+  statement timeout and, with the psycopg 3 driver, automatic server-side
+  prepared statements for frequently repeated queries.
+
+The 'default' profile leaves the driver defaults untouched, for comparison
+(see scripts/bench_db.py).
+"""
+from sqlalchemy import event, make_url, text
+
+PROFILE_TUNED = 'tuned'
+PROFILE_DEFAULT = 'default'
+PROFILES = (PROFILE_TUNED, PROFILE_DEFAULT)
+
+DEFAULTS = {
+    'DB_PROFILE': PROFILE_TUNED,
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+    'DB_POOL_SIZE': 10,
+    'DB_MAX_OVERFLOW': 20,
+    'DB_POOL_RECYCLE': 1800,
+    'DB_STATEMENT_TIMEOUT_MS': 10000,
+    'DB_PREPARE_THRESHOLD': 5,
+}
+
+
+def _settings(config):
+    settings = {key: config.get(key, value) for key, value in DEFAULTS.items()}
+    if settings['DB_PROFILE'] not in PROFILES:
+        raise ValueError(f"Unknown database profile {settings['DB_PROFILE']!r}, expected one of {PROFILES}")
+    return settings
+
+
+def _is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def _is_memory(url):
+    return make_url(url).database in (None, '', ':memory:')
+
+
+def engine_options(url, config):
+    """create_engine() keyword arguments for a database URL under the configured profile"""
+    settings = _settings(config)
+    if settings['DB_PROFILE'] != PROFILE_TUNED or _is_sqlite(url):
+        # SQLite is tuned with pragmas on connect, see install()
+        return {}
+    options = {
+        'pool_size': int(settings['DB_POOL_SIZE']),
+        'max_overflow': int(settings['DB_MAX_OVERFLOW']),
+        'pool_pre_ping': True,
+        'pool_recycle': int(settings['DB_POOL_RECYCLE']),
+        'connect_args': {'options': f"-c statement_timeout={int(settings['DB_STATEMENT_TIMEOUT_MS'])}"},
+    }
+    if make_url(url).get_driver_name() == 'psycopg':
+        # psycopg 3 prepares a statement server-side after it ran this many times;
+        # psycopg2 has no server-side prepared statements
+        options['connect_args']['prepare_threshold'] = int(settings['DB_PREPARE_THRESHOLD'])
+    return options
+
+
+def sqlite_pragmas(url, config):
+    """PRAGMA name -> value applied to each new SQLite connection"""
+    settings = _settings(config)
+    if settings['DB_PROFILE'] != PROFILE_TUNED:
+        return {}
+    pragmas = {
+        'synchronous': settings['SQLITE_SYNCHRONOUS'],
+        'busy_timeout': int(settings['SQLITE_BUSY_TIMEOUT_MS']),
+        'mmap_size': int(settings['SQLITE_MMAP_SIZE']),
+    }
+    if not _is_memory(url):
+        # journal_mode first: synchronous=NORMAL is only crash-safe in WAL mode
+        pragmas = dict(journal_mode='WAL', **pragmas)
+    return pragmas
+
+
+def install(engine, config):
+    """Apply the profile's per-connection settings to an engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(engine.url, config)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def configure(app):
+    """Set SQLALCHEMY_ENGINE_OPTIONS for the app's database; call before db.init_app"""
+    options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_app(app, db):
+    """Install per-connection settings on the engine created by db.init_app"""
+    with app.app_context():
+        install(db.engine, app.config)
+
+
+def describe(engine, config):
+    """Profile, effective connection settings and pool status"""
+    settings = _settings(config)
+    info = {'profile': settings['DB_PROFILE'], 'dialect': engine.dialect.name, 'pool': engine.pool.status()}
+    with engine.connect() as connection:
+        if engine.dialect.name == 'sqlite':
+            info['pragmas'] = {name: connection.execute(text(f'PRAGMA {name}')).scalar()
+                               for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size')}
+        elif engine.dialect.name == 'postgresql':
+            info['statement_timeout'] = connection.execute(text('SHOW statement_timeout')).scalar()
+    return info
@@ -0,0 +1,326 @@
+"""Event-sourced match scores.
+
+MatchEvent is the append-only record of everything that changes a match's
+scoring columns: scoring events, bonus activations, score overrides from
+review or the admin page, and 'void' events that cancel an earlier event.
+The scoring columns of Match are a projection of those events: project()
+replays them, starting from the match's MatchSnapshot when there is one, and
+rebuild_all() recomputes every match with a couple of queries and one bulk
+update.
+"""
+import json
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, UTC
+
+from sqlalchemy import or_
+
+from db import db
+from models import Match, MatchEvent, MatchSnapshot
+
+EVENT_VOID = 'void'
+EVENT_OVERRIDE = 'score_override'
+EVENT_BONUS = 'bonus'
+SYSTEM_EVENTS = (EVENT_VOID, EVENT_OVERRIDE, EVENT_BONUS)
+
+COUNTER_FIELDS = tuple(
+    f'{alliance}_{field}'
+    for alliance in ('red', 'blue')
+    for field in ('bucket_normal', 'bucket_bonus', 'human_bucket', 'park',
+                  'slight_ramp', 'climb', 'fouls', 'tech_fouls')
+)
+PROJECTED_FIELDS = ('red_score', 'blue_score') + COUNTER_FIELDS + ('red_teleop_rp', 'blue_teleop_rp')
+
+
+def void_target(event):
+    """Id of the event a void event cancels"""
+    return _void_target(event.details)
+
+
+def _void_target(details):
+    return json.loads(details)['event_id']
+
+
+class MatchState:
+    """Projected scoring columns of one match, attribute-compatible with Match"""
+
+    __slots__ = PROJECTED_FIELDS
+
+    def __init__(self, values=None):
+        for field in PROJECTED_FIELDS:
+            setattr(self, field, False if field.endswith('_rp') else 0)
+        for field, value in (values or {}).items():
+            if field in PROJECTED_FIELDS:
+                setattr(self, field, value)
+
+    @classmethod
+    def of(cls, match):
+        return cls({field: getattr(match, field) for field in PROJECTED_FIELDS})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in PROJECTED_FIELDS}
+
+    def differences(self, match):
+        """Projected values that differ from a match row (or live match)"""
+        return {field: value for field, value in self.to_dict().items() if getattr(match, field) != value}
+
+    def apply_to(self, match):
+        for field, value in self.differences(match).items():
+            setattr(match, field, value)
+
+
+class EventStore:
+    """Appends match events and replays them into Match projections"""
+
+    def __init__(self):
+        self.snapshot_interval = 50
+        self._apply_score = None
+        self._deltas = {}
+
+    def init_app(self, app, apply_score):
+        """apply_score(match, alliance, event_type, count=1) applies (or with count=-1
+        undoes) one scoring event"""
+        self.snapshot_interval = int(app.config.get('EVENT_SNAPSHOT_INTERVAL', 50))
+        self._apply_score = apply_score
+        self._deltas = {}
+
+    # ----- folding -----
+
+    def apply(self, state, event_type, alliance, points, details=None):
+        """Fold one event into a match, live match or MatchState"""
+        if event_type == EVENT_OVERRIDE:
+            for field, value in json.loads(details).items():
+                if field in PROJECTED_FIELDS:
+                    setattr(state, field, value)
+        elif event_type == EVENT_BONUS:
+            setattr(state, f'{alliance}_teleop_rp', True)
+        elif event_type != EVENT_VOID:
+            # Points come from the current game rules, not the stored value
+            self._apply_score(state, alliance, event_type)
+
+    def delta(self, event_type, alliance):
+        """Column changes made by one scoring event (scoring events are additive)"""
+        key = (event_type, alliance)
+        delta = self._deltas.get(key)
+        if delta is None:
+            before = MatchState()
+            after = MatchState()
+            self._apply_score(after, alliance, event_type)
+            delta = self._deltas[key] = {
+                field: getattr(after, field) - getattr(before, field)
+                for field in PROJECTED_FIELDS if getattr(after, field) != getattr(before, field)
+            }
+        return delta
+
+    def fold(self, state, events):
+        """Apply (id, event_type, alliance, points, details) rows in order, skipping
+        the ones voided within the same list.
+
+        Scoring events between two overrides are counted and applied as one
+        multiplied delta per distinct (event_type, alliance).
+        """
+        voided = {_void_target(details) for _, event_type, _, _, details in events if event_type == EVENT_VOID}
+        pending = Counter()
+        for event_id, event_type, alliance, points, details in events:
+            if event_type == EVENT_VOID or event_id in voided:
+                continue
+            if event_type in (EVENT_OVERRIDE, EVENT_BONUS):
+                self._add(state, pending)
+                pending.clear()
+                self.apply(state, event_type, alliance, points, details)
+            else:
+                pending[event_type, alliance] += 1
+        self._add(state, pending)
+        return state
+
+    def _add(self, state, counts):
+        for key, count in counts.items():
+            for field, change in self.delta(*key).items():
+                setattr(state, field, getattr(state, field) + change * count)
+
+    # ----- writing -----
+
+    def void_event(self, event):
+        """Compensating event cancelling an earlier one. Does not commit."""
+        void = MatchEvent(
+            match_id=event.match_id,
+            event_type=EVENT_VOID,
+            alliance=event.alliance,
+            points=0,
+            details=json.dumps({'event_id': event.id}),
+        )
+        db.session.add(void)
+        return void
+
+    def undo(self, match, event):
+        """Take a just-voided scoring event back out of a match in O(1).
+
+        Returns False when that isn't exact (bonus or override events, or an
+        override recorded after the event) and the caller must replay instead.
+        """
+        if event.event_type in SYSTEM_EVENTS:
+            return False
+        later_override = db.session.query(MatchEvent.id).filter(
+            MatchEvent.match_id == event.match_id,
+            MatchEvent.id > event.id,
+            MatchEvent.event_type == EVENT_OVERRIDE,
+        ).first()
+        if later_override:
+            return False
+        self._apply_score(match, event.alliance, event.event_type, -1)
+        return True
+
+    def override_details(self, values):
+        return json.dumps({field: value for field, value in values.items() if field in PROJECTED_FIELDS})
+
+    # ----- reading -----
+
+    def visible(self, events):
+        """Events still in effect: drops void events and the events they cancel"""
+        events = list(events)
+        voided = {void_target(e) for e in events if e.event_type == EVENT_VOID}
+        return [e for e in events if e.event_type != EVENT_VOID and e.id not in voided]
+
+    def is_voided(self, event):
+        return event.event_type == EVENT_VOID or event.id in self._voided_ids(event.match_id)
+
+    def _voided_ids(self, match_id):
+        rows = db.session.query(MatchEvent.details).filter_by(match_id=match_id, event_type=EVENT_VOID)
+        return {json.loads(details)['event_id'] for (details,) in rows}
+
+    def _events(self, match_ids=None, after_snapshots=False):
+        """Event rows grouped by match, in append order; optionally only the ones
+        newer than each match's snapshot"""
+        query = db.select(
+            MatchEvent.match_id, MatchEvent.id, MatchEvent.event_type,
+            MatchEvent.alliance, MatchEvent.points, MatchEvent.details
+        )
+        if after_snapshots:
+            query = query.outerjoin(MatchSnapshot, MatchSnapshot.match_id == MatchEvent.match_id).filter(
+                or_(MatchSnapshot.id.is_(None), MatchEvent.id > MatchSnapshot.last_event_id))
+        if match_ids is not None:
+            query = query.filter(MatchEvent.match_id.in_(match_ids))
+        grouped = defaultdict(list)
+        # Core execution: plain rows, no ORM loading overhead for tens of thousands of events
+        for match_id, *event in db.session.connection().execute(query.order_by(MatchEvent.match_id, MatchEvent.id)):
+            grouped[match_id].append(event)
+        return grouped
+
+    def project(self, match_ids=None, full=False):
+        """Replay events into a MatchState per match.
+
+        Starts from each match's snapshot unless full is set. A void aimed at an
+        event already folded into a snapshot forces a full replay of that match.
+        Returns {match_id: (state, last_event_id, events replayed)} for every match
+        with events or a snapshot.
+        """
+        snapshots = {}
+        if not full:
+            query = MatchSnapshot.query
+            if match_ids is not None:
+                query = query.filter(MatchSnapshot.match_id.in_(match_ids))
+            snapshots = {s.match_id: s for s in query}
+        events = self._events(match_ids, after_snapshots=bool(snapshots))
+
+        stale = [match_id for match_id, tail in events.items()
+                 if match_id in snapshots and any(
+                     event_type == EVENT_VOID and _void_target(details) <= snapshots[match_id].last_event_id
+                     for _, event_type, _, _, details in tail)]
+        if stale:
+            for match_id in stale:
+                del snapshots[match_id]
+            events.update(self._events(stale))
+
+        result = {}
+        for match_id in set(events) | set(snapshots):
+            snapshot = snapshots.get(match_id)
+            state = MatchState(json.loads(snapshot.state)) if snapshot else MatchState()
+            tail = events.get(match_id, [])
+            self.fold(state, tail)
+            last_event_id = tail[-1][0] if tail else snapshot.last_event_id
+            result[match_id] = (state, last_event_id, len(tail))
+        return result
+
+    def replay(self, match_id):
+        """Rebuild one match's projection, snapshotting it if the replay was long"""
+        state, last_event_id, replayed = self.project([match_id]).get(match_id, (MatchState(), 0, 0))
+        if replayed >= self.snapshot_interval:
+            self.write_snapshots({match_id: (state, last_event_id, replayed)})
+        return state
+
+    def write_snapshots(self, projected):
+        """Replace the snapshots of the given matches. Does not commit."""
+        if not projected:
+            return 0
+        MatchSnapshot.query.filter(MatchSnapshot.match_id.in_(list(projected))).delete(synchronize_session=False)
+        db.session.execute(db.insert(MatchSnapshot), [{
+            'match_id': match_id,
+            'last_event_id': last_event_id,
+            'state': json.dumps(state.to_dict()),
+            'created_at': datetime.now(UTC),
+        } for match_id, (state, last_event_id, _) in projected.items()])
+        return len(projected)
+
+    def rebuild_all(self, full=False):
+        """Recompute the scoring columns of every match from its events.
+
+        Rows are only written where the projection differs, with one bulk UPDATE;
+        matches that replayed at least snapshot_interval events get a new snapshot.
+        Does not commit. Returns the changed states and timing.
+        """
+        started = time.perf_counter()
+        projected = self.project(full=full)
+        columns = [getattr(Match, field) for field in PROJECTED_FIELDS]
+        changed = {}
+        matches = 0
+        for row in db.session.query(Match.id, *columns):
+            matches += 1
+            state = projected.get(row.id, (MatchState(), 0, 0))[0]
+            if state.differences(row):
+                changed[row.id] = state
+        if changed:
+            db.session.execute(db.update(Match), [dict(state.to_dict(), id=match_id) for match_id, state in changed.items()])
+        snapshots = self.write_snapshots({
+            match_id: item for match_id, item in projected.items()
+            if full or item[2] >= self.snapshot_interval
+        })
+        return {
+            'matches': matches,
+            'events_replayed': sum(item[2] for item in projected.values()),
+            'changed': changed,
+            'snapshots_written': snapshots,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def reconcile(self):
+        """Make the event log explain matches recorded before scores were event-sourced.
+
+        For every match without a snapshot, columns that differ from its replayed
+        events (older score edits, bonuses, drift) are recorded as one score_override
+        event, then the match is snapshotted. Does not commit.
+        """
+        match_ids = [match_id for (match_id,) in db.session.query(Match.id).outerjoin(
+            MatchSnapshot, MatchSnapshot.match_id == Match.id).filter(MatchSnapshot.id.is_(None))]
+        if not match_ids:
+            return 0
+        projected = self.project(match_ids, full=True)
+        overrides = []
+        for match in Match.query.filter(Match.id.in_(match_ids)):
+            state = projected.get(match.id, (MatchState(),))[0]
+            diff = {field: getattr(match, field) for field in state.differences(match)}
+            if diff:
+                overrides.append({
+                    'match_id': match.id,
+                    'event_type': EVENT_OVERRIDE,
+                    'points': 0,
+                    'details': self.override_details(diff),
+                    'timestamp': datetime.now(UTC),
+                })
+        if overrides:
+            db.session.execute(db.insert(MatchEvent), overrides)
+            projected = self.project(match_ids, full=True)
+        self.write_snapshots({match_id: projected.get(match_id, (MatchState(), 0, 0)) for match_id in match_ids})
+        return len(overrides)
+
+
+event_store = EventStore()
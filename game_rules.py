@@ -0,0 +1,147 @@
+"""Game rules: scoring categories, point values and ranking point thresholds.
+
+SCORING_RULES, CATEGORY_GROUPS and RP_THRESHOLDS are the only place point
+values live. GameRules compiles them at startup into an (alliance, event
+type) dispatch table used to apply and undo events, per-alliance score terms
+for recomputing scores from the counter columns, and matching SQL
+expressions so every match can be re-scored with a single UPDATE.
+
+A JSON file named by IRISH_GAME_RULES can override point values and
+thresholds, e.g. {"points": {"climb": 15}, "thresholds": {"climb_rp": 24}};
+run the admin re-score afterwards to apply it to matches already played.
+"""
+import json
+
+ALLIANCES = ('red', 'blue')
+OPPONENT = {'red': 'blue', 'blue': 'red'}
+
+# Who receives the points of a scoring event
+SELF = 'self'
+OPPONENT_ALLIANCE = 'opponent'
+
+SCORING_RULES = (
+    # event type       counter column    points  points go to
+    ('bucket_normal', 'bucket_normal',   6,      SELF),
+    ('bucket_bonus',  'bucket_bonus',   12,      SELF),
+    ('human_bucket',  'human_bucket',    3,      SELF),
+    ('park',          'park',            2,      SELF),
+    ('slight_ramp',   'slight_ramp',     6,      SELF),
+    ('climb',         'climb',          14,      SELF),
+    ('foul',          'fouls',           2,      OPPONENT_ALLIANCE),
+    ('tech_foul',     'tech_fouls',      5,      OPPONENT_ALLIANCE),
+)
+
+# Named groups of categories, used by RP thresholds and ranking tiebreakers
+CATEGORY_GROUPS = {
+    'bench': ('park', 'slight_ramp', 'climb'),
+    'teleop': ('bucket_normal', 'bucket_bonus', 'human_bucket'),
+}
+
+# RP column -> (category group, minimum points). The win RP goes to the alliance
+# with the higher score and the teleop RP to an alliance that activated its bonus.
+RP_THRESHOLDS = {
+    'climb_rp': ('bench', 20),
+}
+
+
+class GameRules:
+    """Compiled scoring rules"""
+
+    def __init__(self, scoring=SCORING_RULES, groups=CATEGORY_GROUPS, thresholds=RP_THRESHOLDS):
+        self.compile(scoring, groups, thresholds)
+
+    def init_app(self, app):
+        """Apply point/threshold overrides from the GAME_RULES_FILE JSON, if any"""
+        path = app.config.get('GAME_RULES_FILE')
+        if not path:
+            return
+        with open(path) as f:
+            overrides = json.load(f)
+        points = overrides.get('points', {})
+        scoring = tuple(
+            (event_type, column, points.get(event_type, value), receiver)
+            for event_type, column, value, receiver in SCORING_RULES
+        )
+        thresholds = dict(RP_THRESHOLDS)
+        for rp, minimum in overrides.get('thresholds', {}).items():
+            group = thresholds[rp][0]
+            thresholds[rp] = (group, minimum)
+        self.compile(scoring, CATEGORY_GROUPS, thresholds)
+
+    def compile(self, scoring, groups, thresholds):
+        self.scoring = tuple(scoring)
+        self.groups = dict(groups)
+        self.thresholds = dict(thresholds)
+        self.points = {event_type: points for event_type, _, points, _ in self.scoring}
+        # Match RP flag columns (without the alliance prefix)
+        self.rp_columns = ('win_rp', 'teleop_rp') + tuple(self.thresholds)
+
+        # (alliance, event type) -> (counter attribute, score attribute, points)
+        self.dispatch = {}
+        # alliance -> [(counter attribute, points)] adding up to that alliance's score
+        self.score_terms = {alliance: [] for alliance in ALLIANCES}
+        columns = {}
+        for event_type, column, points, receiver in self.scoring:
+            columns[event_type] = column
+            for alliance in ALLIANCES:
+                scored = alliance if receiver == SELF else OPPONENT[alliance]
+                counter = f'{alliance}_{column}'
+                self.dispatch[alliance, event_type] = (counter, f'{scored}_score', points)
+                self.score_terms[scored].append((counter, points))
+
+        # (alliance, group) -> [(counter attribute, points)]
+        self.group_terms = {
+            (alliance, group): [(f'{alliance}_{columns[event_type]}', self.points[event_type])
+                                for event_type in event_types]
+            for group, event_types in self.groups.items()
+            for alliance in ALLIANCES
+        }
+
+    # ----- applying events -----
+
+    def apply(self, match, alliance, event_type, count=1):
+        """Apply (count=1) or undo (count=-1) one scoring event on a match, live
+        match or projection. Returns the points scored, or None for an unknown event."""
+        rule = self.dispatch.get((alliance, event_type))
+        if rule is None:
+            return None
+        counter, score, points = rule
+        setattr(match, counter, getattr(match, counter) + count)
+        setattr(match, score, getattr(match, score) + points * count)
+        return points
+
+    # ----- computing from counters -----
+
+    def score(self, match, alliance):
+        return sum(getattr(match, counter) * points for counter, points in self.score_terms[alliance])
+
+    def group_points(self, match, alliance, group):
+        return sum(getattr(match, counter) * points for counter, points in self.group_terms[alliance, group])
+
+    def threshold_rps(self, match, alliance):
+        """{rp column: earned} for the threshold RPs of one alliance"""
+        return {rp: self.group_points(match, alliance, group) >= minimum
+                for rp, (group, minimum) in self.thresholds.items()}
+
+    def total_rps(self, match, alliance):
+        return sum(int(bool(getattr(match, f'{alliance}_{rp}'))) for rp in self.rp_columns)
+
+    # ----- SQL versions for bulk re-scoring -----
+
+    def score_expression(self, model, alliance):
+        return sum(getattr(model, counter) * points for counter, points in self.score_terms[alliance])
+
+    def group_expression(self, model, alliance, group):
+        return sum(getattr(model, counter) * points for counter, points in self.group_terms[alliance, group])
+
+    def to_dict(self):
+        return {
+            'scoring': [{'event_type': event_type, 'column': column, 'points': points, 'receiver': receiver}
+                        for event_type, column, points, receiver in self.scoring],
+            'groups': {group: list(event_types) for group, event_types in self.groups.items()},
+            'thresholds': {rp: {'group': group, 'minimum': minimum}
+                           for rp, (group, minimum) in self.thresholds.items()},
+        }
+
+
+game_rules = GameRules()
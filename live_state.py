@@ -0,0 +1,170 @@
+"""In-memory live match state with write-behind persistence.
+
+While a match is in progress the referee panels, bonus activations and timer
+ticks mutate a LiveMatch held in process memory instead of the database row.
+A background flusher periodically writes the dirty counters and any queued
+MatchEvent rows back in a single transaction, and callers force a flush when
+the match ends so the database is authoritative again for review/finalize.
+"""
+import threading
+from datetime import datetime, UTC
+
+from db import db
+from models import Match, MatchEvent
+
+# Match columns that change while a match is running
+LIVE_FIELDS = (
+    'red_score', 'blue_score',
+    'match_time_remaining', 'is_endgame',
+    'red_bonus_active', 'red_bonus_time_remaining',
+    'blue_bonus_active', 'blue_bonus_time_remaining',
+    'red_teleop_rp', 'blue_teleop_rp',
+    'red_climb_rp', 'blue_climb_rp',
+    'red_win_rp', 'blue_win_rp',
+    'red_bucket_normal', 'red_bucket_bonus', 'red_human_bucket',
+    'red_park', 'red_slight_ramp', 'red_climb',
+    'blue_bucket_normal', 'blue_bucket_bonus', 'blue_human_bucket',
+    'blue_park', 'blue_slight_ramp', 'blue_climb',
+    'red_fouls', 'red_tech_fouls', 'blue_fouls', 'blue_tech_fouls',
+)
+
+MODE_SYNC = 'sync'
+MODE_WRITE_BEHIND = 'write_behind'
+
+
+class LiveMatch:
+    """Authoritative in-memory copy of a running match.
+
+    Exposes the same attribute names as the Match model so scoring code can
+    mutate either one. Assigning a live field marks the match dirty; the
+    matches data version moves when the flush commits it.
+    """
+
+    def __init__(self, match):
+        object.__setattr__(self, 'id', match.id)
+        object.__setattr__(self, 'dirty', False)
+        for field in LIVE_FIELDS:
+            object.__setattr__(self, field, getattr(match, field))
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in LIVE_FIELDS:
+            object.__setattr__(self, 'dirty', True)
+
+    def snapshot(self):
+        """Return the live field values as a dict"""
+        return {field: getattr(self, field) for field in LIVE_FIELDS}
+
+
+class LiveMatchStore:
+    """Holds the live matches and the queue of events awaiting persistence"""
+
+    def __init__(self):
+        self.mode = MODE_WRITE_BEHIND
+        self.flush_interval = 0.5
+        self._app = None
+        self._matches = {}
+        self._pending_events = []
+        self._lock = threading.RLock()
+        self._flusher_started = False
+
+    def init_app(self, app, socketio):
+        """Read configuration and remember where to run the flusher task"""
+        self._app = app
+        self._socketio = socketio
+        self.mode = app.config.get('LIVE_STATE_MODE', MODE_WRITE_BEHIND)
+        self.flush_interval = float(app.config.get('LIVE_STATE_FLUSH_INTERVAL', 0.5))
+
+    @property
+    def enabled(self):
+        return self.mode == MODE_WRITE_BEHIND
+
+    def load(self, match):
+        """Start tracking a match that just went live"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            live = LiveMatch(match)
+            self._matches[match.id] = live
+        self._ensure_flusher()
+        return live
+
+    def get(self, match_id):
+        return self._matches.get(match_id)
+
+    def record_event(self, match_id, event_type, alliance, points, team_id=None, details=None):
+        """Queue a MatchEvent row for the next flush"""
+        with self._lock:
+            self._pending_events.append({
+                'match_id': match_id,
+                'event_type': event_type,
+                'alliance': alliance,
+                'team_id': team_id,
+                'points': points,
+                'details': details,
+                'timestamp': datetime.now(UTC),
+            })
+
+    def flush(self):
+        """Write dirty live matches and queued events in one transaction"""
+        with self._lock:
+            dirty = [(live, live.snapshot()) for live in self._matches.values() if live.dirty]
+            events = self._pending_events
+            if not dirty and not events:
+                return 0
+            self._pending_events = []
+            for live, _ in dirty:
+                object.__setattr__(live, 'dirty', False)
+
+        try:
+            for live, values in dirty:
+                match = db.session.get(Match, live.id)
+                if match:
+                    for field, value in values.items():
+                        setattr(match, field, value)
+            if events:
+                db.session.execute(db.insert(MatchEvent), events)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Put everything back so the next flush retries it
+            with self._lock:
+                self._pending_events = events + self._pending_events
+                for live, _ in dirty:
+                    object.__setattr__(live, 'dirty', True)
+            raise
+        return len(dirty) + len(events)
+
+    def finish(self, match_id):
+        """Force a flush and stop tracking a match (end, stop or finalize)"""
+        self.flush()
+        with self._lock:
+            self._matches.pop(match_id, None)
+
+    def discard(self, match_id=None):
+        """Drop live state and queued events for a deleted match (or all matches)"""
+        with self._lock:
+            if match_id is None:
+                self._matches.clear()
+                self._pending_events = []
+            else:
+                self._matches.pop(match_id, None)
+                self._pending_events = [e for e in self._pending_events if e['match_id'] != match_id]
+
+    def _ensure_flusher(self):
+        if self._flusher_started or self._app is None:
+            return
+        self._flusher_started = True
+        self._socketio.start_background_task(self._run_flusher)
+
+    def _run_flusher(self):
+        while True:
+            self._socketio.sleep(self.flush_interval)
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception as e:
+                print(f"Live state flush failed, will retry: {e}")
+
+
+live_store = LiveMatchStore()
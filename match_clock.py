@@ -0,0 +1,126 @@
+"""Drift-free match countdown.
+
+Remaining time is computed from a monotonic start time minus the time spent
+paused for field faults, and ticks are scheduled against absolute monotonic
+targets, so the cost of handling a tick never accumulates into the match
+length. TickStats records how late each tick fired.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+
+class MatchClock:
+    """Countdown for one match, in whole-second ticks"""
+
+    def __init__(self, duration, now=time.monotonic):
+        self.duration = duration
+        self._now = now
+        self.started_at = None
+        self.paused_at = None
+        self.paused_total = 0.0
+        self.ticks = 0
+        self.bonus_end_tick = {'red': None, 'blue': None}
+        self._running = threading.Event()
+
+    def now(self):
+        return self._now()
+
+    def start(self):
+        self.started_at = self._now()
+        self._running.set()
+
+    @property
+    def paused(self):
+        return self.paused_at is not None
+
+    def pause(self):
+        if self.started_at is None or self.paused:
+            return
+        self.paused_at = self._now()
+        self._running.clear()
+
+    def resume(self):
+        if not self.paused:
+            return
+        self.paused_total += self._now() - self.paused_at
+        self.paused_at = None
+        self._running.set()
+
+    def wait_resumed(self, timeout=None):
+        return self._running.wait(timeout)
+
+    def elapsed(self):
+        """Seconds of match time that have run, excluding field-fault pauses"""
+        if self.started_at is None:
+            return 0.0
+        now = self.paused_at if self.paused else self._now()
+        return now - self.started_at - self.paused_total
+
+    def remaining(self):
+        """Whole seconds left on the match clock"""
+        return max(0, self.duration - self.ticks)
+
+    def remaining_exact(self):
+        return max(0.0, self.duration - self.elapsed())
+
+    def deadline(self):
+        """Monotonic time the match will end if it is not paused again"""
+        return self.started_at + self.paused_total + self.duration
+
+    def target_for_tick(self, tick):
+        """Monotonic time at which the given tick is due"""
+        return self.started_at + self.paused_total + tick
+
+    def due_tick(self):
+        """The latest tick whose target time has passed"""
+        return min(self.duration, int(math.floor(self.elapsed() + 1e-6)))
+
+    def start_bonus(self, alliance, seconds):
+        self.bonus_end_tick[alliance] = self.ticks + seconds
+
+    def bonus_remaining(self, alliance):
+        end = self.bonus_end_tick.get(alliance)
+        if end is None:
+            return 0
+        return max(0, end - self.ticks)
+
+
+class TickStats:
+    """Lateness of timer ticks relative to their scheduled target"""
+
+    def __init__(self, window=600):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, lateness):
+        self.count += 1
+        self.total += lateness
+        self.last = lateness
+        if lateness > self.max:
+            self.max = lateness
+        self.recent.append(lateness)
+
+    def reset(self):
+        self.__init__(self.recent.maxlen)
+
+    def percentile(self, pct):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def to_dict(self):
+        return {
+            'ticks': self.count,
+            'last_ms': round(self.last * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
@@ -0,0 +1,277 @@
+"""Prometheus metrics at /metrics.
+
+Histograms have fixed buckets and are created once per label value (the
+Socket.IO handler wrappers bind theirs when the app starts), so recording an
+observation is a bisect and three increments: no locks and no allocation.
+Under eventlet a green thread is never switched out in the middle of that;
+with real threads a concurrent increment can very rarely be lost, which is
+acceptable for monitoring.
+
+Recorded here: Socket.IO handler and HTTP route latency, database commit and
+statement durations, emit fan-out (fed by rooms.RoomRouter) and eventlet hub
+load. Other modules add scrape-time values with ``metrics.collector``.
+Rendered in the Prometheus text exposition format.
+"""
+import time
+from bisect import bisect_left
+
+from flask import abort, g, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+FANOUT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+LOOP_LAG_INTERVAL = 0.5
+_COMMIT_STARTED_KEY = 'metrics_commit_started'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def format_labels(**labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _number(value):
+    if value is None:
+        return 'NaN'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram of one label combination"""
+
+    __slots__ = ('bounds', 'labels', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds, labels=''):
+        self.bounds = bounds
+        self.labels = labels
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # bisect_left: an observation equal to a bound belongs to that bucket (le)
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name):
+        prefix = f'{self.labels},' if self.labels else ''
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}'
+        braces = f'{{{self.labels}}}' if self.labels else ''
+        yield f'{name}_sum{braces} {_number(self.sum)}'
+        yield f'{name}_count{braces} {self.count}'
+
+
+class Family:
+    """A metric name with one Histogram (or counter value) per label combination"""
+
+    def __init__(self, name, help, kind='histogram', bounds=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.bounds = bounds
+        self.children = {}
+
+    def histogram(self, key, **labels):
+        """Histogram for key (any hashable), created with these labels on first use"""
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = Histogram(self.bounds, format_labels(**labels))
+        return child
+
+    def lines(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} {self.kind}'
+        for child in list(self.children.values()):
+            yield from child.lines(self.name)
+
+
+def sample_lines(name, help, kind, samples):
+    """Exposition lines for scrape-time values: samples is [(labels dict, value)]"""
+    yield f'# HELP {name} {help}'
+    yield f'# TYPE {name} {kind}'
+    for labels, value in samples:
+        braces = f'{{{format_labels(**labels)}}}' if labels else ''
+        yield f'{name}{braces} {_number(value)}'
+
+
+class Metrics:
+    """Process-wide metrics registry"""
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.time()
+        self.handler_seconds = Family('irish_socketio_handler_duration_seconds', 'Socket.IO event handler run time')
+        self.handler_errors = {}
+        self.http_seconds = Family('irish_http_request_duration_seconds', 'HTTP request handling time by route')
+        self.http_errors = {}
+        self.commit_seconds = Family('irish_db_commit_duration_seconds', 'Session commit time, including the flush')
+        self.statement_seconds = Family('irish_db_statement_duration_seconds', 'SQL statement execution time')
+        self.rollbacks = 0
+        self.emit_fanout = Family('irish_socketio_emit_fanout_clients', 'Clients reached by each server emit',
+                                  bounds=FANOUT_BUCKETS)
+        self.loop_lag = Family('irish_eventlet_loop_lag_seconds', 'How late a periodic green thread wakes up')
+        self._collectors = []
+        self._commit = self.commit_seconds.histogram(None)
+        self._statement = self.statement_seconds.histogram(None)
+
+    def init_app(self, app, socketio, db):
+        self.enabled = bool(app.config.get('METRICS_ENABLED', True))
+        if not self.enabled:
+            return
+        self._wrap_handlers(socketio)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+        if socketio.async_mode == 'eventlet':
+            socketio.start_background_task(self._watch_loop, socketio)
+        app.add_url_rule('/metrics', 'metrics', self.serve)
+
+    def collector(self, function):
+        """Register a function returning exposition lines (see sample_lines) at scrape time"""
+        self._collectors.append(function)
+        return function
+
+    # ----- Socket.IO handlers -----
+
+    def _wrap_handlers(self, socketio):
+        for namespace, handlers in socketio.server.handlers.items():
+            for name, handler in list(handlers.items()):
+                if not getattr(handler, '_metrics_timed', False):
+                    handlers[name] = self._timed(name, handler)
+
+    def _timed(self, name, handler):
+        histogram = self.handler_seconds.histogram(name, event=name)
+        errors = self.handler_errors
+        errors.setdefault(name, 0)
+
+        def timed(*args):
+            started = time.perf_counter()
+            try:
+                return handler(*args)
+            except Exception:
+                errors[name] += 1
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        timed._metrics_timed = True
+        return timed
+
+    def observe_emit(self, name, delivered):
+        if not self.enabled:
+            return
+        histogram = self.emit_fanout.children.get(name)
+        if histogram is None:
+            histogram = self.emit_fanout.histogram(name, event=name)
+        histogram.observe(delivered)
+
+    # ----- HTTP -----
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _teardown_request(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        rule = request.url_rule
+        route = rule.rule if rule is not None else 'unmatched'
+        histogram = self.http_seconds.histogram((route, request.method), route=route, method=request.method)
+        histogram.observe(time.perf_counter() - started)
+        if exc is not None:
+            self.http_errors[route] = self.http_errors.get(route, 0) + 1
+
+    # ----- database -----
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['metrics_started'] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('metrics_started', None)
+        if started is not None:
+            self._statement.observe(time.perf_counter() - started)
+
+    # ----- eventlet -----
+
+    def _watch_loop(self, socketio):
+        lag = self.loop_lag.histogram(None)
+        while True:
+            expected = time.perf_counter() + LOOP_LAG_INTERVAL
+            socketio.sleep(LOOP_LAG_INTERVAL)
+            lag.observe(max(time.perf_counter() - expected, 0.0))
+
+    def _hub_lines(self):
+        try:
+            from eventlet import hubs
+        except ImportError:
+            return
+        hub = hubs.get_hub()
+        yield from sample_lines('irish_eventlet_hub_timers', 'Timers and ready green threads queued in the hub',
+                                'gauge', [({}, len(hub.timers) + len(hub.next_timers))])
+        yield from sample_lines('irish_eventlet_hub_listeners', 'File descriptors the hub is waiting on',
+                                'gauge', [({'mode': 'read'}, len(hub.listeners[hub.READ])),
+                                          ({'mode': 'write'}, len(hub.listeners[hub.WRITE]))])
+
+    # ----- exposition -----
+
+    def render(self):
+        lines = []
+        lines += self.handler_seconds.lines()
+        lines += sample_lines('irish_socketio_handler_errors_total', 'Socket.IO handlers that raised',
+                              'counter', [({'event': name}, count) for name, count in self.handler_errors.items()])
+        lines += self.http_seconds.lines()
+        lines += sample_lines('irish_http_request_errors_total', 'HTTP requests that raised',
+                              'counter', [({'route': route}, count) for route, count in self.http_errors.items()])
+        lines += self.commit_seconds.lines()
+        lines += sample_lines('irish_db_rollbacks_total', 'Session rollbacks', 'counter', [({}, self.rollbacks)])
+        lines += self.statement_seconds.lines()
+        lines += self.emit_fanout.lines()
+        lines += self.loop_lag.lines()
+        lines += self._hub_lines()
+        for collector in self._collectors:
+            lines += collector()
+        lines += sample_lines('irish_process_start_time_seconds', 'Start time of the process since the epoch',
+                              'gauge', [({}, self.started)])
+        return '\n'.join(lines) + '\n'
+
+    def serve(self):
+        if not self.enabled:
+            abort(404)
+        return self.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+
+metrics = Metrics()
+
+
+# ----- commit timing, for every session -----
+
+@event.listens_for(Session, 'before_commit')
+def _before_commit(session):
+    session.info[_COMMIT_STARTED_KEY] = time.perf_counter()
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    started = session.info.pop(_COMMIT_STARTED_KEY, None)
+    if started is not None and metrics.enabled:
+        metrics._commit.observe(time.perf_counter() - started)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop(_COMMIT_STARTED_KEY, None)
+    if metrics.enabled:
+        metrics.rollbacks += 1
@@ -45,18 +45,18 @@ class Match(db.Model):
     # RP tracking
     red_teleop_rp = db.Column(db.Boolean, default=False)  # AND ONE bonus activated
     blue_teleop_rp = db.Column(db.Boolean, default=False)
-    red_climb_rp = db.Column(db.Boolean, default=False)  # Combined bench points >= 20
+    red_climb_rp = db.Column(db.Boolean, default=False)  # Bench points threshold (game_rules.RP_THRESHOLDS)
     blue_climb_rp = db.Column(db.Boolean, default=False)
     red_win_rp = db.Column(db.Boolean, default=False)
     blue_win_rp = db.Column(db.Boolean, default=False)
 
-    # Detailed scoring breakdown
-    red_bucket_normal = db.Column(db.Integer, default=0)  # 6 points each
-    red_bucket_bonus = db.Column(db.Integer, default=0)   # 12 points each
-    red_human_bucket = db.Column(db.Integer, default=0)   # 3 points each
-    red_park = db.Column(db.Integer, default=0)           # 2 points each
-    red_slight_ramp = db.Column(db.Integer, default=0)    # 6 points each
-    red_climb = db.Column(db.Integer, default=0)          # 14 points each
+    # Detailed scoring breakdown: counts per category, point values are in game_rules.SCORING_RULES
+    red_bucket_normal = db.Column(db.Integer, default=0)
+    red_bucket_bonus = db.Column(db.Integer, default=0)
+    red_human_bucket = db.Column(db.Integer, default=0)
+    red_park = db.Column(db.Integer, default=0)
+    red_slight_ramp = db.Column(db.Integer, default=0)
+    red_climb = db.Column(db.Integer, default=0)
 
     blue_bucket_normal = db.Column(db.Integer, default=0)
     blue_bucket_bonus = db.Column(db.Integer, default=0)
@@ -66,8 +66,8 @@ class Match(db.Model):
     blue_climb = db.Column(db.Integer, default=0)
 
     # Penalty tracking
-    red_fouls = db.Column(db.Integer, default=0)          # +2 to opponent each
-    red_tech_fouls = db.Column(db.Integer, default=0)     # +5 to opponent each
+    red_fouls = db.Column(db.Integer, default=0)
+    red_tech_fouls = db.Column(db.Integer, default=0)
     blue_fouls = db.Column(db.Integer, default=0)
     blue_tech_fouls = db.Column(db.Integer, default=0)
 
@@ -87,4 +87,29 @@ class MatchEvent(db.Model):
     details = db.Column(db.String(200))  # Additional details like scoring type
 
     match = db.relationship('Match', backref=db.backref('events', lazy=True))
-    team = db.relationship('Team')
\ No newline at end of file
+    team = db.relationship('Team')
+
+class MatchRankingPoints(db.Model):
+    # RP ledger: ranking points each team was awarded for a match. Team totals in
+    # TeamRanking are maintained from changes to these rows, so recalculating a
+    # match only applies the difference and never double-counts.
+    __table_args__ = (db.UniqueConstraint('match_id', 'team_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    ranking_points = db.Column(db.Integer, default=0)
+
+class MatchSnapshot(db.Model):
+    # Scoring columns of a match as replayed from its MatchEvents up to
+    # last_event_id, so rebuilding the match only replays the events after it.
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False, unique=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    state = db.Column(db.Text, nullable=False)  # JSON of the projected columns
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+class AppState(db.Model):
+    # Small values that have to survive a restart, by key (e.g. the current match pointer)
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Text, nullable=True)
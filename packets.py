@@ -0,0 +1,198 @@
+"""Broadcast packets encoded once and reused for every recipient.
+
+RoomRouter.emit hands each broadcast to ``packets``: the payload is encoded
+once into a Socket.IO event packet (with python-socketio's own Packet class) and
+that same packet is sent to every socket in the target rooms. Payload() wraps a
+dict sent under several events (score_updated plus event_deleted, say), so its
+MessagePack attachment is encoded only once.
+
+Sending a prebuilt packet goes through ``Server._send_eio_packet``, which is not
+public API (Flask-SocketIO's test client patches the same method). That is why
+python-socketio is pinned in requirements.txt; tests/test_packets.py fails if
+an upgrade changes the method or the wire format.
+
+With IRISH_BINARY_PACKETS=1 (needs the optional ``msgpack`` package) clients
+that connect with ``auth: {packets: 'msgpack'}`` get the payload as one
+MessagePack binary attachment instead (decoded by static/js/packets.js), but
+only for packets where that is actually smaller than the JSON text.
+
+Bytes sent are counted per match, next to what plain JSON would have cost.
+With a Socket.IO message queue the emit has to go through the queue to reach
+the other workers, so packets fall back to socketio.emit (JSON only).
+"""
+import threading
+from collections import defaultdict
+
+from engineio import packet as eio_packet
+from socketio import packet as sio_packet
+from socketio.pubsub_manager import PubSubManager
+
+NAMESPACE = '/'
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+
+class Payload:
+    """An event payload sent under several event names, MessagePack-encoded only once"""
+    __slots__ = ('data', '_msgpack')
+
+    def __init__(self, data):
+        self.data = data
+        self._msgpack = None
+
+    def msgpack(self, msgpack):
+        if self._msgpack is None:
+            self._msgpack = msgpack.packb(self.data, default=str)
+        return self._msgpack
+
+
+class Packet:
+    """One event ready to send: Engine.IO packets per wire format and their sizes"""
+    __slots__ = ('event', 'frames', 'sizes')
+
+    def __init__(self, event, frames):
+        self.event = event
+        self.frames = frames
+        self.sizes = {fmt: sum(_size(frame) for frame in packets) for fmt, packets in frames.items()}
+
+
+def _size(frame):
+    data = frame.encode()
+    # Text frames are UTF-8 on the wire
+    return len(data) if isinstance(data, bytes) else len(data.encode('utf-8'))
+
+
+class WireStats:
+    """Bytes sent per match (key None: broadcasts not about a match), against all-JSON"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.matches = defaultdict(lambda: {'packets': 0, 'bytes': 0, 'json_bytes': 0, 'msgpack_packets': 0})
+
+    def add(self, match_id, packets, sent_bytes, json_bytes, msgpack_packets):
+        with self._lock:
+            stats = self.matches[match_id]
+            stats['packets'] += packets
+            stats['bytes'] += sent_bytes
+            stats['json_bytes'] += json_bytes
+            stats['msgpack_packets'] += msgpack_packets
+
+    def reset(self):
+        with self._lock:
+            self.matches.clear()
+
+    def to_dict(self):
+        with self._lock:
+            matches = {str(match_id) if match_id is not None else 'none': dict(stats)
+                       for match_id, stats in self.matches.items()}
+        return {
+            'bytes': sum(stats['bytes'] for stats in matches.values()),
+            'json_bytes': sum(stats['json_bytes'] for stats in matches.values()),
+            'matches': matches,
+        }
+
+
+class PacketEncoder:
+    """Encodes broadcasts once and sends the same packet to every recipient"""
+
+    def __init__(self):
+        self.socketio = None
+        self.binary = False
+        self.stats = WireStats()
+        self.formats = {}  # sid -> MSGPACK for clients that asked for it
+        self._msgpack = None
+
+    def init_app(self, app, socketio):
+        self.socketio = socketio
+        self.binary = bool(app.config.get('BINARY_PACKETS', False))
+        if self.binary:
+            try:
+                import msgpack
+            except ImportError:
+                raise RuntimeError('Binary packets need the msgpack package: pip install msgpack')
+            self._msgpack = msgpack
+        app.add_template_global(self.binary_packets_enabled)
+
+    def binary_packets_enabled(self):
+        return self.binary
+
+    def connect(self, sid, requested=None):
+        """Remember a client's wire format; call from the connect handler"""
+        if self.binary and requested == MSGPACK:
+            self.formats[sid] = MSGPACK
+        return self.formats.get(sid, JSON)
+
+    def disconnect(self, sid):
+        self.formats.pop(sid, None)
+
+    @property
+    def direct(self):
+        """Whether packets can be sent to sockets here rather than through a message queue"""
+        return not isinstance(self.socketio.server.manager, PubSubManager)
+
+    def _frames(self, args, binary):
+        """Engine.IO message packets of one Socket.IO event (binary: attachments split off)"""
+        event = self.socketio.server.packet_class(sio_packet.EVENT, data=args, namespace=NAMESPACE, binary=binary)
+        encoded = event.encode()
+        return [eio_packet.Packet(eio_packet.MESSAGE, frame) for frame in (encoded if binary else [encoded])]
+
+    def encode(self, event, data=None, seq=None):
+        """Packet for an event; data may be a dict/list or a Payload, seq goes after it"""
+        payload = data if isinstance(data, Payload) or data is None else Payload(data)
+        args = [event]
+        if payload is not None or seq is not None:
+            args.append(payload.data if payload is not None else None)
+        if seq is not None:
+            args.append(seq)
+        frames = {JSON: self._frames(args, binary=False)}
+        if self.binary and payload is not None:
+            # The payload becomes one attachment; the text part keeps a placeholder for it
+            args[1] = payload.msgpack(self._msgpack)
+            candidate = self._frames(args, binary=True)
+            if sum(_size(frame) for frame in candidate) < _size(frames[JSON][0]):
+                frames[MSGPACK] = candidate
+        return Packet(event, frames)
+
+    def send(self, packet, rooms, match_id=None):
+        """Send a packet to every socket in the rooms (each socket once); a sid is a room too"""
+        server = self.socketio.server
+        frames, sizes = packet.frames, packet.sizes
+        sent = sent_bytes = msgpack_sent = 0
+        for sid, eio_sid in server.manager.get_participants(NAMESPACE, rooms):
+            fmt = self.formats.get(sid, JSON) if MSGPACK in frames else JSON
+            for frame in frames[fmt]:
+                # The one private python-socketio call (tests/test_packets.py guards it)
+                server._send_eio_packet(eio_sid, frame)
+            sent += 1
+            sent_bytes += sizes[fmt]
+            msgpack_sent += fmt == MSGPACK
+        self.stats.add(match_id, sent, sent_bytes, sent * sizes[JSON], msgpack_sent)
+
+    def emit(self, event, data, rooms, match_id=None, seq=None):
+        """Encode once and send to the rooms, or go through the message queue.
+
+        Returns the packet, or None when it went through the queue.
+        """
+        if self.direct:
+            packet = self.encode(event, data, seq)
+            self.send(packet, rooms, match_id)
+            return packet
+        if isinstance(data, Payload):
+            data = data.data
+        if seq is not None:
+            self.socketio.emit(event, (data, seq), to=rooms)
+        elif data is None:
+            self.socketio.emit(event, to=rooms)
+        else:
+            self.socketio.emit(event, data, to=rooms)
+        return None
+
+    def to_dict(self):
+        stats = self.stats.to_dict()
+        stats['binary_packets'] = self.binary
+        stats['msgpack_clients'] = len(self.formats)
+        stats['direct'] = self.direct if self.socketio else None
+        return stats
+
+
+packets = PacketEncoder()
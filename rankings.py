@@ -0,0 +1,253 @@
+"""Incremental team ranking index.
+
+Teams are kept in a list sorted by a composite key (total RP, then the
+tiebreakers below), so a change to one team only moves that team and
+shifts the ranks between its old and new position. Only TeamRanking rows
+whose rank or rank-change arrow actually changes are written back.
+With several workers the index reloads once another worker has moved the
+shared rankings version.
+
+Sort order (best first):
+    1. total ranking points
+    2. average RP per match played
+    3. average alliance match score
+    4. average BENCH (park / slight ramp / climb) points
+    5. average teleop bucket points
+    6. team number (lowest first, stands in for the FRC random draw)
+"""
+from bisect import bisect_left, insort
+
+from db import db
+from models import Team, TeamRanking, Match
+from game_rules import game_rules, ALLIANCES
+from data_versions import rankings_version
+
+RANKED_STATUSES = ('completed', 'finalized')
+
+
+class TeamEntry:
+    __slots__ = ('team_id', 'row_id', 'team_number', 'ranking_points',
+                 'matches', 'key', 'current_rank', 'previous_rank')
+
+    def __init__(self, team_id, row_id, team_number, ranking_points=0, current_rank=None, previous_rank=None):
+        self.team_id = team_id
+        self.row_id = row_id
+        self.team_number = team_number
+        self.ranking_points = ranking_points or 0
+        self.matches = {}  # match_id -> (alliance score, bench points, teleop points)
+        self.key = None
+        self.current_rank = current_rank
+        self.previous_rank = previous_rank
+
+    def averages(self):
+        played = len(self.matches)
+        if not played:
+            return 0.0, 0.0, 0.0, 0.0
+        score = bench = teleop = 0
+        for s, b, t in self.matches.values():
+            score += s
+            bench += b
+            teleop += t
+        return self.ranking_points / played, score / played, bench / played, teleop / played
+
+    def sort_key(self):
+        avg_rp, avg_score, avg_bench, avg_teleop = self.averages()
+        return (-self.ranking_points, -avg_rp, -avg_score, -avg_bench, -avg_teleop,
+                self.team_number, self.team_id)
+
+    def to_dict(self):
+        avg_rp, avg_score, avg_bench, avg_teleop = self.averages()
+        return {
+            'matches_played': len(self.matches),
+            'average_rp': round(avg_rp, 3),
+            'average_score': round(avg_score, 3),
+            'average_bench_points': round(avg_bench, 3),
+            'average_teleop_points': round(avg_teleop, 3),
+        }
+
+
+def match_contributions(match):
+    """Per-alliance (score, bench points, teleop points) for tiebreakers"""
+    result = {}
+    for alliance in ALLIANCES:
+        bench = game_rules.group_points(match, alliance, 'bench')
+        teleop = game_rules.group_points(match, alliance, 'teleop')
+        result[alliance] = (getattr(match, f'{alliance}_score') or 0, bench, teleop)
+    return result
+
+
+class RankingIndex:
+    """Ordered ranking of all teams, updated incrementally"""
+
+    def __init__(self):
+        self.loaded = False
+        self._keys = []
+        self._entries = {}
+        self._dirty = set()
+        # (lo, hi) position ranges whose occupants may have shifted since the last reposition()
+        self._pending = []
+        # Teams whose previous_rank != current_rank, i.e. currently showing an arrow
+        self._showing_change = set()
+
+    # ----- building -----
+
+    def invalidate(self):
+        """Drop everything; the next ensure_loaded() rebuilds from the database"""
+        self.__init__()
+
+    def ensure_loaded(self):
+        """Load the index, or reload it after another worker changed the rankings"""
+        if not self.loaded or rankings_version.stale():
+            self.load()
+
+    def load(self):
+        """Build the index from TeamRanking rows and completed matches (two queries)"""
+        self.invalidate()
+        rankings_version.sync()
+        rows = db.session.query(
+            TeamRanking.id, TeamRanking.team_id, Team.number, TeamRanking.ranking_points,
+            TeamRanking.current_rank, TeamRanking.previous_rank
+        ).join(Team, Team.id == TeamRanking.team_id).all()
+        for row_id, team_id, number, points, current, previous in rows:
+            self._entries[team_id] = TeamEntry(team_id, row_id, number, points, current, previous)
+
+        for match in Match.query.filter(Match.status.in_(RANKED_STATUSES)).all():
+            self._add_match(match)
+
+        for entry in self._entries.values():
+            entry.key = entry.sort_key()
+            if entry.previous_rank != entry.current_rank:
+                self._showing_change.add(entry.team_id)
+        self._keys = sorted(entry.key for entry in self._entries.values())
+        # Ranks stored in the database may be stale (e.g. after a reset), recheck them all
+        self._dirty.clear()
+        if self._keys:
+            self._touch(0, len(self._keys) - 1)
+        self.loaded = True
+
+    # ----- inputs -----
+
+    def set_points(self, team_id, row_id, team_number, ranking_points):
+        entry = self._entries.get(team_id)
+        if entry is None:
+            entry = self._entries[team_id] = TeamEntry(team_id, row_id, team_number)
+        entry.row_id = row_id
+        entry.ranking_points = ranking_points or 0
+        self._dirty.add(team_id)
+
+    def record_match(self, match):
+        """Add or replace a completed match's tiebreaker contributions"""
+        self._add_match(match)
+
+    def forget_match(self, match_id):
+        for entry in self._entries.values():
+            if entry.matches.pop(match_id, None) is not None:
+                self._dirty.add(entry.team_id)
+
+    def remove_team(self, team_id):
+        entry = self._entries.pop(team_id, None)
+        if entry is None:
+            return
+        if entry.key is not None:
+            pos = bisect_left(self._keys, entry.key)
+            del self._keys[pos]
+            # Everyone below moves up one
+            if self._keys:
+                self._touch(pos, len(self._keys) - 1)
+        self._showing_change.discard(team_id)
+        self._dirty.discard(team_id)
+
+    def _add_match(self, match):
+        contributions = match_contributions(match)
+        for slot in ('red_team1_id', 'red_team2_id', 'blue_team1_id', 'blue_team2_id'):
+            entry = self._entries.get(getattr(match, slot))
+            if entry is not None:
+                entry.matches[match.id] = contributions[slot.split('_')[0]]
+                self._dirty.add(entry.team_id)
+
+    # ----- repositioning -----
+
+    def _touch(self, lo, hi):
+        self._pending.append((lo, hi))
+
+    def _pending_positions(self):
+        """Positions in the union of the touched ranges, each once"""
+        last = len(self._keys) - 1
+        end = -1
+        for lo, hi in sorted(self._pending):
+            lo, hi = max(lo, end + 1), min(hi, last)
+            if lo <= hi:
+                yield from range(lo, hi + 1)
+                end = hi
+        self._pending = []
+
+    def reposition(self):
+        """Move dirty teams to their new position.
+
+        Returns a list of (entry, previous_rank, current_rank) for every team whose
+        stored rank state must be rewritten: teams whose rank moved, plus teams whose
+        rank-change arrow from the previous update has to be cleared.
+        """
+        keys = self._keys
+        for team_id in self._dirty:
+            entry = self._entries.get(team_id)
+            if entry is None:
+                continue
+            new_key = entry.sort_key()
+            if new_key == entry.key:
+                continue
+            if entry.key is None:
+                # A new team: everyone from its position down moves down one
+                insort(keys, new_key)
+                self._touch(bisect_left(keys, new_key), len(keys) - 1)
+            else:
+                # Only the teams between the old and the new position shift
+                old_pos = bisect_left(keys, entry.key)
+                del keys[old_pos]
+                insort(keys, new_key)
+                new_pos = bisect_left(keys, new_key)
+                self._touch(min(old_pos, new_pos), max(old_pos, new_pos))
+            entry.key = new_key
+        self._dirty.clear()
+
+        entries = self._entries
+        changes = []
+        moved = set()
+        for pos in self._pending_positions():
+            entry = entries[keys[pos][-1]]
+            if entry.current_rank != pos + 1:
+                changes.append((entry, entry.current_rank, pos + 1))
+                moved.add(entry.team_id)
+        # Arrows from the previous update that did not move again now show no change
+        for team_id in self._showing_change - moved:
+            entry = entries.get(team_id)
+            if entry is not None:
+                changes.append((entry, entry.current_rank, entry.current_rank))
+        for entry, previous, current in changes:
+            entry.previous_rank, entry.current_rank = previous, current
+        self._showing_change = moved
+        return changes
+
+    # ----- reading -----
+
+    def __len__(self):
+        return len(self._keys)
+
+    def ordered(self):
+        """Entries in rank order"""
+        return [self._entries[key[-1]] for key in self._keys]
+
+    def get(self, team_id):
+        return self._entries.get(team_id)
+
+
+def write_rank_changes(changes):
+    """Write previous/current rank for the changed rows with one bulk UPDATE"""
+    rows = [{'id': entry.row_id, 'previous_rank': previous, 'current_rank': current}
+            for entry, previous, current in changes if entry.row_id is not None]
+    if rows:
+        db.session.execute(db.update(TeamRanking), rows)
+    return len(rows)
+
+
+ranking_index = RankingIndex()
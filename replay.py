@@ -0,0 +1,121 @@
+"""Sequence-numbered broadcasts and a replay buffer for reconnecting clients.
+
+RoomRouter.emit stamps every broadcast with the next sequence number (sent as
+an extra event argument after the payload) and keeps the encoded packet and
+its rooms in a bounded ring buffer (IRISH_REPLAY_BUFFER, default 500).
+
+A client that reconnects sends the epoch and the last sequence number it saw
+(static/js/resync.js does this). If the buffer still holds everything after
+that, the missed broadcasts for the client's rooms are sent again, packet for
+packet. Otherwise, or after a server restart (new epoch), the app sends one
+``resync`` snapshot instead: the events that rebuild the client's current
+state (display screen, live score, rankings).
+
+With several workers each one only sees its own broadcasts, so reconnecting
+clients always get the snapshot.
+"""
+import itertools
+import threading
+import uuid
+from collections import deque
+
+# Full-state events: only the latest one per match is replayed
+LATEST_ONLY = {'score_updated', 'scores_updated', 'rankings_updated'}
+# Not replayed: the current timer_state is sent on every connect
+NOT_REPLAYED = {'timer_state'}
+
+
+class Broadcast:
+    __slots__ = ('seq', 'event', 'data', 'packet', 'rooms', 'match_id')
+
+    def __init__(self, seq, event, data, packet, rooms, match_id):
+        self.seq = seq
+        self.event = event
+        self.data = data
+        self.packet = packet
+        self.rooms = frozenset(rooms)
+        self.match_id = match_id
+
+
+class ReplayBuffer:
+    """The most recent broadcasts by sequence number"""
+
+    def __init__(self, capacity=500):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.capacity = capacity
+        self.enabled = True
+        self.replays = 0
+        self.replayed = 0
+        self.snapshots = 0
+        self._counter = itertools.count(1)
+        self._buffer = deque(maxlen=capacity)
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, clustered=False):
+        self.capacity = int(app.config.get('REPLAY_BUFFER_SIZE', 500))
+        self._buffer = deque(maxlen=self.capacity)
+        # Other workers' broadcasts never pass through this buffer
+        self.enabled = not clustered
+
+    @property
+    def last_seq(self):
+        return self._last
+
+    def next_seq(self):
+        with self._lock:
+            self._last = next(self._counter)
+            return self._last
+
+    def record(self, seq, event, data, packet, rooms, match_id=None):
+        with self._lock:
+            self._buffer.append(Broadcast(seq, event, data, packet, rooms, match_id))
+
+    def missed(self, epoch, last_seq, rooms):
+        """Broadcasts after last_seq for any of the rooms, or None when they can't all be replayed"""
+        if not self.enabled or epoch != self.epoch or not isinstance(last_seq, int) or last_seq > self._last:
+            return None
+        with self._lock:
+            buffered = list(self._buffer)
+        if last_seq < self._last and (not buffered or buffered[0].seq > last_seq + 1):
+            # Fell out of the buffer
+            return None
+        rooms = set(rooms)
+        missed, latest = [], {}
+        for broadcast in buffered:
+            if broadcast.seq <= last_seq or broadcast.event in NOT_REPLAYED or not rooms & broadcast.rooms:
+                continue
+            if broadcast.event in LATEST_ONLY:
+                key = (broadcast.event, broadcast.match_id)
+                if key in latest:
+                    missed[latest[key]] = None
+                latest[key] = len(missed)
+            missed.append(broadcast)
+        return [broadcast for broadcast in missed if broadcast is not None]
+
+    def count(self, replayed=None):
+        """Record one reconnect: a replay of that many broadcasts, or a snapshot"""
+        if replayed is None:
+            self.snapshots += 1
+        else:
+            self.replays += 1
+            self.replayed += replayed
+
+    def to_dict(self):
+        with self._lock:
+            buffered = len(self._buffer)
+            oldest = self._buffer[0].seq if self._buffer else None
+        return {
+            'enabled': self.enabled,
+            'epoch': self.epoch,
+            'capacity': self.capacity,
+            'buffered': buffered,
+            'oldest_seq': oldest,
+            'last_seq': self._last,
+            'replays': self.replays,
+            'replayed_broadcasts': self.replayed,
+            'snapshots': self.snapshots,
+        }
+
+
+replay = ReplayBuffer()
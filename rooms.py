@@ -0,0 +1,186 @@
+"""Role-scoped Socket.IO rooms.
+
+Clients say who they are when connecting (``io({auth: {role: 'display'}})``,
+optionally with a ``match_id``) and join the matching rooms. Server
+broadcasts go through RoomRouter.emit, which sends each event only to the
+rooms that consume it and keeps fan-out counters so the savings over
+broadcasting to every socket can be measured. Packets are encoded once per
+broadcast by packets.py and stamped with a sequence number for replay.py.
+"""
+import threading
+from collections import defaultdict
+
+from flask_socketio import join_room
+
+from cluster import match_state
+from metrics import metrics
+from packets import Payload, packets
+from replay import replay
+
+DISPLAY = 'display'
+REFEREE_RED = 'referee-red'
+REFEREE_BLUE = 'referee-blue'
+FTA = 'fta'
+RANKINGS = 'rankings'
+ADMIN = 'admin'
+
+ALL_ROOMS = (DISPLAY, REFEREE_RED, REFEREE_BLUE, FTA, RANKINGS, ADMIN)
+REFEREES = (REFEREE_RED, REFEREE_BLUE)
+
+# Role sent by the client -> rooms it joins. Clients that send no (or an unknown)
+# role join every room so older pages keep receiving everything.
+ROLE_ROOMS = {
+    'display': (DISPLAY,),
+    'referee': REFEREES,
+    'referee-red': (REFEREE_RED,),
+    'referee-blue': (REFEREE_BLUE,),
+    'fta': (FTA,),
+    'rankings': (RANKINGS,),
+    'admin': (ADMIN,),
+}
+
+# Event name -> rooms that consume it
+EVENT_ROOMS = {
+    'timer_state': (DISPLAY, FTA) + REFEREES,
+    'endgame_started': REFEREES,
+    'clear_endgame': (DISPLAY,),
+    'bonus_activated': REFEREES,
+    'bonus_ended': REFEREES,
+    'score_updated': (DISPLAY,) + REFEREES,
+    'event_deleted': REFEREES,
+    'scores_updated': REFEREES,
+    'match_started': (FTA,) + REFEREES,
+    'match_ended': (FTA,) + REFEREES,
+    'match_stopped': (DISPLAY,),
+    'match_finalized': (FTA, ADMIN),
+    'field_fault_started': (DISPLAY,),
+    'field_fault_ended': (DISPLAY,),
+    'show_ready_for_match': (DISPLAY,),
+    'show_prematch': (DISPLAY,),
+    'show_live': (DISPLAY,),
+    'show_postmatch': (DISPLAY,),
+    'show_review': (DISPLAY,) + REFEREES,
+    'hide_review': (DISPLAY,) + REFEREES,
+    'review_complete': (FTA,),
+    'rankings_updated': (DISPLAY, RANKINGS, ADMIN),
+}
+
+# Events that set what the displays show -> shared state key holding the latest one
+SCREEN_EVENTS = {
+    'show_ready_for_match': 'display_screen',
+    'show_prematch': 'display_screen',
+    'show_live': 'display_screen',
+    'show_postmatch': 'display_screen',
+    'show_review': 'display_review',
+    'hide_review': 'display_review',
+}
+
+
+def match_room(match_id):
+    return f'match-{match_id}'
+
+
+class FanoutStats:
+    """Deliveries per room and per event, compared to broadcasting to everyone"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.room_deliveries = defaultdict(int)
+        self.events = defaultdict(lambda: {'emits': 0, 'delivered': 0, 'broadcast_equivalent': 0})
+
+    def record(self, event, delivered, connected, per_room):
+        with self._lock:
+            stats = self.events[event]
+            stats['emits'] += 1
+            stats['delivered'] += delivered
+            stats['broadcast_equivalent'] += connected
+            for room, count in per_room.items():
+                self.room_deliveries[room] += count
+
+    def to_dict(self):
+        with self._lock:
+            events = {name: dict(stats) for name, stats in self.events.items()}
+            rooms = dict(self.room_deliveries)
+        delivered = sum(s['delivered'] for s in events.values())
+        broadcast = sum(s['broadcast_equivalent'] for s in events.values())
+        return {
+            'delivered': delivered,
+            'broadcast_equivalent': broadcast,
+            'saved': broadcast - delivered,
+            'rooms': rooms,
+            'events': events,
+        }
+
+
+class RoomRouter:
+    """Sends server events to the rooms that consume them"""
+
+    def __init__(self):
+        self.socketio = None
+        self.stats = FanoutStats()
+        self.roles = {}  # sid -> role
+        self._lock = threading.Lock()
+
+    def init_app(self, socketio):
+        self.socketio = socketio
+
+    def join(self, sid, role=None, match_id=None):
+        """Join the rooms for a client's role (and match); call from the connect handler"""
+        rooms = ROLE_ROOMS.get(role, ALL_ROOMS)
+        for room in rooms:
+            join_room(room)
+        if match_id:
+            join_room(match_room(match_id))
+        with self._lock:
+            self.roles[sid] = role if role in ROLE_ROOMS else 'unknown'
+        return rooms
+
+    def leave(self, sid):
+        with self._lock:
+            self.roles.pop(sid, None)
+
+    def clients_by_role(self):
+        with self._lock:
+            counts = defaultdict(int)
+            for role in self.roles.values():
+                counts[role] += 1
+        return dict(counts)
+
+    def emit(self, event, data=None, match_id=None):
+        """Emit an event to its consumer rooms, plus the room of the match it is about.
+
+        data may be a packets.Payload to share its encoding between several events.
+        """
+        rooms = list(EVENT_ROOMS.get(event, ALL_ROOMS))
+        payload = data.data if isinstance(data, Payload) else data
+        if match_id is None and isinstance(payload, dict):
+            match_id = payload.get('match_id')
+        if match_id:
+            rooms.append(match_room(match_id))
+        self._record(event, rooms)
+        if event in SCREEN_EVENTS:
+            # What the displays show, for the resync snapshot of a reconnecting display
+            setattr(match_state, SCREEN_EVENTS[event], [event, payload])
+        # Encoded once, the same packet goes to every socket in the rooms
+        seq = replay.next_seq()
+        packet = packets.emit(event, data, rooms, match_id, seq)
+        replay.record(seq, event, payload, packet, rooms, match_id)
+
+    def replay(self, sid, broadcasts):
+        """Send missed broadcasts again, with their original sequence numbers, to one client"""
+        for broadcast in broadcasts:
+            if broadcast.packet is not None:
+                packets.send(broadcast.packet, sid, broadcast.match_id)
+            else:
+                self.socketio.emit(broadcast.event, (broadcast.data, broadcast.seq), to=sid)
+
+    def _record(self, event, rooms):
+        manager = self.socketio.server.manager
+        per_room = {room: sum(1 for _ in manager.get_participants('/', room)) for room in rooms}
+        delivered = sum(1 for _ in manager.get_participants('/', rooms))
+        connected = sum(1 for _ in manager.get_participants('/', None))
+        self.stats.record(event, delivered, connected, per_room)
+        metrics.observe_emit(event, delivered)
+
+
+router = RoomRouter()
@@ -0,0 +1,217 @@
+"""Bulk import of team lists and match schedules.
+
+Accepts JSON ({"teams": [...], "matches": [...]}) or CSV, either a team list
+(number,name) or a schedule (match_number,match_type,red_team1,red_team2,
+blue_team1,blue_team2). Every team number is resolved with one query, and
+missing teams and all new matches are written with bulk inserts in a single
+transaction. Nothing is written if any row fails validation; the report
+lists the problems either way.
+"""
+import csv
+import io
+import time
+
+from db import db
+from models import Team, Match
+
+TEAM_SLOTS = ('red_team1', 'red_team2', 'blue_team1', 'blue_team2')
+DEFAULT_MATCH_TYPE = 'Qualification'
+
+
+class ScheduleImportError(ValueError):
+    """The upload could not be read at all"""
+
+
+class ImportReport:
+    """Validation problems and what the import did (or would do)"""
+
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+        self.teams_created = 0
+        self.teams_renamed = 0
+        self.matches_created = 0
+        self.matches_skipped = 0
+        self.dry_run = False
+        self.duration_ms = 0.0
+
+    def error(self, section, row, message):
+        self.errors.append({'section': section, 'row': row, 'message': message})
+
+    def warning(self, section, row, message):
+        self.warnings.append({'section': section, 'row': row, 'message': message})
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {
+            'success': self.ok,
+            'dry_run': self.dry_run,
+            'teams_created': self.teams_created,
+            'teams_renamed': self.teams_renamed,
+            'matches_created': self.matches_created,
+            'matches_skipped': self.matches_skipped,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'duration_ms': self.duration_ms,
+        }
+
+
+def parse_csv(text):
+    """Read a CSV team list or schedule; returns (teams, matches)"""
+    reader = csv.DictReader(io.StringIO(text.lstrip('﻿')))
+    fields = {name.strip().lower() for name in reader.fieldnames or ()}
+    rows = [{(key or '').strip().lower(): (value or '').strip() for key, value in row.items()} for row in reader]
+    if 'red_team1' in fields:
+        return [], rows
+    if 'number' in fields:
+        return rows, []
+    raise ScheduleImportError('CSV needs a header row with either number,name or match_number,red_team1,...')
+
+
+def parse_json(data):
+    """Read {"teams": [...], "matches": [...]} (or a bare list of matches)"""
+    if isinstance(data, list):
+        return [], data
+    if not isinstance(data, dict):
+        raise ScheduleImportError('JSON body must be an object with "teams" and/or "matches"')
+    sections = []
+    for section in ('teams', 'matches'):
+        rows = data.get(section) or []
+        if not isinstance(rows, list):
+            raise ScheduleImportError(f'"{section}" must be a list of objects')
+        sections.append(rows)
+    return tuple(sections)
+
+
+def _team_number(value):
+    """int team number, None for an empty slot; raises ValueError if invalid"""
+    if value is None or str(value).strip() == '':
+        return None
+    number = int(str(value).strip())
+    if number <= 0:
+        raise ValueError(value)
+    return number
+
+
+def import_schedule(teams, matches, dry_run=False):
+    """Validate and import teams and matches in one transaction. Returns an ImportReport."""
+    started = time.perf_counter()
+    report = ImportReport()
+    report.dry_run = dry_run
+
+    # ----- validate the team list -----
+    names = {}
+    for i, row in enumerate(teams, start=1):
+        if not isinstance(row, dict):
+            report.error('teams', i, f'Expected an object, got {row!r}')
+            continue
+        try:
+            number = _team_number(row.get('number'))
+        except (TypeError, ValueError):
+            report.error('teams', i, f"Invalid team number {row.get('number')!r}")
+            continue
+        if number is None:
+            report.error('teams', i, 'Team number is required')
+            continue
+        if number in names:
+            report.error('teams', i, f'Team {number} is listed twice')
+            continue
+        names[number] = (str(row.get('name') or '').strip() or f'Team {number}')[:100]
+
+    # ----- validate the schedule -----
+    parsed = []
+    seen = {}
+    for i, row in enumerate(matches, start=1):
+        if not isinstance(row, dict):
+            report.error('matches', i, f'Expected an object, got {row!r}')
+            continue
+        try:
+            match_number = int(str(row.get('match_number', '')).strip())
+        except (TypeError, ValueError):
+            report.error('matches', i, f"Invalid match number {row.get('match_number')!r}")
+            continue
+        match_type = (str(row.get('match_type') or '').strip() or DEFAULT_MATCH_TYPE)[:20]
+        slots = {}
+        valid = True
+        for slot in TEAM_SLOTS:
+            try:
+                slots[slot] = _team_number(row.get(slot))
+            except (TypeError, ValueError):
+                report.error('matches', i, f'Invalid {slot} {row.get(slot)!r}')
+                valid = False
+        if not valid:
+            continue
+        assigned = [number for number in slots.values() if number is not None]
+        if len(assigned) != len(set(assigned)):
+            report.error('matches', i, f'Match {match_number} lists the same team twice')
+            continue
+        key = (match_type, match_number)
+        if key in seen:
+            report.error('matches', i, f'{match_type} match {match_number} is also on row {seen[key]}')
+            continue
+        seen[key] = i
+        if len(assigned) < len(TEAM_SLOTS):
+            report.warning('matches', i, f'Match {match_number} has empty alliance slots')
+        parsed.append((i, match_type, match_number, slots))
+
+    # ----- resolve every team number with one query -----
+    numbers = set(names)
+    for _, _, _, slots in parsed:
+        numbers.update(number for number in slots.values() if number is not None)
+    existing = {}
+    if numbers:
+        existing = {number: (team_id, name) for team_id, number, name in
+                    db.session.query(Team.id, Team.number, Team.name).filter(Team.number.in_(numbers))}
+    missing = sorted(numbers - set(existing))
+    renamed = [{'id': existing[number][0], 'name': name} for number, name in names.items()
+               if number in existing and existing[number][1] != name]
+    for number in missing:
+        if number not in names:
+            report.warning('teams', None, f'Team {number} is not in the team list and will be created')
+
+    # ----- skip matches that are already scheduled -----
+    existing_matches = set()
+    if parsed:
+        existing_matches = set(db.session.query(Match.match_type, Match.match_number).filter(
+            Match.match_number.in_({match_number for _, _, match_number, _ in parsed})))
+    new_matches = []
+    for i, match_type, match_number, slots in parsed:
+        if (match_type, match_number) in existing_matches:
+            report.warning('matches', i, f'{match_type} match {match_number} already exists, skipped')
+            report.matches_skipped += 1
+        else:
+            new_matches.append((match_type, match_number, slots))
+
+    report.teams_created = len(missing)
+    report.teams_renamed = len(renamed)
+    report.matches_created = len(new_matches)
+    if not report.ok or dry_run:
+        report.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        return report
+
+    # ----- write everything in one transaction -----
+    try:
+        ids = {number: team_id for number, (team_id, _) in existing.items()}
+        if missing:
+            created = db.session.execute(
+                db.insert(Team).returning(Team.id, Team.number, sort_by_parameter_order=True),
+                [{'number': number, 'name': names.get(number, f'Team {number}')} for number in missing])
+            ids.update({number: team_id for team_id, number in created})
+        if renamed:
+            db.session.execute(db.update(Team), renamed)
+        if new_matches:
+            db.session.execute(db.insert(Match), [dict(
+                match_number=match_number,
+                match_type=match_type,
+                status='scheduled',
+                **{f'{slot}_id': ids.get(number) for slot, number in slots.items()}
+            ) for match_type, match_number, slots in new_matches])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    report.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+    return report
@@ -0,0 +1,106 @@
+"""Coalesces bursts of referee score events.
+
+Events arriving within a short window are handed to the apply callback as
+one batch, so they share one transaction, one bulk MatchEvent insert and one
+score_updated broadcast per match. BatchStats keeps batch sizes and latency
+so the window can be tuned.
+"""
+import threading
+import time
+from collections import deque
+
+
+class BatchStats:
+    """Sizes and latencies of recently applied batches"""
+
+    def __init__(self, window=500):
+        self.batches = 0
+        self.events = 0
+        self.max_size = 0
+        self.recent = deque(maxlen=window)  # (size, wait seconds, apply seconds)
+
+    def record(self, size, wait, apply):
+        self.batches += 1
+        self.events += size
+        self.max_size = max(self.max_size, size)
+        self.recent.append((size, wait, apply))
+
+    def to_dict(self):
+        recent = list(self.recent)
+        sizes = [r[0] for r in recent]
+        waits = sorted(r[1] for r in recent)
+        applies = sorted(r[2] for r in recent)
+
+        def pct(values, p):
+            if not values:
+                return 0.0
+            return round(values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000, 3)
+
+        return {
+            'batches': self.batches,
+            'events': self.events,
+            'max_batch_size': self.max_size,
+            'mean_batch_size': round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            'batch_size_histogram': {str(size): sizes.count(size) for size in sorted(set(sizes))},
+            'wait_p50_ms': pct(waits, 50),
+            'wait_p99_ms': pct(waits, 99),
+            'apply_p50_ms': pct(applies, 50),
+            'apply_p99_ms': pct(applies, 99),
+        }
+
+
+class ScoreBatcher:
+    """Collects score events for window_ms and applies them together"""
+
+    def __init__(self):
+        self.window = 0.0
+        self.stats = BatchStats()
+        self._app = None
+        self._socketio = None
+        self._apply = None
+        self._pending = []
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app, socketio, apply):
+        self._app = app
+        self._socketio = socketio
+        self._apply = apply
+        self.window = float(app.config.get('SCORE_BATCH_WINDOW_MS', 0)) / 1000
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def submit(self, data):
+        """Queue a score event; the first event in a window schedules the drain"""
+        if not self.enabled:
+            self._run([data], time.monotonic())
+            return
+        with self._lock:
+            self._pending.append(data)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._socketio.start_background_task(self._drain, time.monotonic())
+
+    def _drain(self, opened_at):
+        self._socketio.sleep(self.window)
+        with self._lock:
+            batch = self._pending
+            self._pending = []
+            self._scheduled = False
+        if not batch:
+            return
+        with self._app.app_context():
+            self._run(batch, opened_at)
+
+    def _run(self, batch, opened_at):
+        started = time.monotonic()
+        try:
+            self._apply(batch)
+        finally:
+            self.stats.record(len(batch), started - opened_at, time.monotonic() - started)
+
+
+score_batcher = ScoreBatcher()
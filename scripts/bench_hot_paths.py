@@ -0,0 +1,319 @@
+"""Micro-benchmarks of the scoring and ranking hot paths.
+
+Usage (from the repo root):
+
+    python scripts/bench_hot_paths.py --output bench.json
+    python scripts/bench_hot_paths.py --compare bench.json --threshold 20
+    python scripts/bench_hot_paths.py --quick --only score_event,update_rankings
+
+Runs the real handlers in-process against an in-memory SQLite database (no
+server, no network):
+
+- score_event, delete_event and fta_save_match through the Socket.IO test
+  client on a 50-team event;
+- calculate_rps (RP flags, ledger and team totals, incremental rankings),
+  update_rankings after four teams' RP changed, reposition (the in-memory
+  part of that), rebuild_rankings (update_rankings from a cold index), and
+  GET /api/matches and GET /api/rankings (list rebuilt each time) at 50, 500
+  and 5,000 teams with 1.5 matches per team.
+
+Each benchmark reports per-operation mean/p50/p99 in ms and ops/sec. With
+--output the results are written as JSON (with the git commit); --compare
+reads an earlier file and exits with status 1 if any benchmark's p50 got
+slower by more than --threshold percent.
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import platform  # noqa: E402
+import random  # noqa: E402
+import sqlite3  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from datetime import datetime, UTC  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as server  # noqa: E402
+from db import db  # noqa: E402
+from models import Team, Match, MatchEvent  # noqa: E402
+from data_versions import rankings_version  # noqa: E402
+from game_rules import SCORING_RULES, ALLIANCES  # noqa: E402
+from live_state import live_store  # noqa: E402
+from rankings import ranking_index  # noqa: E402
+from team_directory import team_directory  # noqa: E402
+
+TEAM_COUNTS = (50, 500, 5000)
+MATCHES_PER_TEAM = 1.5
+# Benchmarks whose p50 moved by less than this are never reported as regressions (timer noise)
+MIN_REGRESSION_MS = 0.02
+COUNTERS = [f'{alliance}_{column}' for _, column, _, _ in SCORING_RULES for alliance in ALLIANCES]
+
+
+def summarize(times):
+    ordered = sorted(times)
+    total = sum(ordered)
+
+    def at(fraction):
+        return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 4)
+
+    return {
+        'ops': len(ordered),
+        'mean_ms': round(total / len(ordered) * 1000, 4),
+        'p50_ms': at(0.5),
+        'p99_ms': at(0.99),
+        'ops_per_sec': round(len(ordered) / total, 1) if total else None,
+    }
+
+
+def measure(operation, repeat, before=None):
+    """Time repeat calls of operation(i); before(i) runs untimed ahead of each call"""
+    times = []
+    for i in range(repeat):
+        if before:
+            before(i)
+        started = time.perf_counter()
+        operation(i)
+        times.append(time.perf_counter() - started)
+    return summarize(times)
+
+
+def reset():
+    """Empty database and cold caches"""
+    live_store.discard()
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    ranking_index.invalidate()
+    team_directory.invalidate()
+    rankings_version.bump()
+
+
+def seed(teams, matches, status='completed'):
+    """Teams 1..teams and random matches between them; returns the match ids"""
+    rng = random.Random(teams)
+    db.session.execute(db.insert(Team), [{'number': n, 'name': f'Team {n}'} for n in range(1, teams + 1)])
+    ids = [team_id for (team_id,) in db.session.query(Team.id).order_by(Team.id)]
+    rows = []
+    for number in range(1, matches + 1):
+        slots = rng.sample(ids, 4) if len(ids) >= 4 else ids + [None] * (4 - len(ids))
+        row = dict(zip(('red_team1_id', 'red_team2_id', 'blue_team1_id', 'blue_team2_id'), slots),
+                   match_number=number, match_type='Qualification', status=status)
+        row.update({counter: rng.randint(0, 6) for counter in COUNTERS})
+        rows.append(row)
+    if rows:
+        db.session.execute(db.insert(Match), rows)
+    db.session.commit()
+    return [match_id for (match_id,) in db.session.query(Match.id).order_by(Match.id)]
+
+
+def drain(client):
+    # The test client keeps every packet it receives
+    client.get_received()
+
+
+def bench_socket_handlers(app, args, results):
+    reset()
+    seed(50, 0)
+    match = Match(match_number=1, match_type='Qualification', status='in_progress')
+    for slot, number in zip(('red_team1_id', 'red_team2_id', 'blue_team1_id', 'blue_team2_id'), (1, 2, 3, 4)):
+        setattr(match, slot, team_directory.resolve(number))
+    db.session.add(match)
+    db.session.commit()
+    live_store.load(match)
+    client = server.socketio.test_client(app)
+    events = [(alliance, event_type) for event_type, _, _, _ in SCORING_RULES for alliance in ALLIANCES]
+
+    if selected(args, 'score_event'):
+        def score(i):
+            alliance, event_type = events[i % len(events)]
+            client.emit('score_event', {'match_id': match.id, 'alliance': alliance, 'event_type': event_type})
+        results['score_event'] = measure(score, args.repeat * 10, before=lambda i: i % 100 or drain(client))
+        drain(client)
+
+    if selected(args, 'delete_event'):
+        live_store.flush()
+        if not db.session.query(MatchEvent.id).filter_by(match_id=match.id).count():
+            for alliance, event_type in events * (args.repeat // len(events) + 1):
+                client.emit('score_event', {'match_id': match.id, 'alliance': alliance, 'event_type': event_type})
+            live_store.flush()
+        event_ids = [event_id for (event_id,) in db.session.query(MatchEvent.id).filter_by(
+            match_id=match.id).order_by(MatchEvent.id.desc()).limit(args.repeat)]
+        results['delete_event'] = measure(
+            lambda i: client.emit('delete_event', {'match_id': match.id, 'event_id': event_ids[i]}),
+            len(event_ids), before=lambda i: drain(client))
+    live_store.finish(match.id)
+
+    if selected(args, 'fta_save_match'):
+        # New matches between existing teams, every tenth with a team that has to be created
+        def save(i):
+            numbers = [(i * 4 + slot) % 50 + 1 for slot in range(4)]
+            if i % 10 == 0:
+                numbers[0] = 1000 + i
+            client.emit('fta_save_match', dict(zip(('red_team1', 'red_team2', 'blue_team1', 'blue_team2'), numbers),
+                                               match_number=100 + i))
+        results['fta_save_match'] = measure(save, args.repeat, before=lambda i: drain(client))
+    client.disconnect()
+
+
+def bench_rankings(app, args, results, teams):
+    if not any(selected(args, name) for name in ('calculate_rps', 'update_rankings', 'reposition', 'rebuild_rankings',
+                                                  'get_matches', 'get_rankings')):
+        return
+    reset()
+    matches = int(teams * MATCHES_PER_TEAM)
+    seed(teams, matches)
+    # Scores, ledger, team totals and ranks for the seeded results
+    server.rescore_all_matches()
+    http = app.test_client()
+
+    if selected(args, 'calculate_rps'):
+        # Matches ending one after another: ledger rows, team totals and an incremental ranking update
+        pending = seed_pending(teams, args.repeat, matches)
+        results[f'calculate_rps[teams={teams}]'] = measure(lambda i: server.calculate_rps(pending[i]), len(pending))
+
+    if selected(args, 'update_rankings') or selected(args, 'reposition'):
+        server.update_rankings()
+        rng = random.Random(teams)
+        team_ids = [entry.team_id for entry in ranking_index.ordered()]
+        more_points = lambda i: score_teams(rng.sample(team_ids, 4), rng)  # noqa: E731
+        if selected(args, 'update_rankings'):
+            results[f'update_rankings[teams={teams}]'] = measure(
+                lambda i: server.update_rankings(), args.repeat, before=more_points)
+        if selected(args, 'reposition'):
+            results[f'reposition[teams={teams}]'] = measure(
+                lambda i: ranking_index.reposition(), args.repeat, before=more_points)
+
+    if selected(args, 'rebuild_rankings'):
+        results[f'rebuild_rankings[teams={teams}]'] = measure(
+            lambda i: server.update_rankings(), max(args.repeat // 10, 3), before=lambda i: ranking_index.invalidate())
+
+    if selected(args, 'get_matches'):
+        results[f'get_matches[matches={matches}]'] = measure(
+            lambda i: http.get('/api/matches').get_data(), max(args.repeat // 10, 3))
+
+    if selected(args, 'get_rankings'):
+        results[f'get_rankings[teams={teams}]'] = measure(
+            lambda i: http.get('/api/rankings').get_data(), max(args.repeat // 10, 3),
+            before=lambda i: rankings_version.bump())
+
+
+def seed_pending(teams, count, first_number):
+    """count matches that just ended (scored, not yet ranked)"""
+    rng = random.Random(-teams)
+    ids = [team_id for (team_id,) in db.session.query(Team.id)]
+    pending = []
+    for i in range(count):
+        match = Match(match_number=first_number + i + 1, match_type='Qualification', status='completed')
+        for slot, team_id in zip(('red_team1_id', 'red_team2_id', 'blue_team1_id', 'blue_team2_id'), rng.sample(ids, 4)):
+            setattr(match, slot, team_id)
+        for counter in COUNTERS:
+            setattr(match, counter, rng.randint(0, 6))
+        for alliance in ALLIANCES:
+            setattr(match, f'{alliance}_score', server.game_rules.score(match, alliance))
+        db.session.add(match)
+        pending.append(match)
+    db.session.commit()
+    return pending
+
+
+def score_teams(team_ids, rng):
+    """Give teams 0-4 more RP in the ranking index, as a match result would"""
+    for team_id in team_ids:
+        entry = ranking_index.get(team_id)
+        ranking_index.set_points(team_id, entry.row_id, entry.team_number, entry.ranking_points + rng.randint(0, 4))
+
+
+def selected(args, name):
+    return not args.only or name in args.only
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print the p50 change of every benchmark against a baseline; returns the regressions"""
+    regressions = []
+    print(f"\n{'benchmark':<34}{'baseline p50':>14}{'p50':>12}{'change':>10}")
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            print(f'{name:<34}{"-":>14}{result["p50_ms"]:>12}{"new":>10}')
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+        regressed = change > threshold and result['p50_ms'] - before['p50_ms'] > MIN_REGRESSION_MS
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<34}{before['p50_ms']:>14}{result['p50_ms']:>12}{change:>+9.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help='operations per benchmark (score_event runs 10x)')
+    parser.add_argument('--teams', default=','.join(map(str, TEAM_COUNTS)),
+                        help='comma-separated team counts for the ranking benchmarks')
+    parser.add_argument('--quick', action='store_true', help='fewer operations and at most 500 teams')
+    parser.add_argument('--only', help='comma-separated benchmark names (e.g. score_event,get_rankings)')
+    parser.add_argument('--live-state', choices=('write_behind', 'sync'), default='write_behind')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='baseline JSON from an earlier --output run')
+    parser.add_argument('--threshold', type=float, default=20.0, help='allowed p50 slowdown in percent')
+    args = parser.parse_args()
+    args.only = set(args.only.split(',')) if args.only else None
+    team_counts = [int(n) for n in args.teams.split(',')]
+    if args.quick:
+        args.repeat = min(args.repeat, 50)
+        team_counts = [n for n in team_counts if n <= 500]
+
+    app = server.create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'LIVE_STATE_MODE': args.live_state,
+        'SCORE_BATCH_WINDOW_MS': 0,
+        'ASSET_BUILD': 'off',
+    })
+    results = {}
+    with app.app_context():
+        bench_socket_handlers(app, args, results)
+        for teams in team_counts:
+            bench_rankings(app, args, results, teams)
+
+    report = {
+        'commit': git_commit(),
+        'date': datetime.now(UTC).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'live_state': args.live_state,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    columns = ('ops', 'mean_ms', 'p50_ms', 'p99_ms', 'ops_per_sec')
+    print(f"{'benchmark':<34}" + ''.join(f'{column:>12}' for column in columns))
+    for name, result in results.items():
+        print(f'{name:<34}' + ''.join(f'{result[column]!s:>12}' for column in columns))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than {baseline.get('commit')} by more than "
+                  f"{args.threshold}%: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Measure cold-start time of the server.
+
+Usage (from the repo root):
+
+    python scripts/bench_startup.py --runs 5 --teams 60 --matches 120 --target-ms 1500
+
+Creates a throwaway SQLite database, loads a generated schedule into it, then
+starts ``python wsgi.py`` several times and measures how long it takes until
+the server answers (the kiosks' reconnect) and until the cache warm-up has
+finished. Exits with status 1 if the median time to first response misses
+--target-ms.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(port, path, data=None):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=body,
+                                 headers={'Content-Type': 'application/json'} if body else {})
+    with urllib.request.urlopen(req, timeout=5) as response:
+        return json.loads(response.read() or 'null')
+
+
+def start(env):
+    return subprocess.Popen([sys.executable, 'wsgi.py'], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until(predicate, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            result = predicate()
+            if result:
+                return result
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError('server did not become ready')
+
+
+def seed(env, port, teams, matches):
+    subprocess.run([sys.executable, 'app.py', 'init-db'], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    server = start(env)
+    try:
+        wait_until(lambda: request(port, '/api/startup/stats'))
+        schedule = [{
+            'match_number': i, 'match_type': 'Qualification',
+            **{slot: (i * 4 + offset) % teams + 1
+               for offset, slot in enumerate(('red_team1', 'red_team2', 'blue_team1', 'blue_team2'))},
+        } for i in range(1, matches + 1)]
+        request(port, '/api/admin/import', {'matches': schedule})
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def measure(env, port):
+    started = time.perf_counter()
+    server = start(env)
+    try:
+        wait_until(lambda: request(port, '/api/rankings') is not None)
+        first_response = (time.perf_counter() - started) * 1000
+        stats = wait_until(lambda: (lambda s: s if s['warm_up_ms'] is not None else None)(
+            request(port, '/api/startup/stats')))
+        return dict(stats, first_response_ms=round(first_response, 1))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--teams', type=int, default=60)
+    parser.add_argument('--matches', type=int, default=120)
+    parser.add_argument('--target-ms', type=float, default=1500, help='median time to first response')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        env = dict(os.environ, PORT=str(port), IRISH_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(env, port, args.teams, args.matches)
+        runs = [measure(env, port) for _ in range(args.runs)]
+
+    for run in runs:
+        print(f"first response {run['first_response_ms']:>7} ms   import {run['import_ms']:>7} ms   "
+              f"create_app {run['create_app_ms']:>6} ms   warm-up {run['warm_up_ms']:>6} ms   {run['warm_up_tasks']}")
+    median = statistics.median(run['first_response_ms'] for run in runs)
+    print(f'median time to first response: {median:.1f} ms (target {args.target_ms:.0f} ms)')
+    sys.exit(0 if median <= args.target_ms else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+"""End-to-end load test: simulated displays, referees and FTA against one server.
+
+Usage (from the repo root; needs ``pip install "python-socketio[client]"``):
+
+    python scripts/load_test.py --displays 30 --referees 4 --matches 2
+    python scripts/load_test.py --url http://127.0.0.1:5000 --server-pid 1234
+    python scripts/load_test.py --max-latency-p99-ms 150 --max-timer-skew-p99-ms 50 --json load.json
+
+Without --url a server is started locally (``python wsgi.py`` on a free port
+with a throwaway SQLite database). Then:
+
+- N displays connect and receive score_updated and timer_state;
+- M referees each score one (alliance, event type) at --rate events per
+  second (Poisson arrivals) while a match is running;
+- an FTA runs fta_start_match -> (timer runs out) -> fta_finalize_match cycles.
+
+Reported: latency from each score_event being sent to the first
+score_updated on every display whose counters include it (p50/p95/p99), and
+server CPU and memory. For the timer: timer_state messages per display per
+match, the spread of a message's arrival across displays (how far apart the
+displays' countdowns are after it) and how much each sync moves a display's
+countdown. With --max-latency-p99-ms / --max-timer-skew-p99-ms the exit status
+is 1 when a threshold is missed, so the run can gate a change locally.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game_rules import SCORING_RULES, ALLIANCES  # noqa: E402
+
+try:
+    import socketio
+except ImportError:
+    sys.exit('The load test needs the Socket.IO client: pip install "python-socketio[client]"')
+
+# One (alliance, event type, counter field) per referee, so each display can tell
+# from the counters in score_updated which of a referee's events it has seen
+SCORED = [(alliance, event_type, f'{alliance}_{column}')
+          for event_type, column, _, _ in SCORING_RULES for alliance in ALLIANCES]
+TEAMS = ('1111', '2222', '3333', '4444')
+
+
+def percentiles(values):
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def at(fraction):
+        return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)], 3)
+
+    return {'count': len(ordered), 'p50': at(0.5), 'p95': at(0.95), 'p99': at(0.99), 'max': round(ordered[-1], 3)}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def http_json(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+class Referee:
+    def __init__(self, index, url, rate):
+        self.alliance, self.event_type, self.counter = SCORED[index]
+        self.rate = rate
+        # (match_id, n) -> perf_counter() when this referee sent its n-th event of the match
+        self.sent = {}
+        self.match_id = None
+        self.deadline = None    # perf_counter() when the running match's countdown reaches zero
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('match_started', self.on_match_started)
+        self.client.on('match_ended', self.on_match_ended)
+        self.client.on('timer_state', self.on_timer_state)
+        self.client.connect(url, auth={'role': 'referee'}, wait_timeout=10)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def on_match_started(self, data, seq=None):
+        if data.get('match_id'):
+            self.deadline = None
+            self.match_id = data['match_id']
+
+    def on_match_ended(self, data, seq=None):
+        self.match_id = None
+
+    def on_timer_state(self, data, seq=None):
+        if data.get('deadline') is not None:
+            self.deadline = time.perf_counter() + data['deadline'] - data['server_time']
+
+    def run(self):
+        counts = {}
+        while not self._stop.is_set():
+            time.sleep(random.expovariate(self.rate))
+            match_id = self.match_id
+            # Stop shortly before the buzzer so no event is still in flight at the end
+            if match_id is None or (self.deadline is not None and time.perf_counter() > self.deadline - 1):
+                continue
+            n = counts[match_id] = counts.get(match_id, 0) + 1
+            self.sent[match_id, n] = time.perf_counter()
+            self.client.emit('score_event', {'match_id': match_id, 'alliance': self.alliance,
+                                             'event_type': self.event_type})
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.client.disconnect()
+
+
+class Display:
+    def __init__(self, url, role, referees):
+        self.referees = referees
+        self.received = []      # (perf_counter, payload) of score_updated
+        self.timer = []         # (perf_counter, timer_state)
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('score_updated', self.on_score_updated)
+        self.client.on('timer_state', self.on_timer_state)
+        self.client.connect(url, auth={'role': role} if role else None, wait_timeout=10)
+
+    def on_score_updated(self, data, seq=None):
+        self.received.append((time.perf_counter(), data))
+
+    def on_timer_state(self, data, seq=None):
+        self.timer.append((time.perf_counter(), data))
+
+    def latencies(self):
+        """Send -> first visible latency (ms) of every referee event, and events never seen"""
+        latencies, seen = [], {}
+        for received_at, data in self.received:
+            match_id = data.get('match_id')
+            for referee in self.referees:
+                count = data.get(referee.counter, 0)
+                key = (match_id, referee.counter)
+                for n in range(seen.get(key, 0) + 1, count + 1):
+                    sent_at = referee.sent.get((match_id, n))
+                    if sent_at is not None:
+                        latencies.append((received_at - sent_at) * 1000)
+                seen[key] = max(seen.get(key, 0), count)
+        sent = sum(len(referee.sent) for referee in self.referees)
+        return latencies, sent - len(latencies)
+
+    def sync_corrections(self):
+        """How far (ms) each timer_state moves this display's local countdown deadline"""
+        corrections, previous = [], {}
+        for arrived, data in self.timer:
+            if data.get('deadline') is None:
+                continue
+            key = (data.get('match_id'), data.get('clock'))
+            deadline = arrived + data['deadline'] - data['server_time']
+            if key in previous and data.get('reason') == 'sync':
+                corrections.append(abs(deadline - previous[key]) * 1000)
+            previous[key] = deadline
+        return corrections
+
+
+def timer_spread(displays):
+    """Per timer_state message, how far apart (ms) its arrival on the displays was"""
+    arrivals = {}
+    for display in displays:
+        for arrived, data in display.timer:
+            arrivals.setdefault((data.get('clock'), data.get('server_time')), []).append(arrived)
+    return [(max(times) - min(times)) * 1000 for times in arrivals.values() if len(times) > 1]
+
+
+class Fta:
+    def __init__(self, url):
+        self.events = {name: threading.Event() for name in ('match_started', 'match_ended', 'match_finalized')}
+        self.match_id = None
+        self.client = socketio.Client(reconnection=False)
+        for name in self.events:
+            self.client.on(name, self._handler(name))
+        self.client.connect(url, auth={'role': 'fta'}, wait_timeout=10)
+
+    def _handler(self, name):
+        def handler(data, seq=None):
+            if name == 'match_started' and data.get('match_id'):
+                self.match_id = data['match_id']
+            self.events[name].set()
+        return handler
+
+    def run_match(self, quick_start, timeout):
+        for event in self.events.values():
+            event.clear()
+        self.client.emit('fta_start_match', dict(zip(('red_team1', 'red_team2', 'blue_team1', 'blue_team2'), TEAMS),
+                                                 quick_start=quick_start))
+        if not self.events['match_started'].wait(10):
+            raise TimeoutError('match did not start')
+        if not self.events['match_ended'].wait(timeout):
+            raise TimeoutError('match did not end')
+        self.client.emit('fta_finalize_match', {'match_id': self.match_id})
+        self.events['match_finalized'].wait(10)
+
+
+class ServerMonitor:
+    """Samples CPU and resident memory of the server process"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu = []
+        self.rss_mb = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        if self.pid:
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        try:
+            import psutil
+            process = psutil.Process(self.pid)
+            times = process.cpu_times()
+            return times.user + times.system, process.memory_info().rss / 2 ** 20
+        except ImportError:
+            pass
+        # Linux without psutil
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+        with open(f'/proc/{self.pid}/status') as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:')) / 1024
+        return cpu, rss
+
+    def run(self):
+        previous = self._sample()[0]
+        while not self._stop.wait(self.interval):
+            try:
+                cpu, rss = self._sample()
+            except (OSError, StopIteration):
+                return
+            self.cpu.append((cpu - previous) / self.interval * 100)
+            self.rss_mb.append(rss)
+            previous = cpu
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        return {
+            'cpu_percent_mean': round(sum(self.cpu) / len(self.cpu), 1) if self.cpu else None,
+            'cpu_percent_max': round(max(self.cpu), 1) if self.cpu else None,
+            'rss_mb_max': round(max(self.rss_mb), 1) if self.rss_mb else None,
+        }
+
+
+def start_server(tmp):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), IRISH_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'load.db')}")
+    subprocess.run([sys.executable, 'app.py', 'init-db'], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    server = subprocess.Popen([sys.executable, 'wsgi.py'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while True:
+        try:
+            http_json(f'{url}/api/startup/stats')
+            return server, url
+        except OSError:
+            if time.time() > deadline or server.poll() is not None:
+                server.terminate()
+                raise RuntimeError('server did not start')
+            time.sleep(0.05)
+
+
+def run(args, url, server_pid):
+    referees = [Referee(i, url, args.rate) for i in range(args.referees)]
+    displays = [Display(url, args.display_role, referees) for _ in range(args.displays)]
+    fta = Fta(url)
+    monitor = ServerMonitor(server_pid).start()
+    started = time.perf_counter()
+    try:
+        for _ in range(args.matches):
+            fta.run_match(quick_start=not args.full_matches, timeout=(135 if args.full_matches else 15) + 15)
+            time.sleep(1)
+    finally:
+        duration = time.perf_counter() - started
+        server_stats = monitor.stop()
+        for referee in referees:
+            referee.stop()
+        for client in displays + [fta]:
+            client.client.disconnect()
+
+    latencies, lost = [], 0
+    for display in displays:
+        display_latencies, display_lost = display.latencies()
+        latencies.extend(display_latencies)
+        lost += display_lost
+    corrections = [value for display in displays for value in display.sync_corrections()]
+    messages = sum(len(display.timer) for display in displays)
+    return {
+        'clients': {'displays': args.displays, 'referees': args.referees, 'display_role': args.display_role or 'all'},
+        'matches': args.matches,
+        'duration_s': round(duration, 1),
+        'score_events_sent': sum(len(referee.sent) for referee in referees),
+        'score_updates_received': sum(len(display.received) for display in displays),
+        'score_latency_ms': percentiles(latencies),
+        'score_events_not_seen': lost,
+        'timer_messages_per_display_match': round(messages / max(len(displays) * args.matches, 1), 1),
+        'timer_spread_ms': percentiles(timer_spread(displays)),
+        'timer_sync_correction_ms': percentiles(corrections),
+        'server': server_stats,
+        'server_timer_stats': http_json(f'{url}/api/timer/stats'),
+        # Bytes of broadcast packets per match (and what all-JSON would have been)
+        'server_wire_bytes': http_json(f'{url}/api/socket/fanout')['wire'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='test a running server instead of starting one')
+    parser.add_argument('--server-pid', type=int, help='pid of the --url server, for CPU/memory sampling')
+    parser.add_argument('--displays', type=int, default=20)
+    parser.add_argument('--referees', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=2.0, help='score events per second per referee')
+    parser.add_argument('--matches', type=int, default=2)
+    parser.add_argument('--full-matches', action='store_true', help='2:15 matches instead of 15 s quick starts')
+    parser.add_argument('--display-role', default=None,
+                        help="role displays connect with (default: none, i.e. subscribed to every room)")
+    parser.add_argument('--max-latency-p99-ms', type=float)
+    parser.add_argument('--max-timer-skew-p99-ms', type=float,
+                        help='limit for the p99 of timer_spread_ms and timer_sync_correction_ms')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+    if not 1 <= args.referees <= len(SCORED):
+        parser.error(f'--referees must be between 1 and {len(SCORED)}')
+
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        url, server_pid = args.url, args.server_pid
+        if not url:
+            server, url = start_server(tmp)
+            server_pid = server.pid
+        try:
+            report = run(args, url, server_pid)
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    p99 = report['score_latency_ms'].get('p99')
+    if args.max_latency_p99_ms is not None and (p99 is None or p99 > args.max_latency_p99_ms):
+        failures.append(f'score latency p99 {p99} ms > {args.max_latency_p99_ms} ms')
+    if args.max_timer_skew_p99_ms is not None:
+        for key in ('timer_spread_ms', 'timer_sync_correction_ms'):
+            skew = report[key].get('p99')
+            if skew is not None and skew > args.max_timer_skew_p99_ms:
+                failures.append(f'{key} p99 {skew} ms > {args.max_timer_skew_p99_ms} ms')
+    for failure in failures:
+        print(f'FAIL: {failure}', file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
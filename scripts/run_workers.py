@@ -0,0 +1,98 @@
+"""Run several app workers behind a local sticky load balancer.
+
+Usage (from the repo root):
+
+    python scripts/run_workers.py --workers 4 --port 5000 --redis redis://localhost:6379/0
+
+Starts one worker per port (5001, 5002, ...) sharing the Redis message queue
+and state store, plus a TCP proxy on --port that pins every client IP to one
+worker (like nginx ``ip_hash``), which Socket.IO long-polling needs. Pass
+--start-redis to launch a throwaway local redis-server as well, or
+--no-proxy to put your own load balancer in front (see README).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import zlib
+
+import eventlet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_workers(count, base_port, redis_url):
+    workers = []
+    for i in range(count):
+        port = base_port + i + 1
+        env = dict(os.environ, PORT=str(port), IRISH_MESSAGE_QUEUE=redis_url)
+        workers.append((port, subprocess.Popen([sys.executable, 'wsgi.py'], cwd=ROOT, env=env)))
+        print(f'worker {i + 1}: http://127.0.0.1:{port}')
+    return workers
+
+
+def pipe(source, dest):
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            dest.sendall(data)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, dest):
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+
+def run_proxy(port, backends):
+    """Forward each connection to the backend picked by a hash of the client IP"""
+    server = eventlet.listen(('0.0.0.0', port))
+    print(f'load balancer: http://127.0.0.1:{port} -> {len(backends)} workers (sticky by client IP)')
+    while True:
+        client, (address, _) = server.accept()
+        backend = backends[zlib.crc32(address.encode()) % len(backends)]
+        try:
+            upstream = eventlet.connect(('127.0.0.1', backend))
+        except OSError:
+            client.close()
+            continue
+        eventlet.spawn_n(pipe, client, upstream)
+        eventlet.spawn_n(pipe, upstream, client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=5000, help='load balancer port; workers use the following ports')
+    parser.add_argument('--redis', default='redis://127.0.0.1:6379/0', help='message queue and shared state URL')
+    parser.add_argument('--start-redis', action='store_true', help='start a local redis-server for the run')
+    parser.add_argument('--no-proxy', action='store_true', help='only start the workers')
+    args = parser.parse_args()
+
+    processes = []
+    if args.start_redis:
+        redis_port = args.redis.rsplit(':', 1)[-1].split('/')[0]
+        processes.append(subprocess.Popen(['redis-server', '--port', redis_port, '--save', '', '--appendonly', 'no']))
+        eventlet.sleep(0.5)
+
+    workers = start_workers(args.workers, args.port, args.redis)
+    processes.extend(process for _, process in workers)
+    try:
+        if args.no_proxy:
+            for process in processes:
+                process.wait()
+        else:
+            run_proxy(args.port, [port for port, _ in workers])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -36,6 +36,7 @@ document.querySelectorAll('.tab-btn').forEach(btn => {
             case 'teams': loadTeams(); break;
             case 'rankings': loadRankings(); break;
             case 'events': loadMatchEvents(); break;
+            case 'traces': loadTraces(); break;
         }
     });
 });
@@ -543,5 +544,55 @@ async function deleteEvent(eventId) {
     }
 }
 
+// SCORE TRACE FUNCTIONS
+async function loadTraces() {
+    try {
+        const response = await fetch('/api/admin/traces?limit=200');
+        const result = await response.json();
+        const tbody = document.getElementById('traces-tbody');
+        document.getElementById('traces-status').textContent = result.enabled
+            ? `${result.trace_count} of ${result.capacity} kept`
+            : 'Tracing is off (start the server with IRISH_TRACING=1)';
+
+        if (result.traces.length === 0) {
+            tbody.innerHTML = '<tr><td colspan="8" class="no-data">No traces recorded</td></tr>';
+            return;
+        }
+
+        const fmt = value => value === null || value === undefined ? '—' : value.toFixed(1);
+        tbody.innerHTML = '';
+        result.traces.forEach(trace => {
+            const spans = ['queue', 'validate', 'score', 'event_insert', 'commit', 'emit']
+                .map(name => fmt(trace.spans[name])).join(' / ');
+            const row = document.createElement('tr');
+            row.innerHTML = `
+                <td>${new Date(trace.server_received_at).toLocaleTimeString()}</td>
+                <td>${trace.match_id}</td>
+                <td><span class="badge badge-${trace.alliance === 'red' ? 'red' : 'blue'}">${trace.alliance}</span> ${trace.event_type}</td>
+                <td>${fmt(trace.client_to_server_ms)}</td>
+                <td>${spans}</td>
+                <td>${fmt(trace.server_ms)}</td>
+                <td>${trace.acks.length}</td>
+                <td>${fmt(trace.max_render_ms)}</td>
+            `;
+            tbody.appendChild(row);
+        });
+    } catch (error) {
+        console.error('Error loading traces:', error);
+        showToast('Error loading traces', 'error');
+    }
+}
+
+async function clearTraces() {
+    try {
+        await fetch('/api/admin/traces', { method: 'DELETE' });
+        showToast('Traces cleared', 'success');
+        loadTraces();
+    } catch (error) {
+        console.error('Error clearing traces:', error);
+        showToast('Error clearing traces', 'error');
+    }
+}
+
 // Initial load
 loadMatches();
@@ -0,0 +1,78 @@
+// Match countdown run locally from the server's timer_state messages.
+//
+// The server only sends timer_state on transitions (start, field fault, resume,
+// endgame, bonus start/end, end/stop) and every few seconds to correct drift.
+// Each message carries its own monotonic clock ('server_time', 'deadline'); the
+// offset to it is estimated from the least delayed of the recent messages, and
+// the countdown is rendered here at every whole second. onRender receives the
+// same fields the per-second timer_update used to carry.
+class MatchTimer {
+    constructor(socket, onRender) {
+        this.onRender = onRender;
+        this.state = null;
+        this.clock = null;
+        this.offsets = [];  // server_time - local time, recent messages
+        this.timeout = null;
+        this.rendered = null;
+        socket.on('timer_state', (state) => this.update(state));
+    }
+
+    now() {
+        return performance.now() / 1000;
+    }
+
+    update(state) {
+        if (state.clock !== this.clock) {
+            // Another worker took over the timer: its clock has a different origin
+            this.clock = state.clock;
+            this.offsets = [];
+        }
+        this.offsets.push(state.server_time - this.now());
+        if (this.offsets.length > 5) this.offsets.shift();
+        this.state = state;
+        this.rendered = null;
+        this.tick();
+    }
+
+    remaining() {
+        if (this.state.deadline === null) return this.state.remaining;
+        // The largest offset comes from the message that spent the least time in transit
+        const serverNow = this.now() + Math.max(...this.offsets);
+        return Math.max(0, this.state.deadline - serverNow);
+    }
+
+    view() {
+        const state = this.state;
+        const seconds = Math.max(0, Math.ceil(this.remaining() - 0.001));
+        const bonus = (alliance) => {
+            const until = state[`${alliance}_bonus_until`];
+            return state[`${alliance}_bonus_active`] && until !== null ? Math.max(0, seconds - until) : 0;
+        };
+        return {
+            match_id: state.match_id,
+            time_remaining: seconds,
+            is_endgame: state.is_endgame || (state.running && seconds <= state.endgame_at),
+            red_bonus_active: bonus('red') > 0,
+            red_bonus_time: bonus('red'),
+            blue_bonus_active: bonus('blue') > 0,
+            blue_bonus_time: bonus('blue'),
+            field_fault: state.field_fault,
+        };
+    }
+
+    tick() {
+        clearTimeout(this.timeout);
+        const view = this.view();
+        const key = JSON.stringify(view);
+        if (key !== this.rendered) {
+            this.rendered = key;
+            this.onRender(view);
+        }
+        const exact = this.remaining();
+        if (this.state.deadline !== null && exact > 0) {
+            // Wake just after the countdown crosses the next whole second
+            const untilNext = exact - (Math.ceil(exact - 0.001) - 1);
+            this.timeout = setTimeout(() => this.tick(), untilNext * 1000 + 5);
+        }
+    }
+}
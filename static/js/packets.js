@@ -0,0 +1,85 @@
+// MessagePack packets (IRISH_BINARY_PACKETS).
+//
+// A client that connects with auth {packets: 'msgpack'} receives some broadcasts
+// as a single binary attachment holding the MessagePack-encoded payload; the
+// server only does so where that is smaller than the JSON text. binaryPackets()
+// wraps socket.on so handlers get plain objects either way.
+function decodeMsgpack(buffer) {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    const text = new TextDecoder();
+    let pos = 0;
+
+    const str = (length) => {
+        const value = text.decode(bytes.subarray(pos, pos + length));
+        pos += length;
+        return value;
+    };
+    const array = (length) => {
+        const value = new Array(length);
+        for (let i = 0; i < length; i++) value[i] = read();
+        return value;
+    };
+    const map = (length) => {
+        const value = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            value[key] = read();
+        }
+        return value;
+    };
+    const bin = (length) => {
+        const value = buffer.slice(pos, pos + length);
+        pos += length;
+        return value;
+    };
+    const num = (getter, size) => {
+        const value = view[getter](pos);
+        pos += size;
+        return typeof value === 'bigint' ? Number(value) : value;
+    };
+
+    function read() {
+        const type = bytes[pos++];
+        if (type < 0x80) return type;
+        if (type < 0x90) return map(type & 0x0f);
+        if (type < 0xa0) return array(type & 0x0f);
+        if (type < 0xc0) return str(type & 0x1f);
+        if (type >= 0xe0) return type - 0x100;
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return bin(num('getUint8', 1));
+            case 0xc5: return bin(num('getUint16', 2));
+            case 0xc6: return bin(num('getUint32', 4));
+            case 0xca: return num('getFloat32', 4);
+            case 0xcb: return num('getFloat64', 8);
+            case 0xcc: return num('getUint8', 1);
+            case 0xcd: return num('getUint16', 2);
+            case 0xce: return num('getUint32', 4);
+            case 0xcf: return num('getBigUint64', 8);
+            case 0xd0: return num('getInt8', 1);
+            case 0xd1: return num('getInt16', 2);
+            case 0xd2: return num('getInt32', 4);
+            case 0xd3: return num('getBigInt64', 8);
+            case 0xd9: return str(num('getUint8', 1));
+            case 0xda: return str(num('getUint16', 2));
+            case 0xdb: return str(num('getUint32', 4));
+            case 0xdc: return array(num('getUint16', 2));
+            case 0xdd: return array(num('getUint32', 4));
+            case 0xde: return map(num('getUint16', 2));
+            case 0xdf: return map(num('getUint32', 4));
+        }
+        throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+    }
+
+    return read();
+}
+
+function binaryPackets(socket) {
+    const on = socket.on.bind(socket);
+    socket.on = (event, handler) => on(event, (...args) => handler(
+        ...args.map((arg) => (arg instanceof ArrayBuffer ? decodeMsgpack(arg) : arg))));
+    return socket;
+}
@@ -0,0 +1,39 @@
+// Reconnect resync (see replay.py).
+//
+// Every server broadcast carries a sequence number as its last argument. On a
+// reconnect the socket sends the epoch and the last number it saw; the server
+// replays what was missed, or answers with a snapshot: a list of [event, data]
+// pairs that are handed to this page's own listeners, as if they had arrived.
+function resyncSocket(auth) {
+    let epoch = null;
+    let lastSeq = null;
+    let rankingsVersion = null;
+    const socket = io({
+        auth: (send) => send(epoch === null ? auth : Object.assign({}, auth, {
+            epoch: epoch,
+            last_seq: lastSeq,
+            rankings_version: rankingsVersion,
+        })),
+    });
+
+    socket.onAny((event, ...args) => {
+        const seq = args[args.length - 1];
+        if (args.length > 1 && typeof seq === 'number') lastSeq = Math.max(lastSeq || 0, seq);
+        if (event === 'rankings_updated' && args[0] && args[0].version) rankingsVersion = args[0].version;
+    });
+
+    socket.on('resync', (state) => {
+        if (state.epoch !== epoch) {
+            // New server process: its numbering starts over
+            epoch = state.epoch;
+            lastSeq = state.seq;
+        } else {
+            lastSeq = Math.max(lastSeq || 0, state.seq);
+        }
+        for (const [event, data] of state.events) {
+            if (event === 'rankings_updated') rankingsVersion = data.version;
+            socket.listeners(event).forEach((listener) => listener(data));
+        }
+    });
+    return socket;
+}
@@ -0,0 +1,185 @@
+"""Process-wide team number -> team cache.
+
+Match setup resolves up to four team numbers at a time, most often right when
+a match starts. The directory keeps every team's id and name in memory so
+those lookups cost no queries. It stays coherent through the same session
+hooks as data_versions: teams added, renamed or deleted through the ORM are
+applied to the cache when their transaction commits, and bulk statements on
+the team table (schedule import, delete-all) make it reload on next use.
+
+A number that isn't cached is looked up in the database before it counts as
+unknown, so teams created by another worker are still found.
+"""
+import threading
+from collections import namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db import db
+from models import Team
+
+CachedTeam = namedtuple('CachedTeam', 'id number name')
+
+_PENDING_KEY = 'team_directory_pending'
+
+
+class TeamDirectory:
+    """Team lookups by number, with hit/miss counters"""
+
+    def __init__(self):
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._by_number = {}
+        self._by_id = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop the cache; the next lookup reloads every team (one query)"""
+        with self._lock:
+            self.loaded = False
+            self._by_number = {}
+            self._by_id = {}
+
+    def load(self):
+        rows = db.session.query(Team.id, Team.number, Team.name).all()
+        with self._lock:
+            self._by_number = {number: CachedTeam(team_id, number, name) for team_id, number, name in rows}
+            self._by_id = {team.id: team for team in self._by_number.values()}
+            self.loaded = True
+            self.loads += 1
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def get(self, number):
+        """CachedTeam for a team number, or None if there is no such team"""
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return None
+        self.ensure_loaded()
+        team = self._by_number.get(number)
+        if team is not None:
+            self.hits += 1
+            return team
+        self.misses += 1
+        row = db.session.query(Team.id, Team.number, Team.name).filter_by(number=number).first()
+        if row is None:
+            return None
+        return self._put(*row)
+
+    def resolve(self, number):
+        """Team id for a team number, or None for an empty slot or unknown team"""
+        team = self.get(number)
+        return team.id if team else None
+
+    def number_of(self, team_id):
+        """Team number for a team id, or None"""
+        if team_id is None:
+            return None
+        self.ensure_loaded()
+        team = self._by_id.get(team_id)
+        if team is not None:
+            self.hits += 1
+            return team.number
+        self.misses += 1
+        row = db.session.query(Team.id, Team.number, Team.name).filter_by(id=team_id).first()
+        return self._put(*row).number if row else None
+
+    def resolve_or_create(self, number):
+        """Team id for a team number, adding a placeholder 'Team N' if it doesn't
+        exist yet. The new team is flushed (for its id) but not committed."""
+        if number is None or not str(number).strip():
+            return None
+        team_id = self.resolve(number)
+        if team_id is None:
+            team = Team(number=int(number), name=f'Team {int(number)}')
+            db.session.add(team)
+            db.session.flush()
+            team_id = team.id
+        return team_id
+
+    def _put(self, team_id, number, name):
+        team = CachedTeam(team_id, number, name)
+        with self._lock:
+            # Drop the stale entry if a team's number changed
+            old = self._by_id.get(team_id)
+            if old is not None and old.number != number:
+                self._by_number.pop(old.number, None)
+            self._by_number[number] = team
+            self._by_id[team_id] = team
+        return team
+
+    def _remove(self, team_id, number):
+        with self._lock:
+            cached = self._by_number.get(number)
+            if cached is not None and cached.id == team_id:
+                del self._by_number[number]
+            self._by_id.pop(team_id, None)
+
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'loaded': self.loaded,
+            'teams': len(self._by_number),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'loads': self.loads,
+        }
+
+
+team_directory = TeamDirectory()
+
+
+# ----- keeping the cache coherent with committed changes -----
+
+def _pending(session):
+    return session.info.setdefault(_PENDING_KEY, {'put': {}, 'remove': {}, 'reload': False})
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    teams = [obj for obj in list(session.new) + list(session.dirty) if isinstance(obj, Team)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Team)]
+    if not teams and not deleted:
+        return
+    pending = _pending(session)
+    for team in teams:
+        pending['put'][team.id] = (team.number, team.name)
+        pending['remove'].pop(team.id, None)
+    for team in deleted:
+        pending['remove'][team.id] = team.number
+        pending['put'].pop(team.id, None)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table is Team.__table__:
+        _pending(orm_execute_state.session)['reload'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None or not team_directory.loaded:
+        return
+    if pending['reload']:
+        team_directory.invalidate()
+        return
+    for team_id, (number, name) in pending['put'].items():
+        team_directory._put(team_id, number, name)
+    for team_id, number in pending['remove'].items():
+        team_directory._remove(team_id, number)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import eventlet
+eventlet.monkey_patch()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import app as server  # noqa: E402
+from cluster import cluster, MemoryBackend  # noqa: E402
+from db import db  # noqa: E402
+from live_state import live_store  # noqa: E402
+from models import Team, Match  # noqa: E402
+from rankings import ranking_index  # noqa: E402
+from team_directory import team_directory  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def flask_app():
+    return server.create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SCORE_BATCH_WINDOW_MS': 0,
+        'ASSET_BUILD': 'off',
+    })
+
+
+@pytest.fixture
+def app(flask_app):
+    """The app with an empty database, cold caches and fresh shared state"""
+    with flask_app.app_context():
+        live_store.discard()
+        cluster.backend = MemoryBackend()
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        ranking_index.invalidate()
+        team_directory.invalidate()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def http(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def connect(app):
+    """Socket.IO test client for a role"""
+    clients = []
+
+    def connect(role, **auth):
+        client = server.socketio.test_client(app, auth=dict(auth, role=role))
+        clients.append(client)
+        return client
+
+    yield connect
+    for client in clients:
+        if client.is_connected():
+            client.disconnect()
+
+
+def add_teams(*numbers):
+    db.session.add_all(Team(number=number, name=f'Team {number}') for number in numbers)
+    db.session.commit()
+    return [team_directory.resolve(number) for number in numbers]
+
+
+def add_match(teams, match_number=1, status='scheduled', **columns):
+    match = Match(match_number=match_number, match_type='Qualification', status=status, **columns)
+    for slot, team_id in zip(('red_team1_id', 'red_team2_id', 'blue_team1_id', 'blue_team2_id'), teams):
+        setattr(match, slot, team_id)
+    db.session.add(match)
+    db.session.commit()
+    return match
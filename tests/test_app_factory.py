@@ -0,0 +1,31 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code, database, **env):
+    env = dict(os.environ, IRISH_DATABASE_URL=f'sqlite:///{database}', IRISH_ASSET_BUILD='off', **env)
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, timeout=60, check=True).stdout
+
+
+def test_create_app_reads_the_environment_and_leaves_the_database_alone(tmp_path):
+    database = tmp_path / 'irish.db'
+    out = run('from app import create_app\n'
+              'app = create_app({"TIMER_SYNC_INTERVAL": 7})\n'
+              'print(app.config["SCORE_BATCH_WINDOW_MS"], app.config["TIMER_SYNC_INTERVAL"])',
+              database, IRISH_SCORE_BATCH_WINDOW_MS='40')
+    assert out.split() == ['40.0', '7']
+    assert not database.exists()
+
+
+def test_init_db_creates_the_schema(tmp_path):
+    database = tmp_path / 'irish.db'
+    run('import runpy, sys\n'
+        'sys.argv = ["app.py", "init-db"]\n'
+        'runpy.run_path("app.py", run_name="__main__")', database)
+    tables = {row[0] for row in sqlite3.connect(database).execute("SELECT name FROM sqlite_master")}
+    assert {'team', 'match', 'app_state'} <= tables
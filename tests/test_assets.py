@@ -0,0 +1,24 @@
+import os
+import shutil
+
+from assets import STATIC_DIR, VENDOR, check_vendor
+
+
+def test_committed_vendor_scripts_match_their_pins():
+    assert check_vendor() == []
+
+
+def test_missing_or_altered_vendor_script_is_reported(tmp_path):
+    name = next(iter(VENDOR))
+    assert check_vendor(str(tmp_path)) == [f'{name} is missing']
+    os.makedirs(tmp_path / os.path.dirname(name))
+    shutil.copy(os.path.join(STATIC_DIR, name), tmp_path / name)
+    with open(tmp_path / name, 'a') as f:
+        f.write('\n')
+    assert check_vendor(str(tmp_path)) == [f'{name} does not match its pinned SHA-256']
+
+
+def test_pages_load_socket_io_locally(http):
+    page = http.get('/referee').get_data(as_text=True)
+    assert 'js/lib/socket.io.min.js' in page
+    assert 'cdnjs' not in page
@@ -0,0 +1,61 @@
+import flask
+import pytest
+
+from cluster import Cluster, MemoryBackend, COMMAND_CHANNEL
+
+
+class RecordingBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def worker():
+    cluster = Cluster()
+    cluster.backend = RecordingBackend()
+    cluster._app = flask.Flask(__name__)
+    return cluster
+
+
+def test_shared_state_defaults_and_unknown_names(worker):
+    assert worker.state.timer_running is False
+    worker.state.timer_running = True
+    assert worker.backend.get('timer_running') is True
+    with pytest.raises(AttributeError):
+        worker.state.no_such_setting = 1
+
+
+def test_owner_runs_handlers_and_others_forward_them(worker):
+    calls = []
+
+    @worker.on_owner
+    def handle_thing(data):
+        calls.append((flask.request.sid, data))
+
+    with worker._app.test_request_context('/socket.io/'):
+        flask.request.sid = 'abc'
+        flask.request.namespace = '/'
+        handle_thing({'n': 1})
+        worker.enabled, worker._owner = True, False
+        handle_thing({'n': 2})
+
+    assert calls == [('abc', {'n': 1})]
+    channel, message = worker.backend.published[0]
+    assert channel == COMMAND_CHANNEL
+    assert (message['handler'], message['sid'], message['args']) == ('handle_thing', 'abc', [{'n': 2}])
+
+    # The owner runs what it receives as if the client had sent it there
+    worker._run(message)
+    assert calls[-1] == ('abc', {'n': 2})
+
+
+def test_shared_counters_and_setdefault():
+    backend = MemoryBackend()
+    assert [backend.incr('version:x') for _ in range(3)] == [1, 2, 3]
+    assert backend.get('version:x') == 3
+    assert backend.setdefault('epoch', 'a') == 'a'
+    assert backend.setdefault('epoch', 'b') == 'a'
@@ -0,0 +1,38 @@
+from conftest import add_teams, add_match
+from current_match import current_match
+from db import db
+from live_state import live_store
+from models import Match
+
+
+def test_points_at_first_scheduled_match(app, http):
+    teams = add_teams(1, 2, 3, 4)
+    add_match(teams, match_number=1, status='completed')
+    second = add_match(teams, match_number=2)
+    add_match(teams, match_number=3)
+
+    response = http.get('/api/current_match')
+    assert response.json['id'] == second.id
+    assert http.get('/api/current_match', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_saved_match_replaces_scheduled_pointer(app, http):
+    teams = add_teams(1, 2, 3, 4)
+    add_match(teams, match_number=1)
+    saved = add_match(teams, match_number=2)
+    current_match.get()
+    current_match.moved_to(saved.id)
+    assert http.get('/api/current_match').json['id'] == saved.id
+
+
+def test_live_match_is_never_served_stale(app, http):
+    teams = add_teams(1, 2, 3, 4)
+    match = add_match(teams, status='in_progress', red_score=0)
+    current_match.set(match.id)
+    live = live_store.load(db.session.get(Match, match.id))
+
+    first = http.get('/api/current_match')
+    assert first.json['red_score'] == 0
+    assert 'ETag' not in first.headers
+    live.red_score = 6
+    assert http.get('/api/current_match').json['red_score'] == 6
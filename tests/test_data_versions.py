@@ -0,0 +1,69 @@
+from conftest import add_teams, add_match
+from cluster import cluster
+from data_versions import matches_version
+from db import db
+from models import Match
+
+
+def etag_of(response):
+    return response.headers['ETag'].strip('"')
+
+
+def test_unchanged_matches_answer_304(app, http):
+    add_match(add_teams(1, 2, 3, 4))
+    etag = etag_of(http.get('/api/matches'))
+    assert http.get('/api/matches', headers={'If-None-Match': etag}).status_code == 304
+    # The query string is part of the ETag
+    assert http.get('/api/matches?status=scheduled', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_commit_invalidates_304(app, http):
+    match = add_match(add_teams(1, 2, 3, 4))
+    etag = etag_of(http.get('/api/matches'))
+    db.session.get(Match, match.id).red_score = 12
+    db.session.commit()
+    response = http.get('/api/matches', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json[0]['red_score'] == 12
+
+
+def test_bulk_update_invalidates_304(app, http):
+    add_match(add_teams(1, 2, 3, 4))
+    etag = etag_of(http.get('/api/matches'))
+    db.session.execute(db.update(Match).values(blue_score=4))
+    db.session.commit()
+    assert http.get('/api/matches', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_rolled_back_changes_keep_the_version(app):
+    match = add_match(add_teams(1, 2, 3, 4))
+    version = matches_version.value
+    db.session.get(Match, match.id).red_score = 3
+    db.session.flush()
+    db.session.rollback()
+    assert matches_version.value == version
+
+
+def test_commit_on_another_worker_invalidates_304(app, http):
+    add_match(add_teams(1, 2, 3, 4))
+    etag = etag_of(http.get('/api/matches'))
+    # What another worker's commit does to the shared counter
+    cluster.backend.incr(matches_version.key)
+    assert http.get('/api/matches', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_matches_are_paged_by_id(app, http, monkeypatch):
+    teams = add_teams(1, 2, 3, 4)
+    for number in range(1, 6):
+        add_match(teams, match_number=number)
+    page = http.get('/api/matches?limit=2')
+    assert [match['match_number'] for match in page.json] == [1, 2]
+    assert 'after_id=' in page.headers['Link']
+    monkeypatch.setitem(app.config, 'MATCHES_MAX_PAGE_SIZE', 3)
+    assert len(http.get('/api/matches?limit=1000').json) == 3
+    assert len(http.get('/api/matches').json) == 5
+
+
+def test_invalid_limit_is_rejected(app, http):
+    for limit in ('-1', '0', 'abc'):
+        assert http.get(f'/api/matches?limit={limit}').status_code == 400
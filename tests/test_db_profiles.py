@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import create_engine
+
+import db_profiles
+
+
+def test_sqlite_file_gets_wal_and_tuned_pragmas(tmp_path):
+    url = f'sqlite:///{tmp_path}/irish.db'
+    engine = create_engine(url, **db_profiles.engine_options(url, {}))
+    db_profiles.install(engine, {})
+    pragmas = db_profiles.describe(engine, {})['pragmas']
+    # synchronous=NORMAL is 1
+    assert (pragmas['journal_mode'], pragmas['synchronous'], pragmas['busy_timeout']) == ('wal', 1, 5000)
+
+
+def test_default_profile_leaves_the_driver_alone(tmp_path):
+    url = f'sqlite:///{tmp_path}/irish.db'
+    assert db_profiles.sqlite_pragmas(url, {'DB_PROFILE': 'default'}) == {}
+    assert db_profiles.engine_options('postgresql://host/irish', {'DB_PROFILE': 'default'}) == {}
+
+
+def test_postgres_pool_and_statement_timeout():
+    options = db_profiles.engine_options('postgresql+psycopg://host/irish', {'DB_POOL_SIZE': 4})
+    assert (options['pool_size'], options['pool_pre_ping']) == (4, True)
+    assert options['connect_args'] == {'options': '-c statement_timeout=10000', 'prepare_threshold': 5}
+    assert 'prepare_threshold' not in db_profiles.engine_options('postgresql://host/irish', {})['connect_args']
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        db_profiles.engine_options('sqlite://', {'DB_PROFILE': 'fast'})
@@ -0,0 +1,48 @@
+from conftest import add_teams, add_match
+from db import db
+from event_store import event_store, EVENT_VOID
+from models import Match, MatchEvent
+
+
+def score(referee, match, alliance, event_type):
+    referee.emit('score_event', {'match_id': match.id, 'alliance': alliance, 'event_type': event_type})
+
+
+def stored(match_id):
+    db.session.expire_all()
+    return db.session.get(Match, match_id)
+
+
+def test_deleting_an_event_appends_a_void(app, connect):
+    match = add_match(add_teams(1, 2, 3, 4), status='in_progress')
+    referee = connect('referee')
+    score(referee, match, 'red', 'climb')
+    score(referee, match, 'red', 'park')
+    climb = MatchEvent.query.filter_by(event_type='climb').one()
+
+    referee.emit('delete_event', {'match_id': match.id, 'event_id': climb.id})
+    row = stored(match.id)
+    assert (row.red_score, row.red_climb, row.red_park) == (2, 0, 1)
+    assert MatchEvent.query.filter_by(event_type=EVENT_VOID).count() == 1
+    assert MatchEvent.query.count() == 3
+    # Deleting it again changes nothing
+    referee.emit('delete_event', {'match_id': match.id, 'event_id': climb.id})
+    assert MatchEvent.query.filter_by(event_type=EVENT_VOID).count() == 1
+
+
+def test_rebuild_restores_columns_from_the_events(app, connect):
+    match = add_match(add_teams(1, 2, 3, 4), status='in_progress')
+    referee = connect('referee')
+    score(referee, match, 'blue', 'bucket_bonus')
+    score(referee, match, 'red', 'foul')
+    # Drift the columns away from what the events say
+    row = stored(match.id)
+    row.blue_score, row.blue_bucket_bonus = 99, 7
+    db.session.commit()
+
+    result = event_store.rebuild_all(full=True)
+    db.session.commit()
+    assert set(result['changed']) == {match.id}
+    row = stored(match.id)
+    # 12 for the bonus bucket plus 2 for red's foul
+    assert (row.blue_score, row.blue_bucket_bonus, row.red_fouls) == (14, 1, 1)
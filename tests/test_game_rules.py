@@ -0,0 +1,47 @@
+import json
+from types import SimpleNamespace
+
+from flask import Flask
+
+from game_rules import GameRules, SCORING_RULES, ALLIANCES
+
+COUNTERS = [f'{alliance}_{column}' for _, column, _, _ in SCORING_RULES for alliance in ALLIANCES]
+
+
+def empty_match():
+    return SimpleNamespace(red_score=0, blue_score=0, **{counter: 0 for counter in COUNTERS})
+
+
+def test_apply_and_undo_keep_counters_and_scores_in_step():
+    rules, match = GameRules(), empty_match()
+    assert rules.apply(match, 'red', 'climb') == 14
+    assert rules.apply(match, 'red', 'tech_foul') == 5
+    # Fouls score for the other alliance
+    assert (match.red_score, match.blue_score, match.red_tech_fouls) == (14, 5, 1)
+    assert rules.score(match, 'red') == 14 and rules.score(match, 'blue') == 5
+
+    rules.apply(match, 'red', 'climb', -1)
+    assert (match.red_score, match.red_climb) == (0, 0)
+    assert rules.apply(match, 'red', 'teleport') is None
+
+
+def test_threshold_rps():
+    rules, match = GameRules(), empty_match()
+    match.blue_climb, match.blue_park = 1, 3
+    assert rules.threshold_rps(match, 'blue') == {'climb_rp': True}
+    assert rules.threshold_rps(match, 'red') == {'climb_rp': False}
+
+
+def test_overrides_from_a_rules_file(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'points': {'climb': 15}, 'thresholds': {'climb_rp': 30}}))
+    app = Flask(__name__)
+    app.config['GAME_RULES_FILE'] = str(path)
+    rules, match = GameRules(), empty_match()
+    rules.init_app(app)
+
+    assert rules.apply(match, 'blue', 'climb') == 15
+    match.blue_climb = 2
+    assert rules.threshold_rps(match, 'blue') == {'climb_rp': True}
+    match.blue_climb = 1
+    assert rules.threshold_rps(match, 'blue') == {'climb_rp': False}
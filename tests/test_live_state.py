@@ -0,0 +1,62 @@
+import pytest
+
+from conftest import add_teams, add_match
+from db import db
+from live_state import live_store
+from models import Match, MatchEvent
+
+
+@pytest.fixture
+def live(app):
+    match = add_match(add_teams(1, 2, 3, 4), status='in_progress')
+    yield live_store.load(db.session.get(Match, match.id))
+    live_store.discard()
+
+
+def stored(match_id):
+    db.session.expire_all()
+    return db.session.get(Match, match_id)
+
+
+def test_changes_stay_in_memory_until_flushed(live):
+    live.red_score = 12
+    live_store.record_event(live.id, 'bucket_normal', 'red', 6)
+    assert live.dirty
+    assert stored(live.id).red_score == 0
+    assert MatchEvent.query.count() == 0
+
+    assert live_store.flush() == 2
+    assert stored(live.id).red_score == 12
+    assert MatchEvent.query.count() == 1
+    assert not live.dirty
+    assert live_store.flush() == 0
+
+
+def test_finish_flushes_and_stops_tracking(live):
+    live.blue_score = 5
+    live_store.finish(live.id)
+    assert stored(live.id).blue_score == 5
+    assert live_store.get(live.id) is None
+
+
+def test_failed_flush_keeps_the_changes(live, monkeypatch):
+    live.red_score = 3
+    live_store.record_event(live.id, 'park', 'red', 2)
+
+    def fail():
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(db.session, 'commit', fail)
+    with pytest.raises(RuntimeError):
+        live_store.flush()
+    monkeypatch.undo()
+    assert live.dirty
+    assert live_store.flush() == 2
+    assert stored(live.id).red_score == 3
+
+
+def test_discard_drops_queued_events(live):
+    live_store.record_event(live.id, 'park', 'red', 2)
+    live_store.discard(live.id)
+    assert live_store.flush() == 0
+    assert MatchEvent.query.count() == 0
@@ -0,0 +1,58 @@
+import pytest
+
+from match_clock import MatchClock, TickStats
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_pauses_do_not_count_as_match_time():
+    time = FakeTime()
+    clock = MatchClock(150, now=time)
+    clock.start()
+    time.now += 10.4
+    assert clock.due_tick() == 10
+    clock.pause()
+    time.now += 30
+    assert clock.elapsed() == pytest.approx(10.4)
+    clock.resume()
+    time.now += 0.6
+    assert clock.due_tick() == 11
+    assert clock.target_for_tick(12) == pytest.approx(100.0 + 30 + 12)
+    assert clock.deadline() == pytest.approx(100.0 + 30 + 150)
+
+
+def test_due_tick_stops_at_the_duration():
+    time = FakeTime()
+    clock = MatchClock(5, now=time)
+    clock.start()
+    time.now += 60
+    assert clock.due_tick() == 5
+    assert clock.remaining_exact() == 0.0
+
+
+def test_bonus_counts_down_with_ticks():
+    clock = MatchClock(150, now=FakeTime())
+    clock.start()
+    clock.ticks = 20
+    clock.start_bonus('red', 15)
+    clock.ticks = 30
+    assert clock.bonus_remaining('red') == 5
+    assert clock.bonus_remaining('blue') == 0
+    clock.ticks = 40
+    assert clock.bonus_remaining('red') == 0
+
+
+def test_tick_stats():
+    stats = TickStats(window=3)
+    for lateness in (0.001, 0.004, 0.002, 0.003):
+        stats.record(lateness)
+    assert stats.count == 4
+    assert stats.max == 0.004
+    assert list(stats.recent) == [0.004, 0.002, 0.003]
+    assert stats.percentile(50) == 0.003
@@ -0,0 +1,38 @@
+from conftest import add_teams, add_match
+from db import db
+from models import Match, MatchRankingPoints, TeamRanking
+
+
+def points(team_ids):
+    rankings = {r.team_id: r.ranking_points for r in TeamRanking.query}
+    return [rankings.get(team_id) for team_id in team_ids]
+
+
+def test_repeat_finalize_awards_rps_once(app, connect):
+    teams = add_teams(1, 2, 3, 4)
+    match = add_match(teams, status='completed', red_climb=2, red_score=28, blue_score=6, blue_park=3)
+    fta = connect('fta')
+
+    fta.emit('fta_finalize_match', {'match_id': match.id})
+    first = points(teams)
+    # Red won (1 RP) and reached the bench threshold (1 RP)
+    assert first == [2, 2, 0, 0]
+
+    fta.emit('fta_finalize_match', {'match_id': match.id})
+    fta.emit('fta_finalize_match', {'match_id': match.id})
+    assert points(teams) == first
+    assert MatchRankingPoints.query.count() == 4
+
+
+def test_finalize_after_correction_applies_the_difference(app, connect):
+    teams = add_teams(1, 2, 3, 4)
+    match = add_match(teams, status='completed', red_climb=2, red_score=28, blue_score=6, blue_park=3)
+    fta = connect('fta')
+    fta.emit('fta_finalize_match', {'match_id': match.id})
+
+    # Review takes the climbs away: red drops below the bench threshold and loses the match
+    row = db.session.get(Match, match.id)
+    row.red_climb, row.red_score = 0, 0
+    db.session.commit()
+    fta.emit('fta_finalize_match', {'match_id': match.id})
+    assert points(teams) == [0, 0, 1, 1]
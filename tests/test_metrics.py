@@ -0,0 +1,46 @@
+from metrics import Histogram, metrics, sample_lines
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram((0.1, 1.0), 'handler="score"')
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert list(histogram.lines('latency')) == [
+        'latency_bucket{handler="score",le="0.1"} 2',
+        'latency_bucket{handler="score",le="1.0"} 3',
+        'latency_bucket{handler="score",le="+Inf"} 4',
+        'latency_sum{handler="score"} 2.65',
+        'latency_count{handler="score"} 4',
+    ]
+
+
+def test_sample_lines_escape_labels():
+    assert list(sample_lines('clients', 'Clients', 'gauge', [({'role': 'a"b'}, 3), ({}, None)])) == [
+        '# HELP clients Clients',
+        '# TYPE clients gauge',
+        'clients{role="a\\"b"} 3',
+        'clients NaN',
+    ]
+
+
+def test_metrics_endpoint(http):
+    http.get('/api/rankings')
+    response = http.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert '# TYPE irish_http_request_duration_seconds histogram' in text
+    assert 'irish_http_request_duration_seconds_count{route="/api/rankings",method="GET"}' in text
+    assert text.count('# TYPE irish_http_request_duration_seconds histogram') == 1
+    assert '# TYPE irish_db_commit_duration_seconds histogram' in text
+    assert 'irish_timer_running 0' in text
+
+
+def test_http_histograms_per_route_and_method(app, http):
+    http.get('/api/matches')
+    http.get('/api/matches?limit=0')
+    http.post('/api/admin/import', json={})
+    children = metrics.http_seconds.children
+    assert all(isinstance(child, Histogram) for child in children.values())
+    assert children[('/api/matches', 'GET')].count >= 2
+    assert ('/api/admin/import', 'POST') in children
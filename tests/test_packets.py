@@ -0,0 +1,61 @@
+import pytest
+import socketio
+from socketio import packet as sio_packet
+
+from packets import JSON, MSGPACK, NAMESPACE, PacketEncoder, Payload, packets
+from rooms import router
+
+
+def test_encodes_a_socketio_event_packet(app):
+    packet = packets.encode('score_updated', {'red_score': 12}, seq=4)
+    assert list(packet.frames) == [JSON]
+    [frame] = packet.frames[JSON]
+    assert frame.encode() == '42["score_updated",{"red_score":12},4]'
+    assert packet.sizes[JSON] == len(frame.encode())
+    assert packets.encode('clear_endgame').frames[JSON][0].encode() == '42["clear_endgame"]'
+
+
+def test_sends_through_the_pinned_python_socketio_server(monkeypatch):
+    """Guards the private Server._send_eio_packet call and the wire format against upgrades"""
+    server = socketio.Server()
+    sent = []
+    monkeypatch.setattr(server.eio, 'send_packet', lambda eio_sid, pkt: sent.append((eio_sid, pkt.encode())))
+    sid = server.manager.connect('eio-1', NAMESPACE)
+    encoder = PacketEncoder()
+    encoder.socketio = type('FlaskSocketIO', (), {'server': server})()
+    encoder.send(encoder.encode('score_updated', {'red_score': 12}, seq=4), [sid])
+    # The same bytes python-socketio's own emit sends
+    server.emit('score_updated', ({'red_score': 12}, 4), to=sid)
+    [(eio_sid, frame), emitted] = sent
+    assert (eio_sid, frame) == emitted == ('eio-1', '42["score_updated",{"red_score":12},4]')
+    decoded = sio_packet.Packet(encoded_packet=frame[1:])
+    assert (decoded.packet_type, decoded.data) == (sio_packet.EVENT, ['score_updated', {'red_score': 12}, 4])
+
+
+def test_bytes_sent_are_counted_per_match(app, connect):
+    packets.stats.reset()
+    displays = [connect('display'), connect('display')]
+    router.emit('score_updated', {'match_id': 3, 'red_score': 5}, match_id=3)
+    stats = packets.to_dict()['matches']['3']
+    assert stats['packets'] == len(displays)
+    assert stats['bytes'] == stats['json_bytes'] > 0
+    assert stats['msgpack_packets'] == 0
+    for display in displays:
+        assert display.get_received()[-1]['args'][0] == {'match_id': 3, 'red_score': 5}
+
+
+def test_msgpack_only_where_it_is_smaller(app, monkeypatch):
+    """The payload is one attachment, encoded once per Payload"""
+    msgpack = pytest.importorskip('msgpack')
+    monkeypatch.setattr(packets, 'binary', True)
+    monkeypatch.setattr(packets, '_msgpack', msgpack)
+    assert MSGPACK not in packets.encode('clear_endgame', {}).frames
+    scores = {f'red_score_{n}': 1000000 + n for n in range(50)}
+    packet = packets.encode('score_updated', scores, seq=9)
+    text, binary = packet.frames[MSGPACK]
+    assert text.encode() == '451-["score_updated",{"_placeholder":true,"num":0},9]'
+    assert msgpack.unpackb(binary.data) == scores
+    assert packet.sizes[MSGPACK] < packet.sizes[JSON]
+    payload = Payload(scores)
+    assert packets.encode('score_updated', payload).frames[MSGPACK][1].data is \
+        packets.encode('event_deleted', payload).frames[MSGPACK][1].data
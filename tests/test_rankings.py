@@ -0,0 +1,98 @@
+import random
+from types import SimpleNamespace
+
+from game_rules import SCORING_RULES, ALLIANCES
+from rankings import RankingIndex
+
+COUNTERS = [f'{alliance}_{column}' for _, column, _, _ in SCORING_RULES for alliance in ALLIANCES]
+
+
+def result(match_id, teams, rng):
+    match = SimpleNamespace(id=match_id, red_score=rng.randint(0, 80), blue_score=rng.randint(0, 80))
+    for slot, team_id in zip(('red_team1_id', 'red_team2_id', 'blue_team1_id', 'blue_team2_id'), teams):
+        setattr(match, slot, team_id)
+    for counter in COUNTERS:
+        setattr(match, counter, rng.randint(0, 4))
+    return match
+
+
+def add_team(index, team_id, points=0):
+    index.set_points(team_id, team_id, team_id, points)
+
+
+def assert_ranked(index):
+    """Ranks and order match a full sort, and arrows show the last move only"""
+    expected = sorted(index._entries.values(), key=lambda entry: entry.sort_key())
+    assert index.ordered() == expected
+    assert {entry.team_id: entry.current_rank for entry in expected} == \
+        {entry.team_id: rank for rank, entry in enumerate(expected, 1)}
+
+
+def test_insert_shifts_teams_below():
+    index = RankingIndex()
+    for team_id, points in ((1, 9), (3, 6), (5, 3)):
+        add_team(index, team_id, points)
+    index.reposition()
+    add_team(index, 2, 7)
+    changes = index.reposition()
+    assert {entry.team_id: entry.current_rank for entry in index.ordered()} == {1: 1, 2: 2, 3: 3, 5: 4}
+    assert {(entry.team_id, previous, current) for entry, previous, current in changes} == \
+        {(1, 1, 1), (2, None, 2), (3, 2, 3), (5, 3, 4)}
+
+
+def test_remove_shifts_teams_below():
+    index = RankingIndex()
+    for team_id in range(1, 6):
+        add_team(index, team_id, 10 - team_id)
+    index.reposition()
+    index.remove_team(2)
+    index.reposition()
+    assert [(entry.team_id, entry.current_rank) for entry in index.ordered()] == [(1, 1), (3, 2), (4, 3), (5, 4)]
+
+
+def test_arrows_clear_on_the_next_update():
+    index = RankingIndex()
+    for team_id in range(1, 4):
+        add_team(index, team_id, 10 - team_id)
+    index.reposition()
+    add_team(index, 3, 20)
+    index.reposition()
+    assert (index.get(3).previous_rank, index.get(3).current_rank) == (3, 1)
+    add_team(index, 1, 9)
+    changes = index.reposition()
+    assert {(entry.team_id, previous, current) for entry, previous, current in changes} == \
+        {(3, 1, 1), (1, 2, 2), (2, 3, 3)}
+    assert all(entry.previous_rank == entry.current_rank for entry in index.ordered())
+
+
+def test_matches_a_full_sort_after_random_updates():
+    rng = random.Random(7)
+    index = RankingIndex()
+    team_ids = list(range(1, 61))
+    for team_id in team_ids:
+        add_team(index, team_id, rng.randint(0, 10))
+    index.reposition()
+    assert_ranked(index)
+    next_team = next_match = 100
+    for _ in range(300):
+        for _ in range(rng.randint(1, 3)):
+            action = rng.random()
+            if action < 0.1 and len(team_ids) > 4:
+                index.remove_team(team_ids.pop(rng.randrange(len(team_ids))))
+            elif action < 0.2:
+                next_team += 1
+                team_ids.append(next_team)
+                add_team(index, next_team, rng.randint(0, 20))
+            elif action < 0.3 and next_match > 100:
+                index.forget_match(rng.randint(100, next_match - 1))
+            else:
+                next_match += 1
+                teams = rng.sample(team_ids, 4)
+                index.record_match(result(next_match, teams, rng))
+                for team_id in teams:
+                    add_team(index, team_id, index.get(team_id).ranking_points + rng.randint(0, 4))
+        changes = index.reposition()
+        assert_ranked(index)
+        changed = {entry.team_id for entry, previous, current in changes}
+        showing = {entry.team_id for entry in index.ordered() if entry.previous_rank != entry.current_rank}
+        assert showing <= changed
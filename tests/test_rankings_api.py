@@ -0,0 +1,58 @@
+from sqlalchemy import text
+
+import app as server
+from conftest import add_teams
+from cluster import cluster
+from data_versions import rankings_version
+from db import db
+from models import TeamRanking
+from rankings import ranking_index
+
+
+def rank_teams(points):
+    """TeamRanking rows for teams 1.. with these RPs, ranked"""
+    team_ids = add_teams(*range(1, len(points) + 1))
+    db.session.add_all(TeamRanking(team_id=team_id, ranking_points=rp) for team_id, rp in zip(team_ids, points))
+    db.session.commit()
+    server.update_rankings()
+    return team_ids
+
+
+def order(response):
+    return [(item['team_number'], item['rank'], item['ranking_points']) for item in response.json]
+
+
+def test_rankings_304_until_a_ranking_changes(app, http):
+    team_ids = rank_teams([3, 5, 1])
+    response = http.get('/api/rankings')
+    assert order(response) == [(2, 1, 5), (1, 2, 3), (3, 3, 1)]
+    etag = response.headers['ETag'].strip('"')
+    assert http.get('/api/rankings', headers={'If-None-Match': etag}).status_code == 304
+
+    ranking = TeamRanking.query.filter_by(team_id=team_ids[2]).one()
+    ranking.ranking_points = 9
+    ranking_index.set_points(team_ids[2], ranking.id, 3, 9)
+    server.update_rankings()
+    response = http.get('/api/rankings', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert order(response) == [(3, 1, 9), (2, 2, 5), (1, 3, 3)]
+    # Our own updates keep the index in sync, nothing is reloaded
+    assert not rankings_version.stale()
+
+
+def test_change_on_another_worker_reloads_the_index(app, http):
+    team_ids = rank_teams([3, 5, 1])
+    http.get('/api/rankings')
+    # Another worker re-ranks team 3 first and moves the shared version
+    with db.engine.begin() as connection:
+        connection.execute(text('UPDATE team_ranking SET ranking_points = 9, previous_rank = 3, current_rank = 1 '
+                                'WHERE team_id = :team_id'), {'team_id': team_ids[2]})
+        connection.execute(text('UPDATE team_ranking SET previous_rank = current_rank, current_rank = current_rank + 1 '
+                                'WHERE team_id != :team_id'), {'team_id': team_ids[2]})
+    db.session.expire_all()
+    cluster.backend.incr(rankings_version.key)
+
+    assert rankings_version.stale()
+    assert order(http.get('/api/rankings')) == [(3, 1, 9), (2, 2, 5), (1, 3, 3)]
+    assert ranking_index.get(team_ids[2]).ranking_points == 9
+    assert [entry.team_id for entry in ranking_index.ordered()] == [team_ids[2], team_ids[1], team_ids[0]]
@@ -0,0 +1,38 @@
+import pytest
+
+import app as server
+from cluster import cluster
+from conftest import add_teams, add_match
+from models import MatchEvent, MatchSnapshot
+
+
+@pytest.fixture
+def legacy_match(app):
+    """A match scored before event sourcing: counters without any MatchEvent"""
+    return add_match(add_teams(1, 2, 3, 4), status='completed', red_park=2, red_score=4)
+
+
+def overrides():
+    return MatchEvent.query.filter_by(event_type='score_override').count()
+
+
+def test_init_db_reconciles_once(app, legacy_match):
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0
+    assert '1 matches' in result.output
+    assert overrides() == 1
+    assert MatchSnapshot.query.filter_by(match_id=legacy_match.id).count() == 1
+
+    app.test_cli_runner().invoke(args=['init-db'])
+    assert overrides() == 1
+
+
+def test_only_the_timer_owner_reconciles_at_startup(app, legacy_match, monkeypatch):
+    monkeypatch.setattr(cluster, '_owner', False)
+    server.warm_reconcile()
+    assert MatchSnapshot.query.count() == 0
+
+    monkeypatch.setattr(cluster, '_owner', True)
+    server.warm_reconcile()
+    assert overrides() == 1
+    assert MatchSnapshot.query.count() == 1
@@ -0,0 +1,47 @@
+from replay import ReplayBuffer
+
+
+def buffer_with(*broadcasts, capacity=500):
+    """A buffer holding (event, rooms, match_id) broadcasts, numbered from 1"""
+    buffer = ReplayBuffer(capacity)
+    for event, rooms, match_id in broadcasts:
+        seq = buffer.next_seq()
+        buffer.record(seq, event, {'seq': seq}, None, rooms, match_id)
+    return buffer
+
+
+def seqs(broadcasts):
+    return [broadcast.seq for broadcast in broadcasts]
+
+
+def test_missed_broadcasts_for_the_clients_rooms():
+    buffer = buffer_with(('event_added', ['display'], 1),
+                         ('event_added', ['fta'], 1),
+                         ('match_started', ['display', 'fta'], 2))
+    assert seqs(buffer.missed(buffer.epoch, 1, ['display'])) == [3]
+    assert seqs(buffer.missed(buffer.epoch, 0, ['fta'])) == [2, 3]
+    assert buffer.missed(buffer.epoch, 3, ['display']) == []
+
+
+def test_only_the_latest_full_state_event_per_match():
+    buffer = buffer_with(('score_updated', ['display'], 1),
+                         ('event_added', ['display'], 1),
+                         ('score_updated', ['display'], 2),
+                         ('score_updated', ['display'], 1),
+                         ('timer_state', ['display'], 1))
+    assert seqs(buffer.missed(buffer.epoch, 0, ['display'])) == [2, 3, 4]
+
+
+def test_snapshot_when_the_broadcasts_are_gone():
+    buffer = buffer_with(*[('event_added', ['display'], 1)] * 5, capacity=3)
+    assert buffer.missed(buffer.epoch, 1, ['display']) is None
+    assert seqs(buffer.missed(buffer.epoch, 2, ['display'])) == [3, 4, 5]
+
+
+def test_snapshot_after_a_restart_or_for_an_unknown_position():
+    buffer = buffer_with(('event_added', ['display'], 1))
+    assert buffer.missed('other-epoch', 0, ['display']) is None
+    assert buffer.missed(buffer.epoch, 7, ['display']) is None
+    assert buffer.missed(buffer.epoch, None, ['display']) is None
+    buffer.enabled = False
+    assert buffer.missed(buffer.epoch, 0, ['display']) is None
@@ -0,0 +1,36 @@
+from rooms import router
+
+
+def names(client):
+    return [packet['name'] for packet in client.get_received()]
+
+
+def test_events_reach_only_their_consumer_roles(app, connect):
+    display, referee, fta, legacy = connect('display'), connect('referee-red'), connect('fta'), connect(None)
+    for client in (display, referee, fta, legacy):
+        client.get_received()
+
+    router.emit('bonus_activated', {'alliance': 'red'})
+    router.emit('show_prematch', {'match_number': 3})
+    assert names(display) == ['show_prematch']
+    assert names(referee) == ['bonus_activated']
+    assert names(fta) == []
+    # Pages that send no role still get everything
+    assert names(legacy) == ['bonus_activated', 'show_prematch']
+
+
+def test_match_room_gets_events_about_its_match(app, connect):
+    fta = connect('fta', match_id=7)
+    fta.get_received()
+    router.emit('match_stopped', {'match_id': 7})
+    router.emit('match_stopped', {'match_id': 8})
+    assert [packet['args'][0] for packet in fta.get_received()] == [{'match_id': 7}]
+
+
+def test_broadcasts_carry_increasing_sequence_numbers(app, connect):
+    display = connect('display')
+    display.get_received()
+    router.emit('show_live', {'red_score': 0})
+    router.emit('clear_endgame', {})
+    seqs = [packet['args'][-1] for packet in display.get_received()]
+    assert seqs[0] < seqs[1]
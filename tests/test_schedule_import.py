@@ -0,0 +1,57 @@
+from models import Team, Match
+
+SCHEDULE = """match_number,match_type,red_team1,red_team2,blue_team1,blue_team2
+1,Qualification,101,102,103,104
+2,Qualification,105,101,102,
+"""
+
+
+def test_csv_schedule_creates_missing_teams(http):
+    response = http.post('/api/admin/import', data=SCHEDULE, content_type='text/csv')
+    assert response.status_code == 200
+    report = response.json
+    assert (report['teams_created'], report['matches_created']) == (5, 2)
+    assert Team.query.count() == 5
+    match = Match.query.filter_by(match_number=2).one()
+    assert (match.red_team1.number, match.blue_team2_id) == (105, None)
+
+    # Importing the same schedule again skips the existing matches
+    assert http.post('/api/admin/import', data=SCHEDULE, content_type='text/csv').json['matches_skipped'] == 2
+    assert Match.query.count() == 2
+
+
+def test_json_team_list_renames_existing_teams(http):
+    http.post('/api/admin/import', json={'teams': [{'number': 7, 'name': 'Old'}]})
+    report = http.post('/api/admin/import', json={'teams': [{'number': 7, 'name': 'New'}, {'number': 8}]}).json
+    assert (report['teams_created'], report['teams_renamed']) == (1, 1)
+    assert {team.number: team.name for team in Team.query} == {7: 'New', 8: 'Team 8'}
+
+
+def test_any_invalid_row_aborts_the_import(http):
+    response = http.post('/api/admin/import', json={'matches': [
+        {'match_number': 1, 'red_team1': 1, 'red_team2': 2, 'blue_team1': 3, 'blue_team2': 4},
+        {'match_number': 2, 'red_team1': 5, 'red_team2': 5, 'blue_team1': 6, 'blue_team2': 7},
+        {'match_number': 'x'},
+    ]})
+    assert response.status_code == 422
+    assert [error['row'] for error in response.json['errors']] == [2, 3]
+    assert Team.query.count() == 0 and Match.query.count() == 0
+
+
+def test_dry_run_writes_nothing(http):
+    report = http.post('/api/admin/import?dry_run=1', data=SCHEDULE, content_type='text/csv').json
+    assert report['matches_created'] == 2
+    assert Match.query.count() == 0
+
+
+def test_unreadable_csv(http):
+    assert http.post('/api/admin/import', data='a,b\n1,2\n', content_type='text/csv').status_code == 400
+
+
+def test_malformed_json_is_rejected(http):
+    assert http.post('/api/admin/import', json={'teams': 'abc'}).status_code == 400
+    for body in ([1, 2], {'matches': [None]}, {'teams': [{'number': 1}, 'x']}):
+        response = http.post('/api/admin/import', json=body)
+        assert response.status_code == 422
+        assert response.json['errors'][-1]['message'].startswith('Expected an object')
+    assert Team.query.count() == 0
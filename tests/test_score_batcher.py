@@ -0,0 +1,54 @@
+from flask import Flask
+
+from score_batcher import ScoreBatcher
+
+
+class FakeSocketIO:
+    """Runs background tasks only when told to"""
+
+    def __init__(self):
+        self.tasks = []
+
+    def start_background_task(self, target, *args):
+        self.tasks.append((target, args))
+
+    def sleep(self, seconds):
+        pass
+
+    def run_tasks(self):
+        tasks, self.tasks = self.tasks, []
+        for target, args in tasks:
+            target(*args)
+
+
+def batcher(window_ms):
+    app = Flask(__name__)
+    app.config['SCORE_BATCH_WINDOW_MS'] = window_ms
+    socketio, batches = FakeSocketIO(), []
+    batcher = ScoreBatcher()
+    batcher.init_app(app, socketio, batches.append)
+    return batcher, socketio, batches
+
+
+def test_events_within_a_window_are_applied_together():
+    score_batcher, socketio, batches = batcher(25)
+    for n in range(3):
+        score_batcher.submit({'n': n})
+    assert batches == []
+    assert len(socketio.tasks) == 1
+    socketio.run_tasks()
+    assert batches == [[{'n': 0}, {'n': 1}, {'n': 2}]]
+
+    score_batcher.submit({'n': 3})
+    socketio.run_tasks()
+    assert batches[-1] == [{'n': 3}]
+    stats = score_batcher.stats.to_dict()
+    assert (stats['batches'], stats['events'], stats['max_batch_size']) == (2, 4, 3)
+
+
+def test_zero_window_applies_each_event_right_away():
+    score_batcher, socketio, batches = batcher(0)
+    score_batcher.submit({'n': 0})
+    score_batcher.submit({'n': 1})
+    assert batches == [[{'n': 0}], [{'n': 1}]]
+    assert socketio.tasks == []
@@ -0,0 +1,27 @@
+from conftest import add_teams, add_match
+from data_versions import epoch
+
+
+def received(client, name):
+    return [packet['args'][0] for packet in client.get_received() if packet['name'] == name]
+
+
+def test_score_updates_carry_versions_and_epoch(app, connect):
+    match = add_match(add_teams(1, 2, 3, 4), status='in_progress')
+    referee = connect('referee')
+    referee.get_received()
+
+    for _ in range(2):
+        referee.emit('score_event', {'match_id': match.id, 'alliance': 'red', 'event_type': 'climb'})
+    updates = received(referee, 'score_updated')
+    assert [update['red_score'] for update in updates] == [14, 28]
+    assert updates[0]['version'] < updates[1]['version']
+    assert {update['epoch'] for update in updates} == {epoch()}
+
+
+def test_unknown_score_event_is_ignored(app, connect):
+    match = add_match(add_teams(1, 2, 3, 4), status='in_progress')
+    referee = connect('referee')
+    referee.get_received()
+    referee.emit('score_event', {'match_id': match.id, 'alliance': 'red', 'event_type': 'teleport'})
+    assert received(referee, 'score_updated') == []
@@ -0,0 +1,47 @@
+from sqlalchemy import text
+
+from conftest import add_teams
+from db import db
+from models import Team
+from team_directory import team_directory
+
+
+def test_committed_changes_update_the_cache(app):
+    team_id, = add_teams(254)
+    team_directory.ensure_loaded()
+    team = db.session.get(Team, team_id)
+    team.number = 1678
+    db.session.commit()
+    assert team_directory.get(1678).id == team_id
+    assert team_directory.resolve(254) is None
+
+    db.session.delete(db.session.get(Team, team_id))
+    db.session.commit()
+    assert team_directory.number_of(team_id) is None
+
+
+def test_rolled_back_changes_are_not_cached(app):
+    team_directory.ensure_loaded()
+    db.session.add(Team(number=33, name='Team 33'))
+    db.session.flush()
+    db.session.rollback()
+    assert team_directory.get(33) is None
+
+
+def test_teams_added_elsewhere_are_found(app):
+    team_directory.ensure_loaded()
+    # Another worker (or a raw statement) added a team this cache never saw
+    db.session.execute(text("INSERT INTO team (number, name) VALUES (971, 'Spartan')"))
+    db.session.commit()
+    hits, misses = team_directory.hits, team_directory.misses
+    assert team_directory.get(971).name == 'Spartan'
+    team_directory.get(971)
+    assert (team_directory.hits - hits, team_directory.misses - misses) == (1, 1)
+
+
+def test_resolve_or_create_adds_a_placeholder(app):
+    team_id = team_directory.resolve_or_create('604')
+    db.session.commit()
+    assert team_directory.number_of(team_id) == 604
+    assert db.session.get(Team, team_id).name == 'Team 604'
+    assert team_directory.resolve_or_create('') is None
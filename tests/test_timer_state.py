@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+import app as server
+from cluster import match_state
+from conftest import add_match, add_teams
+
+
+def test_stopped_countdown_has_no_deadline(app):
+    match = add_match(add_teams(1, 2, 3, 4), match_time_remaining=95,
+                      red_bonus_active=True, red_bonus_time_remaining=20)
+    state = server.timer_state(match, 'stop')
+    assert state['match_id'] == match.id
+    assert state['remaining'] == 95.0
+    assert state['deadline'] is None and not state['running']
+    # The red bonus ends when the match clock shows 75 seconds
+    assert state['red_bonus_until'] == 75
+    assert state['blue_bonus_until'] is None
+
+
+def test_late_joiners_get_the_countdown_as_of_now(app):
+    match_state.timer_state = {'match_id': 1, 'reason': 'start', 'server_time': 100.0, 'remaining': 60.0,
+                               'deadline': 160.0, 'running': True, 'field_fault': False,
+                               'sent_at': time.time() - 10}
+    state = server.current_timer_state()
+    assert state['reason'] == 'sync'
+    assert state['deadline'] == 160.0
+    assert 49 < state['remaining'] <= 50
+    assert state['server_time'] + state['remaining'] == pytest.approx(state['deadline'])
+
+
+def test_timer_state_on_connect_only_while_running(app, connect):
+    match_state.timer_state = {'match_id': 1, 'reason': 'start', 'server_time': 100.0, 'remaining': 60.0,
+                               'deadline': 160.0, 'running': True, 'field_fault': False, 'sent_at': time.time()}
+    received = [packet['name'] for packet in connect('display').get_received()]
+    assert 'timer_state' in received
+    assert 'timer_state' not in [packet['name'] for packet in connect('rankings').get_received()]
+    match_state.timer_state = dict(match_state.timer_state, running=False)
+    assert 'timer_state' not in [packet['name'] for packet in connect('display').get_received()]
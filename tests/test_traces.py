@@ -0,0 +1,29 @@
+import pytest
+
+from conftest import add_teams, add_match
+from tracing import tracer
+
+
+@pytest.fixture
+def tracing(app):
+    tracer.enabled = True
+    tracer.clear()
+    yield tracer
+    tracer.clear()
+    tracer.enabled = False
+
+
+def test_traced_score_event_is_listed_with_its_stages(tracing, http, connect):
+    match = add_match(add_teams(1, 2, 3, 4), status='in_progress')
+    referee = connect('referee')
+    referee.emit('score_event', {'match_id': match.id, 'alliance': 'blue', 'event_type': 'park',
+                                 'trace_id': 'abc-1', 'client_ts': 1})
+    referee.emit('score_event', {'match_id': match.id, 'alliance': 'blue', 'event_type': 'park'})
+
+    result = http.get('/api/admin/traces').json
+    assert result['trace_count'] == 1
+    assert [trace['id'] for trace in result['traces']] == ['abc-1']
+    assert set(result['traces'][0]['spans']) >= {'queue', 'score', 'commit', 'emit'}
+
+    http.delete('/api/admin/traces')
+    assert http.get('/api/admin/traces').json['trace_count'] == 0
@@ -0,0 +1,178 @@
+"""Per-score-event latency traces, from referee tap to display render.
+
+With tracing on (IRISH_TRACING=1) the referee panel tags each score_event
+with a trace id and its own send time. The server times the stages of the
+batch that applies the event: waiting for the batch, validation, the game
+rule update, the MatchEvent insert, the commit and the broadcast.
+score_updated carries the trace ids back out, and displays answer with
+trace_ack once the new score has been painted. Traces are kept in a bounded
+ring buffer (IRISH_TRACE_BUFFER, default 1000), shown on the admin page and
+exported from /api/admin/traces.
+
+The referee -> server time compares two clocks and includes any skew between
+them. A display's receive -> render time is measured on one clock.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# Acknowledgements kept per trace (one per display)
+MAX_ACKS = 50
+SPANS = ('queue', 'validate', 'score', 'event_insert', 'commit', 'emit')
+
+
+def _now_ms():
+    return time.time() * 1000
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class Trace:
+    __slots__ = ('id', 'match_id', 'alliance', 'event_type', 'client_sent_ms', 'received_ms',
+                 'received', 'emitted', 'spans', 'acks')
+
+    def __init__(self, trace_id, data):
+        self.id = trace_id
+        self.match_id = data.get('match_id')
+        self.alliance = data.get('alliance')
+        self.event_type = data.get('event_type')
+        client_ts = data.get('client_ts')
+        self.client_sent_ms = client_ts if isinstance(client_ts, (int, float)) else None
+        self.received_ms = _now_ms()
+        self.received = time.perf_counter()
+        self.emitted = None
+        self.spans = {}
+        self.acks = []
+
+    def to_dict(self):
+        renders = [ack['receive_to_render_ms'] for ack in self.acks if ack['receive_to_render_ms'] is not None]
+        return {
+            'id': self.id,
+            'match_id': self.match_id,
+            'alliance': self.alliance,
+            'event_type': self.event_type,
+            'client_sent_at': self.client_sent_ms,
+            'server_received_at': round(self.received_ms, 3),
+            'client_to_server_ms': round(self.received_ms - self.client_sent_ms, 3) if self.client_sent_ms else None,
+            'spans': dict(self.spans),
+            'server_ms': _ms(self.emitted - self.received) if self.emitted else None,
+            'acks': list(self.acks),
+            'max_render_ms': max(renders) if renders else None,
+        }
+
+
+class SpanTimer:
+    """Accumulates stage durations of one score batch for its traced events"""
+
+    def __init__(self, tracer, trace_ids):
+        self.tracer = tracer
+        self.trace_ids = trace_ids
+        self.spans = dict.fromkeys(SPANS[1:], 0.0)
+        self.started = self._last = time.perf_counter()
+
+    def mark(self, name):
+        """Charge the time since the previous mark to a stage"""
+        now = time.perf_counter()
+        self.spans[name] += now - self._last
+        self._last = now
+
+    def finish(self):
+        self.tracer._record_batch(self.trace_ids, self.started, self.spans, self._last)
+
+
+class _NoSpans:
+    def mark(self, name):
+        pass
+
+    def finish(self):
+        pass
+
+
+NO_SPANS = _NoSpans()
+
+
+class Tracer:
+    """Ring buffer of recent score event traces"""
+
+    def __init__(self):
+        self.enabled = False
+        self.capacity = 1000
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get('TRACING_ENABLED', False))
+        self.capacity = int(app.config.get('TRACE_BUFFER_SIZE', 1000))
+        app.add_template_global(self.tracing_enabled)
+
+    def tracing_enabled(self):
+        return self.enabled
+
+    def receive(self, data):
+        """Start the trace of an incoming score_event that carries a trace id"""
+        if not self.enabled or not isinstance(data, dict) or not data.get('trace_id'):
+            return
+        trace_id = str(data['trace_id'])[:64]
+        data['trace_id'] = trace_id
+        with self._lock:
+            self._traces[trace_id] = Trace(trace_id, data)
+            while len(self._traces) > self.capacity:
+                self._traces.popitem(last=False)
+
+    def batch(self, batch):
+        """SpanTimer for a score batch, or a no-op one if none of its events is traced"""
+        if not self.enabled:
+            return NO_SPANS
+        trace_ids = [data['trace_id'] for data in batch if data.get('trace_id') in self._traces]
+        return SpanTimer(self, trace_ids) if trace_ids else NO_SPANS
+
+    def _record_batch(self, trace_ids, started, spans, emitted):
+        with self._lock:
+            for trace_id in trace_ids:
+                trace = self._traces.get(trace_id)
+                if trace is None:
+                    continue
+                trace.spans = {'queue': _ms(started - trace.received)}
+                trace.spans.update((name, _ms(seconds)) for name, seconds in spans.items())
+                trace.emitted = emitted
+
+    def ack(self, data, role=None):
+        """A display's trace_ack: {trace_ids, received_at, rendered_at} in its own clock (ms)"""
+        if not self.enabled or not isinstance(data, dict):
+            return
+        now = time.perf_counter()
+        received, rendered = data.get('received_at'), data.get('rendered_at')
+        render_ms = None
+        if isinstance(received, (int, float)) and isinstance(rendered, (int, float)):
+            render_ms = round(rendered - received, 3)
+        with self._lock:
+            for trace_id in (data.get('trace_ids') or [])[:100]:
+                trace = self._traces.get(str(trace_id))
+                if trace is None or trace.emitted is None or len(trace.acks) >= MAX_ACKS:
+                    continue
+                trace.acks.append({
+                    'role': role,
+                    'receive_to_render_ms': render_ms,
+                    'emit_to_ack_ms': _ms(now - trace.emitted),
+                })
+
+    def recent(self, limit=None, match_id=None):
+        """Traces, newest first"""
+        with self._lock:
+            traces = list(self._traces.values())
+        traces.reverse()
+        if match_id is not None:
+            traces = [trace for trace in traces if trace.match_id == match_id]
+        return [trace.to_dict() for trace in traces[:limit]]
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+    def to_dict(self):
+        return {'enabled': self.enabled, 'capacity': self.capacity, 'traces': len(self._traces)}
+
+
+tracer = Tracer()
@@ -0,0 +1,20 @@
+"""Server entry point.
+
+    python wsgi.py                                   # eventlet server on $PORT (default 5000)
+    gunicorn --worker-class eventlet -w 1 wsgi:app   # or under gunicorn
+
+Eventlet has to patch the standard library before the app is imported. Create
+the schema first with ``flask --app app init-db`` (or ``python app.py init-db``).
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import os
+
+from app import create_app, socketio, warm_up
+
+app = create_app()
+warm_up(app)
+
+if __name__ == '__main__':
+    socketio.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))